@@ -0,0 +1,58 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: dashboard_logic.py
+#   Descripción: Datos de la página de inicio de un usuario (sensores,
+#   mediciones de hoy y recompensas) en una sola petición
+#-----------------------------------
+
+from fastapi import HTTPException
+from .db import connection
+from .sensores import user_sensors_with_readings, today_measurements
+from .recent_readings import recent_readings
+from .reward_logic import user_rewards
+
+
+def get_user_dashboard(user_id: int, conn=None):
+    """
+    @brief Reúne lo que antes eran tres peticiones (/v1/data/user_sensors,
+    /v1/data/today y /v1/rewards) en una.
+
+    Todo va por una única conexión y el usuario se comprueba una sola vez.
+    Las consultas se lanzan una tras otra: una conexión de MySQL solo admite
+    una sentencia en curso. Las últimas mediciones de cada sensor salen de
+    la caché recent_readings cuando están en ella.
+
+    @param user_id ID del usuario.
+    @param conn Conexión opcional a la base de datos.
+    @return dict con el usuario, sus sensores, las mediciones de hoy y las recompensas.
+    @exception HTTPException 404 si el usuario no existe.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    token = recent_readings.begin_load()
+    try:
+        with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT ID, USERNAME FROM USUARIOS WHERE ID = %s", (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+            sensores = user_sensors_with_readings(cursor, user_id, token)
+            mediciones = today_measurements(cursor, [s["uuid"] for s in sensores])
+            rewards = user_rewards(cursor, user_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+
+    return {
+        "status": "ok",
+        "usuario": {"id": user["ID"], "username": user["USERNAME"]},
+        "sensores": sensores,
+        "mediciones_hoy": mediciones,
+        "rewards": rewards
+    }
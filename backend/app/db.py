@@ -9,7 +9,14 @@
 #-----------------------------------
 
 import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
 import mysql.connector
+from mysql.connector import errors
 from dotenv import load_dotenv
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,15 +25,350 @@ ENV_PATH = os.path.join(BASE_DIR, ".env")
 if os.path.isfile(ENV_PATH):
     load_dotenv(ENV_PATH)
 
+logger = logging.getLogger(__name__)
+
 #-----------------------------------
-#   Función para conectar a la base de datos
+#   Configuración del pool de conexiones
 #-----------------------------------
 
-def get_connection():
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+POOL_PREWARM = int(os.environ.get("DB_POOL_PREWARM", 2))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))
+POOL_PING_INTERVAL = float(os.environ.get("DB_POOL_PING_INTERVAL", 30))
+
+
+def open_raw_connection():
+    """
+    @brief Abre una conexión nueva contra MySQL, sin pasar por el pool.
+    @return MySQLConnection recién creada.
+    """
     return mysql.connector.connect(
         host=os.environ.get("DB_HOST", "localhost"),
         port=int(os.environ.get("DB_PORT", 3306)),
         user=os.environ.get("DB_USER", "root"),
         password=os.environ.get("DB_PASSWORD", ""),
         database=os.environ.get("DB_NAME", "mydb")
-    )
\ No newline at end of file
+    )
+
+
+class _PoolEntry:
+    """
+    @brief Conexión física guardada en el pool junto con sus marcas de tiempo.
+    """
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    @brief Conexión prestada por el pool.
+
+    Se comporta como una MySQLConnection (delega cualquier atributo en ella),
+    pero close() la devuelve al pool en lugar de cerrar el socket. Así el código
+    existente que hace conn.close() sigue funcionando sin cambios.
+
+    after_commit() guarda funciones que se ejecutan justo después del próximo
+    commit; si la transacción se deshace o la conexión se devuelve sin commit,
+    se descartan.
+    """
+
+    def __init__(self, entry: _PoolEntry, pool: "ConnectionPool"):
+        self._entry = entry
+        self._pool = pool
+        self._after_commit = []
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get("_entry")
+        if entry is None:
+            raise errors.OperationalError("La conexión ya ha sido devuelta al pool")
+        return getattr(entry.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def after_commit(self, callback):
+        self._after_commit.append(callback)
+
+    def commit(self):
+        self.__getattr__("commit")()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Error tras el commit: {e}")
+
+    def rollback(self):
+        self._after_commit = []
+        self.__getattr__("rollback")()
+
+    def close(self):
+        self._after_commit = []
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+
+class ConnectionPool:
+    """
+    @brief Pool acotado de conexiones MySQL.
+
+    - Como máximo `size` conexiones prestadas o en reposo a la vez.
+    - Las conexiones que superan `max_lifetime` segundos se reciclan.
+    - Las conexiones en reposo más de `ping_interval` segundos se comprueban
+      con un ping antes de prestarlas.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 max_lifetime: float = POOL_MAX_LIFETIME,
+                 ping_interval: float = POOL_PING_INTERVAL,
+                 connect=open_raw_connection):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._connect = connect
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._in_use = 0
+        self._counters = {
+            "created": 0,
+            "recycled": 0,
+            "failed_pings": 0,
+            "discarded": 0,
+            "timeouts": 0,
+        }
+
+    # ---------- Gestión interna ----------
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _new_entry(self) -> _PoolEntry:
+        entry = _PoolEntry(self._connect())
+        self._count("created")
+        return entry
+
+    def _discard(self, entry: _PoolEntry, reason: str):
+        self._count(reason)
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _expired(self, entry: _PoolEntry, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at >= self.max_lifetime
+
+    def _alive(self, entry: _PoolEntry, now: float) -> bool:
+        if now - entry.last_used < self.ping_interval:
+            return True
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    # ---------- API pública ----------
+
+    def acquire(self) -> PooledConnection:
+        """
+        @brief Presta una conexión sana del pool, abriendo una nueva si hace falta.
+        @return PooledConnection lista para usar.
+        @exception PoolError si no queda ninguna libre tras `timeout` segundos.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("timeouts")
+            raise errors.PoolError("No hay conexiones libres en el pool de la base de datos")
+
+        try:
+            entry = None
+            while entry is None:
+                with self._lock:
+                    candidate = self._idle.pop() if self._idle else None
+                if candidate is None:
+                    entry = self._new_entry()
+                    break
+
+                now = time.monotonic()
+                if self._expired(candidate, now):
+                    self._discard(candidate, "recycled")
+                elif not self._alive(candidate, now):
+                    self._discard(candidate, "failed_pings")
+                else:
+                    entry = candidate
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+        return PooledConnection(entry, self)
+
+    def release(self, entry: _PoolEntry):
+        """
+        @brief Devuelve una conexión al pool. Deshace cualquier transacción
+        pendiente para que el siguiente usuario no herede su estado.
+        """
+        try:
+            if self._expired(entry, time.monotonic()):
+                self._discard(entry, "recycled")
+                return
+            try:
+                if entry.raw.in_transaction:
+                    entry.raw.rollback()
+            except Exception:
+                self._discard(entry, "discarded")
+                return
+
+            entry.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(entry)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def prewarm(self, count: int):
+        """
+        @brief Abre por adelantado hasta `count` conexiones en reposo.
+        """
+        count = min(count, self.size)
+        opened = []
+        try:
+            while len(opened) + len(self._idle) < count:
+                opened.append(self._new_entry())
+        finally:
+            with self._lock:
+                self._idle.extend(opened)
+
+    def close_all(self):
+        """
+        @brief Cierra todas las conexiones en reposo.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            try:
+                entry.raw.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self._counters,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    @brief Devuelve el pool del proceso, creándolo la primera vez.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def init_pool():
+    """
+    @brief Crea el pool y precalienta POOL_PREWARM conexiones.
+    Si la base de datos no está disponible al arrancar, solo se registra el aviso.
+    """
+    try:
+        get_pool().prewarm(POOL_PREWARM)
+    except Exception as e:
+        logger.warning(f"No se pudo precalentar el pool de conexiones: {e}")
+
+
+def close_pool():
+    """
+    @brief Cierra las conexiones en reposo del pool (al apagar la aplicación).
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
+
+#-----------------------------------
+#   Función para conectar a la base de datos
+#-----------------------------------
+
+def get_connection():
+    return get_pool().acquire()
+
+
+def on_commit(conn, callback):
+    """
+    @brief Ejecuta `callback` cuando se confirme la transacción de `conn`.
+
+    Para actualizar cachés en memoria solo con datos ya visibles para las
+    demás conexiones: si se hiciera antes del commit, otra petición podría
+    volver a llenar la caché con lo anterior mientras tanto.
+
+    @param conn Conexión (del pool) en la que se ha escrito.
+    @param callback Función sin argumentos.
+    """
+    register = getattr(conn, "after_commit", None)
+    if register is None:
+        callback()
+    else:
+        register(callback)
+
+
+@contextmanager
+def connection(conn=None):
+    """
+    @brief Context manager para usar una conexión respetando el parámetro `conn`.
+
+    Si se recibe una conexión externa (tests, dependencia por petición) se usa
+    tal cual y no se hace commit ni se cierra: eso es cosa de quien la creó.
+    Si no, se toma una del pool, se hace commit al salir sin errores y se
+    devuelve al pool (que deshace lo pendiente si hubo una excepción).
+
+    @param conn Conexión opcional a la base de datos.
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_db():
+    """
+    @brief Dependencia de FastAPI que da a cada petición una única conexión y transacción.
+
+    La conexión se pasa al parámetro `conn` de la lógica de negocio, que entonces
+    no hace commit por su cuenta. Al terminar la petición se hace un solo commit;
+    si el endpoint lanza una excepción (p. ej. HTTPException) se deshace todo.
+    """
+    with connection() as conn:
+        yield conn
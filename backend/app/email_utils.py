@@ -227,4 +227,31 @@ def send_incident_updated_email(to_email: str, incident_id: int, changes: dict):
         html_body=html
     )
 
-    return send_email_via_sendgrid(payload)
\ No newline at end of file
+    return send_email_via_sendgrid(payload)
+
+def send_sensor_inactive_email(to_email: str, username: str, uuid: str, state: str, last_active):
+    estado = "ha dejado de funcionar" if state == "DEAD" else "lleva un tiempo sin enviar datos"
+    ultima = last_active.strftime("%d/%m/%Y %H:%M") if last_active else "nunca"
+
+    content = f"""
+        <p>Hola {username},</p>
+
+        <p>Tu sensor <b>{uuid}</b> {estado}.</p>
+        <p><b>Última medición recibida:</b> {ultima}</p>
+
+        <p>Comprueba que está encendido y conectado. Volverá a aparecer como activo
+        en cuanto envíe una nueva medición.</p>
+    """
+
+    html = build_corporate_email(
+        title="Sensor inactivo",
+        content_html=content
+    )
+
+    payload = build_sendgrid_payload(
+        to_email=to_email,
+        subject="Tu sensor no está enviando datos",
+        html_body=html
+    )
+
+    return send_email_via_sendgrid(payload)
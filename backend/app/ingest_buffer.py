@@ -0,0 +1,239 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: ingest_buffer.py
+#   Descripción: Cola en memoria que acepta mediciones al instante y las
+#   escribe en la base de datos por lotes desde un hilo en segundo plano
+#-----------------------------------
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+INGEST_BUFFER_ENABLED = os.environ.get("INGEST_BUFFER_ENABLED", "0") == "1"
+INGEST_BUFFER_MAX_SIZE = int(os.environ.get("INGEST_BUFFER_MAX_SIZE", 10000))
+INGEST_BUFFER_BATCH_SIZE = int(os.environ.get("INGEST_BUFFER_BATCH_SIZE", 500))
+INGEST_BUFFER_FLUSH_INTERVAL = float(os.environ.get("INGEST_BUFFER_FLUSH_INTERVAL", 1.0))
+INGEST_BUFFER_MAX_BACKOFF = float(os.environ.get("INGEST_BUFFER_MAX_BACKOFF", 30.0))
+INGEST_BUFFER_MAX_ROW_RETRIES = int(os.environ.get("INGEST_BUFFER_MAX_ROW_RETRIES", 3))
+
+
+class IngestBuffer:
+    """
+    @brief Buffer de escritura diferida acotado en memoria.
+
+    Las filas se vuelcan con `writer(rows)` cuando se acumulan `batch_size`
+    o cada `flush_interval` segundos, lo que ocurra antes. Si la cola está
+    llena, offer() devuelve False y la medición se rechaza.
+
+    Si un volcado falla, el siguiente intento espera `flush_interval` y la
+    espera se dobla con cada fallo seguido, hasta `max_backoff` segundos.
+
+    `is_row_error(e)` distingue los errores de una fila concreta (un valor que
+    no cabe en su columna, un sensor borrado) de los del destino (base de
+    datos caída). Ante los primeros, el lote se parte por la mitad hasta
+    aislar las filas que fallan y el resto se escribe; cada fila aislada se
+    reintenta como mucho `max_row_retries` veces y después se descarta y se
+    cuenta en "bad_rows". Así una fila mala no bloquea la cola. Ante los
+    segundos (y por defecto, con cualquier error) el lote entero vuelve a la
+    cola sin gastar reintentos.
+    """
+
+    def __init__(self, writer, enabled: bool = INGEST_BUFFER_ENABLED,
+                 max_size: int = INGEST_BUFFER_MAX_SIZE,
+                 batch_size: int = INGEST_BUFFER_BATCH_SIZE,
+                 flush_interval: float = INGEST_BUFFER_FLUSH_INTERVAL,
+                 max_backoff: float = INGEST_BUFFER_MAX_BACKOFF,
+                 max_row_retries: int = INGEST_BUFFER_MAX_ROW_RETRIES,
+                 is_row_error=None):
+        self.enabled = enabled
+        self.max_backoff = max_backoff
+        self.max_row_retries = max_row_retries
+        self._is_row_error = is_row_error or (lambda e: False)
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writer = writer
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._thread = None
+        self._stopping = False
+        self._counters = {
+            "enqueued": 0,
+            "rejected": 0,
+            "flushed_rows": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "dropped": 0,
+            "bad_rows": 0,
+        }
+        self._flush_ms_total = 0.0
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+
+    # ---------- Productor ----------
+
+    def offer(self, row: tuple) -> bool:
+        """
+        @brief Encola una fila para escribirla más tarde.
+        @param row Fila con el formato que espera `writer`.
+        @return True si se ha encolado, False si la cola está llena.
+        """
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                self._counters["rejected"] += 1
+                return False
+            # Cada entrada lleva sus fallos aislados: [fila, fallos]
+            self._queue.append([row, 0])
+            self._counters["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    # ---------- Volcado ----------
+
+    def flush(self) -> bool:
+        """
+        @brief Escribe hasta `batch_size` filas de la cola.
+        Si la escritura falla por un error del destino, las filas vuelven al
+        principio de la cola mientras quepan; las que no caben se descartan y
+        se contabilizan. Si falla por filas concretas, se aíslan (ver la clase).
+        @return True si se escribieron todas las filas del lote.
+        """
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            entries = [self._queue.popleft() for _ in range(count)]
+        if not entries:
+            return True
+
+        start = time.perf_counter()
+        try:
+            self._writer([row for row, _ in entries])
+        except Exception as e:
+            logger.error(f"Error al volcar {len(entries)} mediciones: {e}")
+            written, failed, pending = self._isolate(entries, e)
+            self._requeue(entries, written, failed, pending)
+            return False
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._counters["flushes"] += 1
+            self._counters["flushed_rows"] += len(entries)
+            self._flush_ms_total += elapsed_ms
+            self._flush_ms_last = elapsed_ms
+            self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        return True
+
+    def _isolate(self, entries: list, error: Exception) -> tuple:
+        """
+        @brief Tras un fallo de `entries`, escribe por mitades lo que se pueda.
+        @return Tupla (filas escritas, entradas que fallan solas, entradas
+        pendientes por un error del destino).
+        """
+        if not self._is_row_error(error):
+            return 0, [], entries
+        if len(entries) == 1:
+            return 0, entries, []
+
+        written, failed, pending = 0, [], []
+        mid = len(entries) // 2
+        for part in (entries[:mid], entries[mid:]):
+            if pending:
+                # El destino ha dejado de responder: no se sigue probando
+                pending += part
+                continue
+            try:
+                self._writer([row for row, _ in part])
+                written += len(part)
+            except Exception as e:
+                part_written, part_failed, part_pending = self._isolate(part, e)
+                written += part_written
+                failed += part_failed
+                pending += part_pending
+        return written, failed, pending
+
+    def _requeue(self, entries: list, written: int, failed: list, pending: list):
+        """
+        @brief Devuelve a la cola, en su orden, las entradas pendientes y las
+        que han fallado solas y aún tienen reintentos; el resto se descarta.
+        """
+        for entry in failed:
+            entry[1] += 1
+        bad = [entry for entry in failed if entry[1] >= self.max_row_retries]
+        for entry in bad:
+            logger.error(f"Se descarta una medición tras {entry[1]} intentos: {entry[0]!r}")
+
+        retry = {id(entry) for entry in pending}
+        retry.update(id(entry) for entry in failed if entry[1] < self.max_row_retries)
+        keep = [entry for entry in entries if id(entry) in retry]
+
+        with self._lock:
+            self._counters["flush_errors"] += 1
+            self._counters["flushed_rows"] += written
+            self._counters["bad_rows"] += len(bad)
+            room = max(self.max_size - len(self._queue), 0)
+            self._queue.extendleft(reversed(keep[:room]))
+            self._counters["dropped"] += len(keep) - len(keep[:room])
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                if backoff:
+                    # Tras un error se espera aunque la cola esté llena; solo stop() despierta antes
+                    deadline = time.monotonic() + backoff
+                    while not self._stopping and time.monotonic() < deadline:
+                        self._cond.wait(deadline - time.monotonic())
+                elif not self._stopping and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    break
+            if self.flush():
+                backoff = 0.0
+            else:
+                backoff = min(backoff * 2 if backoff else self.flush_interval, self.max_backoff)
+
+        # Al apagar se vacía lo pendiente; se para en el primer error
+        while self._queue and self.flush():
+            pass
+        if self._queue:
+            logger.warning(f"Se pierden {len(self._queue)} mediciones sin volcar al apagar")
+
+    # ---------- Ciclo de vida ----------
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ingest-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            flushes = self._counters["flushes"]
+            return {
+                "enabled": self.enabled,
+                "depth": len(self._queue),
+                "max_size": self.max_size,
+                **self._counters,
+                "last_flush_ms": round(self._flush_ms_last, 3),
+                "max_flush_ms": round(self._flush_ms_max, 3),
+                "avg_flush_ms": round(self._flush_ms_total / flushes, 3) if flushes else 0.0,
+            }
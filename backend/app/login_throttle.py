@@ -0,0 +1,175 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: login_throttle.py
+#   Descripción: Limitador de intentos de inicio de sesión por cuenta y por IP,
+#   con cubetas de fichas en memoria, para acotar el CPU que se gasta en bcrypt
+#-----------------------------------
+
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+
+LOGIN_ACCOUNT_BURST = float(os.environ.get("LOGIN_ACCOUNT_BURST", 5))
+LOGIN_ACCOUNT_PER_MINUTE = float(os.environ.get("LOGIN_ACCOUNT_PER_MINUTE", 5))
+LOGIN_IP_BURST = float(os.environ.get("LOGIN_IP_BURST", 20))
+LOGIN_IP_PER_MINUTE = float(os.environ.get("LOGIN_IP_PER_MINUTE", 30))
+LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get("LOGIN_THROTTLE_MAX_KEYS", 100000))
+# Número de proxies de confianza delante del servidor que añaden su entrada a
+# X-Forwarded-For (0: no se lee la cabecera)
+LOGIN_TRUST_PROXY = int(os.environ.get("LOGIN_TRUST_PROXY", 0))
+
+
+class _Buckets:
+    """
+    @brief Cubetas de fichas por clave: cada una admite `burst` intentos
+    seguidos y recupera `per_minute` por minuto, de forma continua (la ventana
+    se desliza con cada intento). Como mucho se guardan `max_keys` claves; al
+    pasar de ahí se expulsa la que lleva más tiempo sin usarse, que es la que
+    más se ha rellenado, así que olvidarla apenas cambia el resultado.
+
+    No es segura entre hilos por sí sola: la protege el lock de LoginThrottle.
+    """
+
+    def __init__(self, burst: float, per_minute: float, max_keys: int):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self.evicted = 0
+
+    def _level(self, key: str, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.burst
+        tokens, updated = entry
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def wait(self, key: str, now: float) -> float:
+        """
+        @brief Segundos que faltan para que la clave tenga una ficha (0 si ya la tiene).
+        """
+        missing = 1.0 - self._level(key, now)
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else math.inf
+
+    def take(self, key: str, now: float):
+        self._buckets[key] = (self._level(key, now) - 1.0, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+
+    def reset(self, key: str):
+        self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoginThrottle:
+    """
+    @brief Límite de intentos de inicio de sesión.
+
+    Cada intento gasta una ficha de la cuenta (usuario o correo) y otra de la
+    IP de origen; si a cualquiera de las dos le falta, se responde 429 antes de
+    consultar la base de datos o comprobar la contraseña, así que un ataque de
+    fuerza bruta o de credenciales robadas no llega a gastar CPU en bcrypt.
+    Un inicio de sesión correcto devuelve a la cuenta todas sus fichas.
+    """
+
+    def __init__(self, account_burst: float = LOGIN_ACCOUNT_BURST, account_per_minute: float = LOGIN_ACCOUNT_PER_MINUTE,
+                 ip_burst: float = LOGIN_IP_BURST, ip_per_minute: float = LOGIN_IP_PER_MINUTE,
+                 max_keys: int = LOGIN_THROTTLE_MAX_KEYS):
+        self._accounts = _Buckets(account_burst, account_per_minute, max_keys)
+        self._ips = _Buckets(ip_burst, ip_per_minute, max_keys)
+        self._lock = threading.Lock()
+        self._counters = {
+            "allowed": 0,
+            "rejected_account": 0,
+            "rejected_ip": 0,
+            "resets": 0,
+        }
+
+    @staticmethod
+    def _account_key(account: str) -> str:
+        return (account or "").strip().lower()
+
+    def check(self, account: str, ip: str):
+        """
+        @brief Registra un intento de inicio de sesión o lo rechaza.
+        @param account Usuario o correo con el que se intenta entrar.
+        @param ip Dirección del cliente.
+        @exception HTTPException 429 (con Retry-After) si la cuenta o la IP han agotado sus intentos.
+        """
+        account = self._account_key(account)
+        now = time.monotonic()
+        with self._lock:
+            ip_wait = self._ips.wait(ip, now)
+            account_wait = self._accounts.wait(account, now)
+            if ip_wait or account_wait:
+                self._counters["rejected_ip" if ip_wait else "rejected_account"] += 1
+                retry = max(1, math.ceil(max(ip_wait, account_wait)))
+            else:
+                # Solo se gasta si pasan las dos, para que los rechazos no alarguen el bloqueo
+                self._ips.take(ip, now)
+                self._accounts.take(account, now)
+                self._counters["allowed"] += 1
+                return
+
+        raise HTTPException(
+            status_code=429,
+            detail=f"Demasiados intentos de inicio de sesión, inténtelo de nuevo en {retry} segundos",
+            headers={"Retry-After": str(retry)}
+        )
+
+    def succeeded(self, account: str):
+        """
+        @brief Devuelve a la cuenta sus intentos tras un inicio de sesión correcto.
+        """
+        with self._lock:
+            self._accounts.reset(self._account_key(account))
+            self._counters["resets"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "accounts": len(self._accounts),
+                "ips": len(self._ips),
+                "max_keys": self._accounts.max_keys,
+                "evicted": self._accounts.evicted + self._ips.evicted,
+                **self._counters,
+            }
+
+
+login_throttle = LoginThrottle()
+
+
+def client_ip(request: Request, trusted_proxies: int = None) -> str:
+    """
+    @brief Dirección del cliente.
+
+    Sin proxies de confianza es la de la conexión. Con `trusted_proxies` = N,
+    es la N-ésima entrada de X-Forwarded-For empezando por la derecha: la que
+    añadió el proxy más lejano de los nuestros. Las de su izquierda las pone
+    el cliente y no se usan, porque cambiándolas en cada intento se saltaría
+    el límite por IP.
+
+    @param request Petición.
+    @param trusted_proxies Proxies de confianza (por defecto LOGIN_TRUST_PROXY).
+    @return str Dirección IP, o "" si no se conoce.
+    """
+    trusted_proxies = LOGIN_TRUST_PROXY if trusted_proxies is None else trusted_proxies
+    if trusted_proxies > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        forwarded = [entry for entry in forwarded if entry]
+        if len(forwarded) >= trusted_proxies:
+            return forwarded[-trusted_proxies]
+    return request.client.host if request.client else ""
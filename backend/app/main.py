@@ -9,17 +9,45 @@
 #-----------------------------------
 
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from .db import init_pool, close_pool
+from .sensores import ingest_buffer
+from .official_stations import station_proxy
+from .sensor_sweeper import sensor_sweeper
+from .password_hasher import password_hasher
+
 from .routers.users import router as users_router
 from .routers.register import router as register_router
 from .routers.sensors import router as sensors_router
 from .routers.system import router as system_router
 from .routers.tracks import router as track_router
 from .routers.rewards import router as reward_router
+from .routers.tiles import router as tiles_router
+from .routers.me import router as me_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arranque: precalentar el pool de conexiones, lanzar el buffer de ingesta
+    # y el barrido de sensores inactivos y abrir el cliente HTTP de las estaciones oficiales
+    init_pool()
+    ingest_buffer.start()
+    sensor_sweeper.start()
+    password_hasher.start()
+    station_proxy.start()
+    yield
+    # Apagado: volcar las mediciones pendientes y cerrar las conexiones en reposo
+    await station_proxy.stop()
+    sensor_sweeper.stop()
+    ingest_buffer.stop()
+    password_hasher.stop()
+    close_pool()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Routers
 app.include_router(users_router)
@@ -28,6 +56,8 @@ app.include_router(sensors_router)
 app.include_router(system_router)
 app.include_router(track_router)
 app.include_router(reward_router)
+app.include_router(tiles_router)
+app.include_router(me_router)
 
 # Montar frontend
 frontend_path = os.path.join(os.path.dirname(__file__), "../../frontend")
@@ -0,0 +1,179 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: map_logic.py
+#   Descripción: Utilidades numéricas del mapa de contaminación
+#   (lectura de posiciones y agregación espacial en celdas)
+#-----------------------------------
+
+import os
+import json
+import math
+import numpy as np
+
+# Límites del tamaño de celda en grados (≈ 50 m a ≈ 550 km)
+MIN_CELL_SIZE = 0.0005
+MAX_CELL_SIZE = 5.0
+
+# Nivel de detalle del mapa: celdas por lado de tesela al agrupar, zoom a
+# partir del cual se devuelven mediciones sueltas y máximo de puntos por respuesta
+CELLS_PER_TILE = 8
+MAP_RAW_ZOOM = int(os.environ.get("MAP_RAW_ZOOM", 14))
+MAP_POINT_BUDGET = int(os.environ.get("MAP_POINT_BUDGET", 5000))
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """
+    @brief Tamaño de celda para agrupar mediciones a un nivel de zoom del mapa,
+    de modo que cada tesela de 256 px se divida en CELLS_PER_TILE x CELLS_PER_TILE celdas.
+    @param zoom Nivel de zoom (0 = mundo entero en una tesela).
+    @return float Lado de la celda en grados, dentro de [MIN_CELL_SIZE, MAX_CELL_SIZE].
+    """
+    size = 360.0 / (2 ** zoom * CELLS_PER_TILE)
+    return min(max(size, MIN_CELL_SIZE), MAX_CELL_SIZE)
+
+
+def parse_position(position):
+    """
+    @brief Extrae latitud y longitud de una posición GeoJSON
+    ('{"type": "Point", "coordinates": [lon, lat]}').
+    @param position Cadena con la posición tal y como se guarda en MEDICIONES.
+    @return Tupla (lat, lon) o None si la posición no es válida.
+    """
+    if not position:
+        return None
+    try:
+        geo = json.loads(position)
+        lon, lat = geo["coordinates"][:2]
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def positions_to_arrays(rows, position_index: int, *value_indexes: int):
+    """
+    @brief Convierte filas (tuplas) en arrays de latitud, longitud y valores,
+    descartando las que no tienen una posición válida o les falta algún valor.
+    @param rows Filas devueltas por el cursor.
+    @param position_index Índice de la columna POSITION en cada fila.
+    @param value_indexes Índices de las columnas numéricas a extraer.
+    @return Tupla (lats, lons, *valores) de arrays float64, un array por cada índice.
+    """
+    lats, lons = [], []
+    columns = [[] for _ in value_indexes]
+    for row in rows:
+        point = parse_position(row[position_index])
+        if point is None or any(row[i] is None for i in value_indexes):
+            continue
+        lats.append(point[0])
+        lons.append(point[1])
+        for column, i in zip(columns, value_indexes):
+            column.append(row[i])
+    return tuple(
+        np.asarray(column, dtype=np.float64)
+        for column in (lats, lons, *columns)
+    )
+
+
+def bbox_mask(lats, lons, bbox):
+    """
+    @brief Máscara de los puntos que caen dentro de un rectángulo.
+    @param lats Array de latitudes.
+    @param lons Array de longitudes.
+    @param bbox Tupla (oeste, sur, este, norte).
+    @return Array booleano.
+    """
+    west, south, east, north = bbox
+    return (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+
+
+def snap_bbox(bbox, cell_size: float):
+    """
+    @brief Amplía un rectángulo hasta los bordes de la rejilla de `cell_size`
+    grados (la misma de bin_readings), sin salirse del mundo.
+
+    Dos vistas casi iguales (un desplazamiento de unos píxeles) quedan en el
+    mismo rectángulo, así que comparten entrada de caché, y las celdas de los
+    bordes se agrupan siempre completas. Aplicarlo dos veces no cambia nada.
+
+    @param bbox Tupla (oeste, sur, este, norte).
+    @param cell_size Lado de la celda en grados.
+    @return Tupla (oeste, sur, este, norte) alineada a la rejilla.
+    """
+    west, south, east, north = bbox
+    # El margen evita que un borde ya alineado baje una celda por redondeo
+    eps = 1e-9
+    return (
+        max(math.floor(west / cell_size + eps) * cell_size, -180.0),
+        max(math.floor(south / cell_size + eps) * cell_size, -90.0),
+        min(math.ceil(east / cell_size - eps) * cell_size, 180.0),
+        min(math.ceil(north / cell_size - eps) * cell_size, 90.0),
+    )
+
+
+def bin_readings(lats, lons, values, cell_size: float, counts=None, maxs=None, centroids: bool = False):
+    """
+    @brief Agrupa mediciones en celdas fijas de `cell_size` grados y calcula
+    la media, el máximo y el número de mediciones de cada celda.
+
+    Todo el cálculo es vectorizado: un np.unique para asignar cada medición a
+    su celda y bincount / maximum.at para acumular.
+
+    Si se pasan `counts` y `maxs`, cada punto es ya un agregado (p. ej. una
+    fila de MEDICIONES_HORARIAS): `values` son sumas y la media de la celda se
+    pondera por el número de mediciones de cada punto.
+
+    @param lats Array de latitudes.
+    @param lons Array de longitudes.
+    @param values Array de valores medidos (o de sumas, si se pasa `counts`).
+    @param cell_size Lado de la celda en grados.
+    @param counts Array opcional con el número de mediciones de cada punto.
+    @param maxs Array opcional con el máximo de cada punto.
+    @param centroids Si es True, lat/lon es el centroide de las mediciones
+        (ponderado por su número) en lugar del centro de la celda.
+    @return Lista de celdas {lat, lon, mean, max, count}.
+    """
+    if len(values) == 0:
+        return []
+
+    keys = np.stack((
+        np.floor(lats / cell_size).astype(np.int64),
+        np.floor(lons / cell_size).astype(np.int64),
+    ), axis=1)
+    cells, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    if counts is None:
+        cell_counts = np.bincount(inverse, minlength=len(cells))
+    else:
+        cell_counts = np.bincount(inverse, weights=counts, minlength=len(cells))
+    sums = np.bincount(inverse, weights=values, minlength=len(cells))
+    cell_maxs = np.full(len(cells), -np.inf)
+    np.maximum.at(cell_maxs, inverse, values if maxs is None else maxs)
+
+    if centroids:
+        weights = np.ones(len(values)) if counts is None else counts
+        centers = np.stack((
+            np.bincount(inverse, weights=lats * weights, minlength=len(cells)),
+            np.bincount(inverse, weights=lons * weights, minlength=len(cells)),
+        ), axis=1) / cell_counts[:, None]
+    else:
+        centers = (cells + 0.5) * cell_size
+    means = sums / cell_counts
+
+    return [
+        {
+            "lat": round(float(lat), 6),
+            "lon": round(float(lon), 6),
+            "mean": float(mean),
+            "max": float(mx),
+            "count": int(count),
+        }
+        for (lat, lon), mean, mx, count in zip(centers, means, cell_maxs, cell_counts)
+    ]
@@ -0,0 +1,111 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: migrations.py
+#   Descripción: Aplica en orden las migraciones de backend/db_init/ que aún
+#   no se han aplicado en la base de datos. Lo lanza el despliegue antes de
+#   reiniciar el servicio:
+#       python -m backend.app.migrations
+#-----------------------------------
+
+import os
+import argparse
+from datetime import datetime
+
+from mysql.connector import errorcode, errors
+
+from .db import connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db_init")
+
+CREATE_MIGRATIONS_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS ("
+    "NAME VARCHAR(255) NOT NULL PRIMARY KEY, "
+    "APPLIED_AT DATETIME NOT NULL)"
+)
+
+# Errores que indican que la sentencia ya se aplicó a mano (o la aplicó Docker
+# al crear la base de datos): se ignoran para que la migración se pueda relanzar
+ALREADY_APPLIED = {
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY,
+}
+
+
+def split_statements(sql: str) -> list:
+    """
+    @brief Separa un fichero de migración en sentencias. Se quitan las líneas
+    de comentario y se corta en cada ';' (las migraciones no usan ';' dentro
+    de cadenas).
+    @param sql Contenido del fichero.
+    @return list Sentencias sin el ';' final.
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def pending_migrations(applied: set, directory: str = MIGRATIONS_DIR) -> list:
+    """
+    @brief Ficheros .sql de `directory` que no están en `applied`, en orden.
+    """
+    return sorted(name for name in os.listdir(directory) if name.endswith(".sql") and name not in applied)
+
+
+def apply_migrations(directory: str = MIGRATIONS_DIR, conn=None) -> list:
+    """
+    @brief Aplica las migraciones pendientes y las registra en SCHEMA_MIGRATIONS.
+    Cada fichero se registra solo si todas sus sentencias terminan bien, así
+    que uno que falle se vuelve a intentar en el siguiente despliegue.
+    @param directory Carpeta con los ficheros NN_*.sql.
+    @param conn Conexión activa (opcional).
+    @return list Nombres de las migraciones aplicadas.
+    @exception mysql.connector.Error si una sentencia falla por otro motivo.
+    """
+    applied = []
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(CREATE_MIGRATIONS_TABLE_SQL)
+            cursor.execute("SELECT NAME FROM SCHEMA_MIGRATIONS")
+            done = {row[0] for row in cursor.fetchall()}
+
+            for name in pending_migrations(done, directory):
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    statements = split_statements(f.read())
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except errors.Error as e:
+                        if e.errno not in ALREADY_APPLIED:
+                            raise
+                cursor.execute(
+                    "INSERT INTO SCHEMA_MIGRATIONS (NAME, APPLIED_AT) VALUES (%s, %s)",
+                    (name, datetime.now())
+                )
+                # Los ALTER/CREATE confirman solos; el commit cubre los UPDATE y el registro
+                conn.commit()
+                applied.append(name)
+        finally:
+            cursor.close()
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica las migraciones pendientes de backend/db_init/")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="Carpeta de migraciones")
+    args = parser.parse_args()
+
+    applied = apply_migrations(args.dir)
+    if applied:
+        print("Migraciones aplicadas: " + ", ".join(applied))
+    else:
+        print("No hay migraciones pendientes")
+
+
+if __name__ == "__main__":
+    main()
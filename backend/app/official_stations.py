@@ -0,0 +1,195 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: official_stations.py
+#   Descripción: Proxy con caché de los datos de calidad del aire de las
+#   estaciones oficiales (Open-Meteo). Todas las estaciones se piden a la vez
+#   con un cliente HTTP asíncrono y el resultado se sirve desde memoria
+#-----------------------------------
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+import httpx
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+OPEN_METEO_BASE_URL = os.environ.get("OPEN_METEO_BASE_URL", "https://air-quality-api.open-meteo.com")
+# Open-Meteo actualiza los datos de calidad del aire cada hora
+OPEN_METEO_TTL = float(os.environ.get("OPEN_METEO_TTL", 3600))
+OPEN_METEO_TIMEOUT = float(os.environ.get("OPEN_METEO_TIMEOUT", 5))
+OPEN_METEO_MAX_CONNECTIONS = int(os.environ.get("OPEN_METEO_MAX_CONNECTIONS", 10))
+
+OFFICIAL_STATIONS = [
+    {"name": "Prat de Cabanes", "lat": 40.136944, "lon": 0.165556},
+    {"name": "Aras de los Olmos", "lat": 39.950278, "lon": -1.108889},
+    {"name": "Valencia", "lat": 39.472222, "lon": -0.422500},
+    {"name": "Denia", "lat": 38.821944, "lon": 0.035833},
+    {"name": "Torrevieja", "lat": 38.008333, "lon": -0.658611},
+]
+
+CURRENT_VARIABLES = "nitrogen_dioxide,ozone,sulphur_dioxide,carbon_monoxide"
+
+
+class StationProxy:
+    """
+    @brief Caché en memoria de las mediciones actuales de las estaciones oficiales.
+
+    - Si los datos tienen menos de `ttl` segundos se devuelven sin salir a la red.
+    - Si han caducado se refrescan todas las estaciones en paralelo, y solo un
+      refresco a la vez aunque lleguen muchas peticiones.
+    - Si el refresco tarda más de `timeout` segundos y hay datos anteriores,
+      se devuelven esos (marcados como obsoletos) y el refresco sigue en segundo plano.
+    - Una estación que falla conserva su último valor conocido.
+    """
+
+    def __init__(self, stations: list = OFFICIAL_STATIONS, base_url: str = OPEN_METEO_BASE_URL,
+                 ttl: float = OPEN_METEO_TTL, timeout: float = OPEN_METEO_TIMEOUT,
+                 max_connections: int = OPEN_METEO_MAX_CONNECTIONS):
+        self.stations = stations
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._estaciones = None
+        self._fetched_at = None
+        self._actualizado = None
+        self._refresh_task = None
+        self._counters = {
+            "hits": 0,
+            "refreshes": 0,
+            "upstream_errors": 0,
+            "stale_served": 0,
+        }
+
+    # ---------- Ciclo de vida ----------
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+
+    async def stop(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ---------- Consulta ----------
+
+    async def _fetch_station(self, station: dict) -> dict:
+        response = await self._client.get(
+            "/v1/air-quality",
+            params={
+                "latitude": station["lat"],
+                "longitude": station["lon"],
+                "current": CURRENT_VARIABLES,
+            }
+        )
+        response.raise_for_status()
+        current = response.json().get("current")
+        if not current:
+            raise ValueError("respuesta sin 'current'")
+        return {
+            "name": station["name"],
+            "lat": station["lat"],
+            "lon": station["lon"],
+            "o3": current.get("ozone") or 0,
+            "no2": current.get("nitrogen_dioxide") or 0,
+            "so2": current.get("sulphur_dioxide") or 0,
+            "co": current.get("carbon_monoxide") or 0,
+        }
+
+    async def _refresh(self):
+        results = await asyncio.gather(
+            *(self._fetch_station(station) for station in self.stations),
+            return_exceptions=True
+        )
+        self._counters["refreshes"] += 1
+
+        previous = {e["name"]: e for e in (self._estaciones or [])}
+        estaciones = []
+        failed = 0
+        for station, result in zip(self.stations, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning(f"Error al consultar la estación {station['name']}: {result}")
+                if station["name"] in previous:
+                    estaciones.append(previous[station["name"]])
+                continue
+            estaciones.append(result)
+
+        self._counters["upstream_errors"] += failed
+        if failed == len(self.stations):
+            # Sin ninguna respuesta no se da la caché por renovada
+            raise RuntimeError("ninguna estación respondió")
+
+        self._estaciones = estaciones
+        self._fetched_at = time.monotonic()
+        self._actualizado = datetime.now().replace(microsecond=0)
+
+    def _response(self, obsoleto: bool) -> dict:
+        return {
+            "status": "ok",
+            "actualizado": self._actualizado,
+            "obsoleto": obsoleto,
+            "estaciones": self._estaciones,
+        }
+
+    async def get_stations(self) -> dict:
+        """
+        @brief Devuelve las mediciones actuales de todas las estaciones oficiales.
+        @return dict Con status, fecha de actualización, si son datos obsoletos y la lista de estaciones.
+        @exception HTTPException 502 si no hay datos y el proveedor no responde.
+        """
+        if self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl:
+            self._counters["hits"] += 1
+            return self._response(obsoleto=False)
+
+        self.start()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+        try:
+            # Con datos anteriores no se espera más de `timeout`; sin ellos se
+            # espera al refresco, acotado por el timeout del propio cliente
+            wait = self.timeout if self._estaciones is not None else None
+            await asyncio.wait_for(asyncio.shield(self._refresh_task), timeout=wait)
+        except asyncio.TimeoutError:
+            self._counters["stale_served"] += 1
+            return self._response(obsoleto=True)
+        except Exception as e:
+            if self._estaciones is None:
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"No se pudieron obtener los datos de las estaciones oficiales: {e}"
+                )
+            self._counters["stale_served"] += 1
+            return self._response(obsoleto=True)
+
+        return self._response(obsoleto=False)
+
+    def stats(self) -> dict:
+        return {
+            "stations": len(self.stations),
+            "cached": self._estaciones is not None,
+            "age_s": round(time.monotonic() - self._fetched_at, 1) if self._fetched_at is not None else None,
+            **self._counters,
+        }
+
+
+station_proxy = StationProxy()
@@ -0,0 +1,89 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: pagination.py
+#   Descripción: Paginación por clave (keyset) de los listados. El cursor es
+#   un token opaco con los valores de la clave de orden de la última fila
+#   devuelta, así cada página es una consulta por índice con LIMIT
+#-----------------------------------
+
+import os
+import json
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 500))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 5000))
+
+
+def page_limit(limit: int = None) -> int:
+    """
+    @brief Valida el tamaño de página pedido.
+    @param limit Número de filas por página (None para el valor por defecto).
+    @return int Tamaño de página a usar.
+    @exception HTTPException 400 si está fuera de [1, PAGE_SIZE_MAX].
+    """
+    if limit is None:
+        return PAGE_SIZE_DEFAULT
+    if not 1 <= limit <= PAGE_SIZE_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El tamaño de página debe estar entre 1 y {PAGE_SIZE_MAX}"
+        )
+    return limit
+
+
+def encode_cursor(kind: str, values: tuple) -> str:
+    """
+    @brief Crea el token de continuación a partir de la clave de orden.
+    @param kind Listado al que pertenece (evita usar un cursor en otro endpoint).
+    @param values Valores de la clave de orden de la última fila de la página.
+    @return str Token en base64 url-safe.
+    """
+    encoded = [
+        {"t": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps([kind, encoded], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(kind: str, token: str, size: int) -> tuple:
+    """
+    @brief Recupera la clave de orden guardada en un token de continuación.
+    @param kind Listado que espera el cursor.
+    @param token Token recibido del cliente.
+    @param size Número de valores que forman la clave.
+    @return tuple Valores de la clave de orden.
+    @exception HTTPException 400 si el token no es válido para este listado.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        token_kind, values = json.loads(raw)
+        if token_kind != kind or len(values) != size:
+            raise ValueError(token_kind)
+        return tuple(
+            datetime.fromisoformat(value["t"]) if isinstance(value, dict) else value
+            for value in values
+        )
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación no válido")
+
+
+def split_page(rows: list, limit: int, kind: str, key):
+    """
+    @brief Separa la fila de más que se pide para saber si hay otra página.
+    @param rows Filas devueltas por una consulta con LIMIT limit + 1.
+    @param limit Tamaño de página.
+    @param kind Listado al que pertenece el cursor.
+    @param key Función que devuelve la clave de orden de una fila.
+    @return Tupla (filas de la página, token siguiente o None).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, key(rows[-1]))
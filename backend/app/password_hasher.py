@@ -0,0 +1,212 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: password_hasher.py
+#   Descripción: Pool de procesos propio y acotado para calcular y comprobar
+#   los hashes bcrypt de las contraseñas fuera de los hilos de la API
+#-----------------------------------
+
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from fastapi import HTTPException
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(2, os.cpu_count() or 1)))
+# Pocas operaciones por proceso: más cola solo alarga la espera de cada petición
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 2 * PASSWORD_HASH_WORKERS))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+
+def _hash(password: bytes, rounds: int) -> tuple:
+    start = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    return hashed, time.perf_counter() - start
+
+
+def _check(password: bytes, hashed: bytes) -> tuple:
+    start = time.perf_counter()
+    ok = bcrypt.checkpw(password, hashed)
+    return ok, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    @brief Hash y comprobación de contraseñas en un pool de procesos dedicado.
+
+    bcrypt es CPU pura y a propósito lenta: si se calcula en los hilos de los
+    endpoints, una ráfaga de inicios de sesión ocupa el threadpool que comparte
+    el resto de la API (ingesta de mediciones incluida). Aquí se limita a
+    `workers` procesos y, como mucho, a `max_queue` operaciones en curso o en
+    espera; por encima de eso se responde 503 al momento.
+
+    Los endpoints usan hash_async()/check_async(), que esperan en el bucle de
+    eventos sin ocupar un hilo, y no tienen ninguna conexión del pool prestada
+    mientras tanto (ver login_user_async). hash()/check() bloquean el hilo y
+    quedan para código síncrono (scripts, tests).
+
+    El pool se crea en el arranque o con el primer uso (con "spawn", para no
+    heredar hilos ni conexiones del proceso del servidor) y se cierra en el apagado.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 rounds: int = BCRYPT_ROUNDS, timeout: float = PASSWORD_HASH_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {
+            "hashes": 0,
+            "checks": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "max_in_flight": 0,
+        }
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self._max_run_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise HTTPException(status_code=503, detail="Servidor ocupado, inténtelo de nuevo en unos segundos")
+            self._in_flight += 1
+            self._counters["max_in_flight"] = max(self._counters["max_in_flight"], self._in_flight)
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _submit(self, fn, *args):
+        """
+        @brief Reserva un hueco y envía `fn` al pool. El hueco se libera cuando
+        el proceso termina de verdad: cancel() no para un trabajo que ya ha
+        empezado, así que tras un timeout sigue ocupado hasta que acabe.
+        @exception HTTPException 503 si la cola está llena.
+        """
+        self._admit()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _timed_out(self, future):
+        future.cancel()
+        with self._lock:
+            self._counters["timeouts"] += 1
+        raise HTTPException(status_code=503, detail="Servidor ocupado, inténtelo de nuevo en unos segundos")
+
+    def _record(self, kind: str, start: float, run_seconds: float):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counters[kind] += 1
+            self._run_seconds += run_seconds
+            self._wait_seconds += max(elapsed - run_seconds, 0.0)
+            self._max_run_seconds = max(self._max_run_seconds, run_seconds)
+
+    def _run(self, kind: str, fn, *args):
+        """
+        @brief Ejecuta `fn` en el pool respetando el límite de cola, bloqueando el hilo actual.
+        @exception HTTPException 503 si la cola está llena o la operación tarda demasiado.
+        """
+        future = self._submit(fn, *args)
+        start = time.perf_counter()
+        try:
+            result, run_seconds = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._timed_out(future)
+        self._record(kind, start, run_seconds)
+        return result
+
+    async def _run_async(self, kind: str, fn, *args):
+        """
+        @brief Como _run(), pero se espera en el bucle de eventos sin ocupar ningún hilo.
+        """
+        future = self._submit(fn, *args)
+        start = time.perf_counter()
+        try:
+            result, run_seconds = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._timed_out(future)
+        self._record(kind, start, run_seconds)
+        return result
+
+    def hash(self, password: str) -> str:
+        """
+        @brief Calcula el hash bcrypt de una contraseña con el coste configurado.
+        @param password Contraseña en claro.
+        @return str Hash listo para guardar en la base de datos.
+        @exception HTTPException 503 si el pool está saturado.
+        """
+        return self._run("hashes", _hash, password.encode("utf-8"), self.rounds).decode("utf-8")
+
+    def check(self, password: str, hashed: str) -> bool:
+        """
+        @brief Comprueba una contraseña contra su hash guardado.
+        @param password Contraseña en claro.
+        @param hashed Hash guardado en la base de datos.
+        @return bool True si coinciden.
+        @exception HTTPException 503 si el pool está saturado.
+        """
+        return self._run("checks", _check, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    async def hash_async(self, password: str) -> str:
+        """
+        @brief Versión asíncrona de hash() para los endpoints async.
+        """
+        return (await self._run_async("hashes", _hash, password.encode("utf-8"), self.rounds)).decode("utf-8")
+
+    async def check_async(self, password: str, hashed: str) -> bool:
+        """
+        @brief Versión asíncrona de check() para los endpoints async.
+        """
+        return await self._run_async("checks", _check, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def start(self):
+        # Crea el pool al arrancar para no lanzar los procesos dentro de una petición
+        self._get_executor()
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self._counters["hashes"] + self._counters["checks"]
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                **self._counters,
+                "avg_wait_ms": round(self._wait_seconds * 1000 / done, 3) if done else 0.0,
+                "avg_run_ms": round(self._run_seconds * 1000 / done, 3) if done else 0.0,
+                "max_run_ms": round(self._max_run_seconds * 1000, 3),
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,242 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: recent_readings.py
+#   Descripción: Caché en memoria de las últimas mediciones de cada sensor,
+#   en un buffer circular de tamaño fijo por UUID guardado en arrays
+#-----------------------------------
+
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+RECENT_READINGS_SIZE = 20
+RECENT_READINGS_TTL = float(os.environ.get("RECENT_READINGS_TTL", 300))
+RECENT_READINGS_MAX_SENSORS = int(os.environ.get("RECENT_READINGS_MAX_SENSORS", 100000))
+
+
+class _Ring:
+    """
+    @brief Últimas `size` mediciones de un sensor. Fechas, valores y
+    temperaturas van en arrays de NumPy; gas y posición en listas fijas.
+    `head` es la siguiente posición a escribir.
+    """
+    __slots__ = ("dates", "values", "temps", "gases", "positions", "head", "count", "expires")
+
+    def __init__(self, size: int, expires: float):
+        self.dates = np.zeros(size, dtype="datetime64[s]")
+        self.values = np.full(size, np.nan)
+        self.temps = np.full(size, np.nan)
+        self.gases = [None] * size
+        self.positions = [None] * size
+        self.head = 0
+        self.count = 0
+        self.expires = expires
+
+    def _order(self) -> list:
+        size = len(self.gases)
+        return [(self.head - 1 - i) % size for i in range(self.count)]
+
+    def _write(self, date, gas, value, temp, position):
+        i = self.head
+        self.dates[i] = np.datetime64(date, "s")
+        self.values[i] = np.nan if value is None else value
+        self.temps[i] = np.nan if temp is None else temp
+        self.gases[i] = gas
+        self.positions[i] = position
+        self.head = (i + 1) % len(self.gases)
+        self.count = min(self.count + 1, len(self.gases))
+
+    def push(self, date, gas, value, temp, position):
+        """
+        @brief Añade una medición. Lo normal es que sea la más reciente; si
+        llega atrasada se reordena el buffer y se conservan las `size` más nuevas.
+        Una medición idéntica a una que ya está no se repite: una carga que
+        empezó justo después del commit ya la trae y luego llega por append().
+        """
+        entry = (np.datetime64(date, "s").astype(object), gas,
+                 None if value is None else float(value), None if temp is None else float(temp), position)
+        if self.count and entry in self.entries():
+            return
+
+        if self.count == 0 or np.datetime64(date, "s") >= self.dates[(self.head - 1) % len(self.gases)]:
+            self._write(date, gas, value, temp, position)
+            return
+
+        entries = self.entries()
+        entries.append((date, gas, value, temp, position))
+        # sort es estable: a igual fecha se mantiene el orden de llegada
+        entries.sort(key=lambda e: e[0])
+        self.head, self.count = 0, 0
+        for entry in entries[-len(self.gases):]:
+            self._write(*entry)
+
+    def entries(self) -> list:
+        """
+        @brief Mediciones de la más antigua a la más reciente como tuplas
+        (fecha, gas, valor, temperatura, posición).
+        """
+        result = []
+        for i in reversed(self._order()):
+            value, temp = self.values[i], self.temps[i]
+            result.append((
+                self.dates[i].astype(object), self.gases[i],
+                None if np.isnan(value) else float(value),
+                None if np.isnan(temp) else float(temp),
+                self.positions[i]
+            ))
+        return result
+
+
+class RecentReadings:
+    """
+    @brief Últimas mediciones por sensor para la vista "mis sensores".
+
+    Un sensor se carga de la base de datos la primera vez que se pide y desde
+    entonces cada medición nueva se añade a su buffer. La memoria está acotada
+    por `max_sensors` x `size` (con expulsión LRU) y cada buffer caduca a los
+    `ttl` segundos, lo que corrige cualquier desfase (otro proceso que escribe
+    en la misma base de datos, una transacción deshecha después de añadir).
+
+    Para no guardar una carga que se haya perdido una medición escrita
+    mientras se consultaba, begin_load() devuelve una marca y load() descarta
+    el resultado si después de ella llegó alguna medición de ese sensor. Por
+    eso append() debe llamarse después del commit (ver db.on_commit): así una
+    medición que la consulta no pudo ver siempre llega después de la marca.
+
+    La última escritura de cada sensor se guarda con un número que solo
+    crece y que load() no borra, así dos cargas que se cruzan con la misma
+    escritura se comprueban igual. Como mucho se recuerdan `max_sensors`
+    sensores; al olvidar uno, su número pasa a `_floor` y se descarta
+    cualquier carga empezada antes (se pierde una carga, nunca se guarda una
+    desfasada).
+    """
+
+    def __init__(self, size: int = RECENT_READINGS_SIZE, ttl: float = RECENT_READINGS_TTL,
+                 max_sensors: int = RECENT_READINGS_MAX_SENSORS):
+        self.size = size
+        self.ttl = ttl
+        self.max_sensors = max_sensors
+        self._rings = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._written = OrderedDict()
+        self._floor = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "stale_loads": 0,
+            "appended": 0,
+        }
+
+    def get(self, uuid: str):
+        """
+        @brief Últimas mediciones del sensor, de la más reciente a la más antigua.
+        @return Lista de diccionarios con las columnas de MEDICIONES, o None si no está cargado.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ring = self._rings.get(uuid)
+            if ring is not None and ring.expires <= now:
+                del self._rings[uuid]
+                ring = None
+            if ring is None:
+                self._counters["misses"] += 1
+                return None
+            self._rings.move_to_end(uuid)
+            self._counters["hits"] += 1
+            entries = ring.entries()
+
+        return [
+            {
+                "DATE": date,
+                "GAS_TYPE": gas,
+                "GAS_VALUE": value,
+                "TEMPERATURE_VALUE": temp,
+                "POSITION": position
+            }
+            for date, gas, value, temp, position in reversed(entries)
+        ]
+
+    def begin_load(self) -> int:
+        """
+        @brief Marca que hay que tomar antes de consultar la base de datos.
+        """
+        with self._lock:
+            return self._seq
+
+    def load(self, uuid: str, readings: list, token: int) -> bool:
+        """
+        @brief Guarda las mediciones de un sensor leídas de la base de datos.
+        @param uuid UUID del sensor.
+        @param readings Diccionarios con DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE
+        y POSITION, de la más reciente a la más antigua.
+        @param token Valor de begin_load() tomado antes de la consulta.
+        @return bool True si se guardaron.
+        """
+        with self._lock:
+            if token < self._floor or self._written.get(uuid, 0) > token:
+                self._counters["stale_loads"] += 1
+                return False
+
+            ring = _Ring(self.size, time.monotonic() + self.ttl)
+            for r in reversed(readings[:self.size]):
+                ring.push(r["DATE"], r["GAS_TYPE"], r["GAS_VALUE"], r["TEMPERATURE_VALUE"], r["POSITION"])
+            self._rings[uuid] = ring
+            self._rings.move_to_end(uuid)
+            self._counters["loads"] += 1
+            while len(self._rings) > self.max_sensors:
+                self._rings.popitem(last=False)
+            return True
+
+    def append(self, rows):
+        """
+        @brief Añade mediciones recién escritas a los sensores cargados.
+        @param rows Tuplas (uuid, fecha, gas, valor, temperatura, posición).
+        """
+        with self._lock:
+            for uuid, date, gas, value, temp, position in rows:
+                self._mark_written(uuid)
+                ring = self._rings.get(uuid)
+                if ring is None:
+                    continue
+                ring.push(date, gas, value, temp, position)
+                self._counters["appended"] += 1
+
+    def _mark_written(self, uuid: str):
+        # Con el lock tomado
+        self._seq += 1
+        self._written[uuid] = self._seq
+        self._written.move_to_end(uuid)
+        while len(self._written) > self.max_sensors:
+            _, seq = self._written.popitem(last=False)
+            self._floor = max(self._floor, seq)
+
+    def discard(self, *uuids: str):
+        with self._lock:
+            for uuid in uuids:
+                self._rings.pop(uuid, None)
+                self._mark_written(uuid)
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+            self._written.clear()
+            self._floor = self._seq
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sensors": len(self._rings),
+                "max_sensors": self.max_sensors,
+                **self._counters,
+            }
+
+
+recent_readings = RecentReadings()
@@ -0,0 +1,158 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: response_cache.py
+#   Descripción: Caché en memoria de respuestas JSON del mapa con ETag fuerte.
+#   Los días pasados no cambian y se guardan sin caducidad (con límite LRU);
+#   los rangos que incluyen el día actual caducan a los pocos segundos
+#-----------------------------------
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+MAP_CACHE_MAX_ENTRIES = int(os.environ.get("MAP_CACHE_MAX_ENTRIES", 512))
+MAP_CACHE_TODAY_TTL = float(os.environ.get("MAP_CACHE_TODAY_TTL", 30))
+
+
+class _CacheEntry:
+    __slots__ = ("body", "etag", "gases", "desde", "hasta", "expires")
+
+    def __init__(self, body: bytes, gases: tuple, desde: datetime, hasta: datetime, expires):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.gases = gases
+        self.desde = desde
+        self.hasta = hasta
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    @brief Caché LRU de respuestas del mapa por (tipo de consulta, rango, gases, resolución).
+
+    Guarda el cuerpo ya serializado y su ETag, de modo que un acierto no
+    vuelve a tocar la base de datos ni a codificar JSON. Una entrada cuyo
+    rango termina antes de hoy es inmutable; si no, caduca a los `today_ttl`
+    segundos. invalidate() descarta las entradas afectadas por mediciones
+    nuevas (incluidas las atrasadas que caen en días pasados).
+    """
+
+    def __init__(self, max_entries: int = MAP_CACHE_MAX_ENTRIES, today_ttl: float = MAP_CACHE_TODAY_TTL):
+        self.max_entries = max_entries
+        self.today_ttl = today_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "invalidated": 0,
+            "evicted": 0,
+        }
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.expires is None or entry.expires > now):
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self._counters["misses"] += 1
+            return None
+
+    def _put(self, key, entry: _CacheEntry, generation: int):
+        with self._lock:
+            # Si mientras se consultaba llegó una medición atrasada, un día
+            # pasado podría quedar desfasado para siempre: no se guarda
+            if entry.expires is None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evicted"] += 1
+
+    def respond(self, key, gases: tuple, desde: datetime, hasta: datetime, if_none_match, compute) -> Response:
+        """
+        @brief Devuelve la respuesta en caché o la calcula y la guarda.
+        @param key Clave hashable de la consulta.
+        @param gases Gases que cubre la respuesta (para invalidar). La clave
+        debe usar el gas en minúsculas para no duplicar "O3" y "o3".
+        @param desde Inicio del rango consultado.
+        @param hasta Fin del rango consultado, excluido.
+        @param if_none_match Valor de la cabecera If-None-Match (o None).
+        @param compute Función sin argumentos que devuelve el diccionario de respuesta.
+        @return Response 200 con el JSON y su ETag, o 304 si el cliente ya lo tiene.
+        """
+        entry = self._get(key)
+        if entry is None:
+            gases = tuple(gas.lower() for gas in gases)
+            generation = self._generation
+            body = json.dumps(jsonable_encoder(compute()), ensure_ascii=False).encode("utf-8")
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            expires = None if hasta <= today else time.monotonic() + self.today_ttl
+            entry = _CacheEntry(body, gases, desde, hasta, expires)
+            self._put(key, entry, generation)
+
+        if entry.expires is None:
+            cache_control = "public, max-age=86400"
+        else:
+            cache_control = f"public, max-age={int(self.today_ttl)}"
+        headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+
+        if if_none_match and entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            with self._lock:
+                self._counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, readings):
+        """
+        @brief Descarta las entradas cuyo rango y gases incluyen alguna de las mediciones.
+        @param readings Iterable de pares (gas, fecha datetime).
+        """
+        # GAS_TYPE no distingue mayúsculas en SQL: "O3" invalida lo pedido como "o3"
+        readings = {(gas.lower(), date) for gas, date in readings}
+        if not readings:
+            return
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            if any(date < today for _, date in readings):
+                self._generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if any(gas in entry.gases and entry.desde <= date < entry.hasta for gas, date in readings)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._counters["invalidated"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                **self._counters,
+            }
+
+
+map_cache = ResponseCache()
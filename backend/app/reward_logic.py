@@ -12,25 +12,35 @@
 from fastapi import HTTPException
 from .db import get_connection
 
-def get_user_rewards(user_id: int):
+def user_rewards(cursor, user_id: int) -> list:
+    """
+    @brief Recompensas de un usuario con un cursor ya abierto (en modo diccionario).
+    """
+    cursor.execute(
+        "SELECT ID, DESCRIPTION, STATE FROM RECOMPENSAS WHERE ASSOCIATED_USER = %s",
+        (user_id,)
+    )
+    return cursor.fetchall()
+
+
+def get_user_rewards(user_id: int, conn=None):
     """
     @brief Obtiene todas las recompensas asociadas a un usuario.
 
     @param user_id ID del usuario.
+    @param conn Conexión opcional a la base de datos.
 
     @return Lista de diccionarios con las recompensas del usuario.
             Incluye tanto reclamadas como no reclamadas.
     """
-    conn = None
+    close_conn = False
     try:
-        conn = get_connection()
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(
-                "SELECT ID, DESCRIPTION, STATE FROM RECOMPENSAS WHERE ASSOCIATED_USER = %s",
-                (user_id,)
-            )
-            rewards = cursor.fetchall()
+            rewards = user_rewards(cursor, user_id)
 
         return {
             "status": "ok",
@@ -41,28 +51,31 @@ def get_user_rewards(user_id: int):
         raise HTTPException(status_code=500, detail=f"Error al obtener recompensas: {e}")
 
     finally:
-        if conn:
+        if close_conn and conn:
             conn.close()
 
 
-def claim_reward(reward_id: int, user_id: int):
+def claim_reward(reward_id: int, user_id: int, conn=None):
     """
     @brief Marca una recompensa como reclamada por su usuario.
 
     @param reward_id ID de la recompensa.
     @param user_id ID del usuario que intenta reclamarla.
+    @param conn Conexión opcional a la base de datos.
 
     @return Diccionario indicando el resultado de la operación:
             - claimed: 0 o 1
             - message: Resultado de la operación
     """
-    conn = None
+    close_conn = False
     try:
-        conn = get_connection()
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         with conn.cursor(dictionary=True) as cursor:
             cursor.execute(
-                "SELECT ID, ASSOCIATED_USER, STATE FROM RECOMPENSAS WHERE ID = %s",
+                "SELECT ID, ASSOCIATED_USER, STATE FROM RECOMPENSAS WHERE ID = %s FOR UPDATE",
                 (reward_id,)
             )
             reward = cursor.fetchone()
@@ -81,7 +94,8 @@ def claim_reward(reward_id: int, user_id: int):
                 ("CLAIMED", reward_id)
             )
 
-        conn.commit()
+        if close_conn:
+            conn.commit()
 
         return {
             "status": "ok",
@@ -97,5 +111,5 @@ def claim_reward(reward_id: int, user_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al reclamar recompensa: {e}")
     finally:
-        if conn:
+        if close_conn and conn:
             conn.close()
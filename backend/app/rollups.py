@@ -0,0 +1,185 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: rollups.py
+#   Descripción: Mantenimiento de MEDICIONES_HORARIAS, el resumen por sensor,
+#   gas y hora (número, suma, mínimo, máximo y última posición)
+#
+#   Relleno de datos existentes:
+#       python -m backend.app.rollups --desde 2025-10-01 [--hasta 2026-01-01]
+#-----------------------------------
+
+import argparse
+from datetime import datetime, timedelta
+
+from .db import connection
+
+UPSERT_ROLLUP_SQL = (
+    "INSERT INTO MEDICIONES_HORARIAS (ASSOCIATED_UUID, GAS_TYPE, HOUR_START, READINGS_COUNT, "
+    "VALUE_SUM, VALUE_MIN, VALUE_MAX, LAST_DATE, LAST_POSITION) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE "
+    # LAST_POSITION se actualiza antes que LAST_DATE porque MySQL aplica las asignaciones en orden
+    "LAST_POSITION = IF(VALUES(LAST_DATE) >= LAST_DATE, COALESCE(VALUES(LAST_POSITION), LAST_POSITION), LAST_POSITION), "
+    "LAST_DATE = GREATEST(LAST_DATE, VALUES(LAST_DATE)), "
+    "READINGS_COUNT = READINGS_COUNT + VALUES(READINGS_COUNT), "
+    "VALUE_SUM = VALUE_SUM + VALUES(VALUE_SUM), "
+    "VALUE_MIN = LEAST(VALUE_MIN, VALUES(VALUE_MIN)), "
+    "VALUE_MAX = GREATEST(VALUE_MAX, VALUES(VALUE_MAX))"
+)
+
+# Recalcula por completo las horas de un rango a partir de MEDICIONES
+BACKFILL_ROLLUP_SQL = (
+    "INSERT INTO MEDICIONES_HORARIAS (ASSOCIATED_UUID, GAS_TYPE, HOUR_START, READINGS_COUNT, "
+    "VALUE_SUM, VALUE_MIN, VALUE_MAX, LAST_DATE, LAST_POSITION) "
+    "SELECT ASSOCIATED_UUID, GAS_TYPE, HOUR_START, COUNT(*), SUM(GAS_VALUE), MIN(GAS_VALUE), "
+    "MAX(GAS_VALUE), MAX(DATE), MAX(CASE WHEN RN = 1 THEN POSITION END) "
+    "FROM ("
+    "    SELECT ASSOCIATED_UUID, GAS_TYPE, GAS_VALUE, DATE, POSITION, "
+    "           TIMESTAMP(DATE(DATE), MAKETIME(HOUR(DATE), 0, 0)) AS HOUR_START, "
+    "           ROW_NUMBER() OVER ("
+    "               PARTITION BY ASSOCIATED_UUID, GAS_TYPE, DATE(DATE), HOUR(DATE) "
+    "               ORDER BY DATE DESC, ID DESC"
+    "           ) AS RN "
+    "    FROM MEDICIONES "
+    "    WHERE DATE >= %s AND DATE < %s AND GAS_VALUE IS NOT NULL"
+    ") M "
+    "GROUP BY ASSOCIATED_UUID, GAS_TYPE, HOUR_START "
+    "ON DUPLICATE KEY UPDATE "
+    "READINGS_COUNT = VALUES(READINGS_COUNT), "
+    "VALUE_SUM = VALUES(VALUE_SUM), "
+    "VALUE_MIN = VALUES(VALUE_MIN), "
+    "VALUE_MAX = VALUES(VALUE_MAX), "
+    "LAST_DATE = VALUES(LAST_DATE), "
+    "LAST_POSITION = VALUES(LAST_POSITION)"
+)
+
+
+# Por debajo de este tamaño de celda (≈ 5 km) el desplazamiento de un sensor
+# dentro de una hora pesa demasiado y se leen las mediciones originales
+ROLLUP_MIN_CELL_SIZE = 0.05
+
+
+def hour_start(date: datetime) -> datetime:
+    return date.replace(minute=0, second=0, microsecond=0)
+
+
+def use_hourly_rollup(desde: datetime, hasta: datetime, resolution: float) -> bool:
+    """
+    @brief Indica si una consulta agregada puede resolverse con MEDICIONES_HORARIAS.
+    @param desde Inicio del rango.
+    @param hasta Fin del rango, excluido.
+    @param resolution Lado de la celda en grados.
+    @return True si el rango empieza y acaba en hora en punto y la celda es suficientemente grande.
+    """
+    return (
+        resolution >= ROLLUP_MIN_CELL_SIZE
+        and desde == hour_start(desde)
+        and hasta == hour_start(hasta)
+    )
+
+
+def accumulate_rollups(cursor, rows: list):
+    """
+    @brief Suma un grupo de mediciones recién insertadas a MEDICIONES_HORARIAS.
+
+    Las filas se agregan primero en memoria por (sensor, gas, hora), así que
+    un lote de N mediciones de un mismo sensor genera una sola fila de upsert.
+
+    @param cursor Cursor abierto (en la misma transacción que el INSERT en MEDICIONES).
+    @param rows Tuplas (uuid, fecha, gas, valor, temperatura, posición) con fecha datetime.
+    """
+    groups = {}
+    for uuid, date, gas, value, _temperature, position in rows:
+        if value is None:
+            continue
+        key = (uuid, gas, hour_start(date))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, value, value, value, date, position]
+            continue
+        group[0] += 1
+        group[1] += value
+        group[2] = min(group[2], value)
+        group[3] = max(group[3], value)
+        if date >= group[4]:
+            group[4] = date
+            group[5] = position if position is not None else group[5]
+
+    if groups:
+        cursor.executemany(
+            UPSERT_ROLLUP_SQL,
+            [(*key, *group) for key, group in groups.items()]
+        )
+
+
+def hourly_summary(rows: list, day_start: datetime, gases: list) -> dict:
+    """
+    @brief Construye la matriz de 24 horas por gas de un día a partir de filas agregadas.
+    @param rows Diccionarios con GAS_TYPE, HOUR_START, READINGS_COUNT, VALUE_SUM, VALUE_MIN y VALUE_MAX.
+    @param day_start Medianoche del día resumido.
+    @param gases Gases (en minúsculas) que forman la matriz, aunque no tengan mediciones.
+    @return dict {gas: {"min", "media", "max", "mediciones"}}, cada uno una lista de 24
+    valores (None en las horas sin mediciones).
+    """
+    matriz = {
+        gas: {"min": [None] * 24, "media": [None] * 24, "max": [None] * 24, "mediciones": [0] * 24}
+        for gas in gases
+    }
+    for row in rows:
+        serie = matriz.get(row["GAS_TYPE"].lower())
+        hora = int((row["HOUR_START"] - day_start).total_seconds() // 3600)
+        if serie is None or not 0 <= hora < 24 or not row["READINGS_COUNT"]:
+            continue
+        # Varias filas de la misma hora (p. ej. 'O3' y 'o3') se combinan
+        count = serie["mediciones"][hora] + int(row["READINGS_COUNT"])
+        total = (serie["media"][hora] or 0) * serie["mediciones"][hora] + float(row["VALUE_SUM"])
+        serie["media"][hora] = total / count
+        serie["mediciones"][hora] = count
+        serie["min"][hora] = min(v for v in (serie["min"][hora], float(row["VALUE_MIN"])) if v is not None)
+        serie["max"][hora] = max(v for v in (serie["max"][hora], float(row["VALUE_MAX"])) if v is not None)
+    return matriz
+
+
+def backfill_rollups(desde: datetime, hasta: datetime, conn=None, step: timedelta = timedelta(days=1)):
+    """
+    @brief Recalcula MEDICIONES_HORARIAS para [desde, hasta) a partir de MEDICIONES.
+
+    Trabaja por tramos de `step` para no bloquear la tabla en una sola
+    transacción enorme. Es idempotente: volver a lanzarlo sobre el mismo rango
+    deja el mismo resultado.
+
+    @param desde Inicio del rango (se redondea a la hora).
+    @param hasta Fin del rango, excluido.
+    @param conn Conexión opcional a la base de datos.
+    @return int Número de tramos procesados.
+    """
+    tramos = 0
+    inicio = hour_start(desde)
+    while inicio < hasta:
+        fin = min(inicio + step, hasta)
+        with connection(conn) as c, c.cursor() as cursor:
+            cursor.execute(BACKFILL_ROLLUP_SQL, (inicio, fin))
+        inicio = fin
+        tramos += 1
+    return tramos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rellena MEDICIONES_HORARIAS a partir de MEDICIONES")
+    parser.add_argument("--desde", required=True, help="Fecha inicial, YYYY-MM-DD")
+    parser.add_argument("--hasta", help="Fecha final excluida, YYYY-MM-DD (por defecto, ahora)")
+    args = parser.parse_args()
+
+    desde = datetime.strptime(args.desde, "%Y-%m-%d")
+    hasta = datetime.strptime(args.hasta, "%Y-%m-%d") if args.hasta else datetime.now()
+
+    tramos = backfill_rollups(desde, hasta)
+    print(f"Resumen horario recalculado entre {desde} y {hasta} ({tramos} tramos)")
+
+
+if __name__ == "__main__":
+    main()
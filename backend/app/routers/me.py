@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from ..db import get_db
+from ..sessions import Session, current_session, authorize
+from ..schemas.me import UserDashboard
+from ..dashboard_logic import get_user_dashboard
+
+router = APIRouter(prefix="/v1/me", tags=["Me"])
+
+@router.post("/dashboard")
+def attempt_get_dashboard(user: UserDashboard, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, user.user_id)
+    return get_user_dashboard(user.user_id, conn=conn)
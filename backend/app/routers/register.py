@@ -8,7 +8,10 @@
 #   Descripción: Endpoints de registro de usuarios
 #-----------------------------------
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from ..db import get_db
+from ..password_hasher import password_hasher
 from ..schemas.register import (
     RegisterRequest, VerifyRequest
 )
@@ -20,10 +23,14 @@ router = APIRouter(prefix="/v2/register", tags=["Register"])
 
 
 @router.post("/request")
-def attempt_register_request(request: RegisterRequest):
-    return register_request(request.email, request.username, request.password)
+async def attempt_register_request(request: RegisterRequest):
+    # bcrypt se espera sin ocupar un hilo ni una conexión del pool
+    hashed = await password_hasher.hash_async(request.password)
+    return await run_in_threadpool(
+        register_request, request.email, request.username, request.password, hashed_password=hashed
+    )
 
 
 @router.post("/verify")
-def attempt_register_verify(request: VerifyRequest):
-    return register_verify(request.email, request.code)
+def attempt_register_verify(request: VerifyRequest, conn=Depends(get_db)):
+    return register_verify(request.email, request.code, conn=conn)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from ..db import get_db
+from ..sessions import Session, current_session, authorize
 from ..schemas.rewards import (
     UserRewards, ClaimReward
 )
@@ -9,9 +11,11 @@ from ..reward_logic import (
 router = APIRouter(prefix="/v1/rewards", tags=["Rewards"])
 
 @router.post("")
-def attempt_get_user_rewards(user: UserRewards):
-    return get_user_rewards(user.user_id)
+def attempt_get_user_rewards(user: UserRewards, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, user.user_id)
+    return get_user_rewards(user.user_id, conn=conn)
 
 @router.post("/claim")
-def attempt_claim_reward(reward: ClaimReward):
-    return claim_reward(reward.reward_id, reward.user_id)
\ No newline at end of file
+def attempt_claim_reward(reward: ClaimReward, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, reward.user_id)
+    return claim_reward(reward.reward_id, reward.user_id, conn=conn)
\ No newline at end of file
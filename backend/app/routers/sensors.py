@@ -1,54 +1,187 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from ..db import get_db
+from ..sessions import Session, current_session, admin_session, authorize
+from ..response_cache import map_cache
+from ..official_stations import station_proxy
+from ..sensor_sweeper import get_sensor_states, get_sensor_events
 from ..schemas.sensors import (
     AssociationData, AssociationDeletionData,
-    UserSensorList, Reading, MapReading, UserToday
+    UserSensorList, Reading, ReadingBatch, MapReading,
+    MultiGasMapReading, MapView, UserToday, UserSummary
 )
 from ..sensores import (
-    bind_sensor_to_user, add_reading,
+    bind_sensor_to_user, add_reading, add_readings_batch,
+    queue_reading, ingest_buffer,
     delete_sensor_records, get_user_sensors,
-    get_all_readings_for_datetime,
-    get_today_measurements_for_user, get_all_sensors
+    get_all_readings_for_datetime, get_multi_gas_readings_for_datetime,
+    get_binned_readings_for_datetime, get_map_view, map_view_bbox, parse_time_range,
+    get_today_measurements_for_user, get_daily_summary_for_user, get_all_sensors,
+    stream_readings_for_datetime, stream_all_sensors
 )
 
 router = APIRouter(prefix="/v1/data", tags=["Sensors"])
 
 @router.post("/bind")
-def attempt_bind(user: AssociationData):
-    return bind_sensor_to_user(user.user_id, user.uuid)
+def attempt_bind(user: AssociationData, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, user.user_id)
+    return bind_sensor_to_user(user.user_id, user.uuid, conn=conn)
 
 
 @router.delete("/bind")
-def attempt_delete_bind (deletionData: AssociationDeletionData):
+def attempt_delete_bind (deletionData: AssociationDeletionData, session: Session = Depends(current_session),
+                         conn=Depends(get_db)):
+    authorize(session, deletionData.user_id)
     return delete_sensor_records(
         deletionData.user_id,
         deletionData.erase_all,
-        deletionData.uuid
+        deletionData.uuid,
+        conn=conn
     )
     
 
 @router.post("/user_sensors")
-def attempt_get_user_sensors(data: UserSensorList):
-    return get_user_sensors(data.user_id)
+def attempt_get_user_sensors(data: UserSensorList, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, data.user_id)
+    return get_user_sensors(data.user_id, conn=conn)
 
 
 @router.post("/reading")
-def attempt_register_reading(reading: Reading):
+def attempt_register_reading(reading: Reading, conn=Depends(get_db)):
+    if ingest_buffer.enabled:
+        return queue_reading(
+            reading.associated_uuid,
+            reading.gasType,
+            reading.gas,
+            reading.temperature,
+            reading.position,
+            conn=conn
+        )
     return add_reading(
         reading.associated_uuid,
         reading.gasType,
         reading.gas,
         reading.temperature,
-        reading.position
+        reading.position,
+        conn=conn
     )
 
+@router.post("/readings/batch")
+def attempt_register_readings_batch(batch: ReadingBatch, conn=Depends(get_db)):
+    return add_readings_batch(batch.readings, conn=conn)
+
+# Las consultas del mapa pasan por map_cache y solo abren conexión si no hay acierto
 @router.post("/map_readings")
-def attempt_get_all_readings(selection: MapReading):
-    return get_all_readings_for_datetime(selection.datetime, selection.gasType)
+def attempt_get_all_readings(selection: MapReading, request: Request):
+    if selection.stream is not None and selection.resolution is None:
+        return stream_readings_for_datetime(
+            selection.datetime,
+            selection.gasType,
+            selection.stream,
+            start=selection.start,
+            end=selection.end,
+            bbox=selection.bbox
+        )
+
+    desde, hasta = parse_time_range(selection.datetime, selection.start, selection.end)
+    # En minúsculas, igual que las invalida la ingesta (GAS_TYPE no distingue mayúsculas)
+    gas = selection.gasType.lower()
+
+    def compute():
+        if selection.resolution is not None:
+            return get_binned_readings_for_datetime(
+                selection.datetime,
+                gas,
+                selection.resolution,
+                start=selection.start,
+                end=selection.end,
+                bbox=selection.bbox
+            )
+        return get_all_readings_for_datetime(
+            selection.datetime,
+            gas,
+            start=selection.start,
+            end=selection.end,
+            limit=selection.limit,
+            after=selection.cursor,
+            bbox=selection.bbox
+        )
+
+    return map_cache.respond(
+        ("map", selection.datetime, desde, hasta, gas, selection.resolution,
+         selection.limit, selection.cursor, tuple(selection.bbox or ())),
+        (gas,), desde, hasta,
+        request.headers.get("if-none-match"),
+        compute
+    )
+
+@router.post("/map")
+def attempt_get_map_view(view: MapView, request: Request):
+    desde, hasta = parse_time_range(view.datetime, view.start, view.end)
+    gas = view.gasType.lower()
+    # Alineado a la rejilla del zoom: con el bbox tal cual, cada desplazamiento
+    # del mapa sería una entrada nueva de la caché
+    bbox = map_view_bbox(view.bbox, view.zoom)
+    return map_cache.respond(
+        ("view", view.datetime, desde, hasta, gas, view.zoom, bbox),
+        (gas,), desde, hasta,
+        request.headers.get("if-none-match"),
+        lambda: get_map_view(
+            view.datetime,
+            gas,
+            bbox,
+            view.zoom,
+            start=view.start,
+            end=view.end
+        )
+    )
+
+@router.post("/map_readings/multi")
+def attempt_get_all_readings_multi_gas(selection: MultiGasMapReading, request: Request):
+    desde, hasta = parse_time_range(selection.datetime, selection.start, selection.end)
+    gases = tuple(g.lower() for g in selection.gasTypes if g)
+    return map_cache.respond(
+        ("multi", selection.datetime, desde, hasta, gases, tuple(selection.bbox or ())),
+        gases, desde, hasta,
+        request.headers.get("if-none-match"),
+        lambda: get_multi_gas_readings_for_datetime(
+            selection.datetime,
+            selection.gasTypes,
+            start=selection.start,
+            end=selection.end,
+            bbox=selection.bbox
+        )
+    )
+
+@router.get("/official_stations")
+async def attempt_get_official_stations():
+    return await station_proxy.get_stations()
 
 @router.get("/admin/sensors")
-def attempt_get_all_sensors():
-    return get_all_sensors()
+def attempt_get_all_sensors(limit: Optional[int] = None, cursor: Optional[str] = None, stream: Optional[str] = None,
+                            inactive_days: Optional[int] = None, uuid: Optional[str] = None,
+                            user: Optional[str] = None, session: Session = Depends(admin_session)):
+    if stream is not None:
+        return stream_all_sensors(stream, inactive_days=inactive_days, uuid=uuid, user=user)
+    return get_all_sensors(limit=limit, after=cursor, inactive_days=inactive_days, uuid=uuid, user=user)
+
+@router.get("/admin/sensors/state")
+def attempt_get_sensor_states(state: Optional[str] = None, limit: Optional[int] = None,
+                              cursor: Optional[str] = None, session: Session = Depends(admin_session),
+                              conn=Depends(get_db)):
+    return get_sensor_states(state, conn=conn, limit=limit, after=cursor)
+
+@router.get("/admin/sensors/events")
+def attempt_get_sensor_events(limit: Optional[int] = None, cursor: Optional[str] = None,
+                              session: Session = Depends(admin_session), conn=Depends(get_db)):
+    return get_sensor_events(conn=conn, limit=limit, after=cursor)
     
 @router.post("/today")
-def attempt_get_today_for_user(user: UserToday):
-    return get_today_measurements_for_user(user.user_id)
\ No newline at end of file
+def attempt_get_today_for_user(user: UserToday, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, user.user_id)
+    return get_today_measurements_for_user(user.user_id, conn=conn)
+
+@router.post("/summary")
+def attempt_get_daily_summary(summary: UserSummary, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, summary.user_id)
+    return get_daily_summary_for_user(summary.user_id, summary.date, summary.gasTypes, conn=conn)
\ No newline at end of file
@@ -1,22 +1,48 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from typing import Optional
+from ..db import get_db, get_pool
 from ..schemas.system import (
     IncidentFilter, IncidentCreate, IncidentUpdate
 )
 from ..system_actions import (
     get_incidents, create_incident, update_incident
 )
+from ..sensores import ingest_buffer
+from ..sensor_cache import sensor_registry
+from ..response_cache import map_cache
+from ..official_stations import station_proxy
+from ..recent_readings import recent_readings
+from ..sensor_sweeper import sensor_sweeper
+from ..password_hasher import password_hasher
+from ..sessions import Session, session_manager, admin_session
+from ..login_throttle import login_throttle
 
 router = APIRouter(prefix="/v1/system", tags=["System"])
 
 @router.post("/incidents")
-def attempt_get_all_incidents(filters: Optional[IncidentFilter] = None):
-    return get_incidents(filters)
+def attempt_get_all_incidents(filters: Optional[IncidentFilter] = None, conn=Depends(get_db)):
+    return get_incidents(filters, conn=conn)
 
 @router.post("/incidents/create")
-def attempt_create_incident(incident: IncidentCreate):
-    return create_incident(incident)
+def attempt_create_incident(incident: IncidentCreate, conn=Depends(get_db)):
+    return create_incident(incident, conn=conn)
 
 @router.post("/incidents/update")
-def attempt_update_incident(incident_id: int, incident: IncidentUpdate):
-    return update_incident(incident_id, incident)
\ No newline at end of file
+def attempt_update_incident(incident_id: int, incident: IncidentUpdate, conn=Depends(get_db)):
+    return update_incident(incident_id, incident, conn=conn)
+
+@router.get("/stats")
+def attempt_get_stats(session: Session = Depends(admin_session)):
+    return {
+        "status": "ok",
+        "db_pool": get_pool().stats(),
+        "ingest_buffer": ingest_buffer.stats(),
+        "sensor_registry": sensor_registry.stats(),
+        "map_cache": map_cache.stats(),
+        "official_stations": station_proxy.stats(),
+        "recent_readings": recent_readings.stats(),
+        "sensor_sweeper": sensor_sweeper.stats(),
+        "password_hasher": password_hasher.stats(),
+        "sessions": session_manager.stats(),
+        "login_throttle": login_throttle.stats()
+    }
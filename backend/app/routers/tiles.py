@@ -0,0 +1,8 @@
+from fastapi import APIRouter, Request
+from ..sensores import get_tile
+
+router = APIRouter(prefix="/v1/tiles", tags=["Tiles"])
+
+@router.get("/{gas}/{date}/{z}/{x}/{y}.png")
+def attempt_get_tile(gas: str, date: str, z: int, x: int, y: int, request: Request):
+    return get_tile(gas, date, z, x, y, if_none_match=request.headers.get("if-none-match"))
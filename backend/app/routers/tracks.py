@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Depends, Response
+from ..db import get_db
+from ..sessions import Session, current_session, authorize
 from ..schemas.tracks import (
     CreateTrack, DeleteTrack, CreateTrackPoint,
     GetUserTracks, GetTrackPoints
@@ -13,25 +15,27 @@ router = APIRouter(prefix="/v1/recorridos", tags=["Recorridos"])
 
 
 @router.post("")
-def attempt_create_track(trackInfo: CreateTrack):
-    return create_track(trackInfo.user_id)
+def attempt_create_track(trackInfo: CreateTrack, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, trackInfo.user_id)
+    return create_track(trackInfo.user_id, conn=conn)
 
 
 @router.delete("")
-def attempt_delete_track(trackInfo: DeleteTrack):
-    return delete_track(trackInfo.track_id)
+def attempt_delete_track(trackInfo: DeleteTrack, conn=Depends(get_db)):
+    return delete_track(trackInfo.track_id, conn=conn)
 
 
 @router.post("/puntos")
-def attempt_create_track_point(trackPointInfo: CreateTrackPoint):
-    return create_punto_recorrido(trackPointInfo.track_id, trackPointInfo.position)
+def attempt_create_track_point(trackPointInfo: CreateTrackPoint, conn=Depends(get_db)):
+    return create_punto_recorrido(trackPointInfo.track_id, trackPointInfo.position, conn=conn)
 
 
 @router.post("/usuario")
-def attempt_get_user_tracks(trackInfo: GetUserTracks):
-    return get_recorridos_by_user(trackInfo.user_id)
+def attempt_get_user_tracks(trackInfo: GetUserTracks, session: Session = Depends(current_session), conn=Depends(get_db)):
+    authorize(session, trackInfo.user_id)
+    return get_recorridos_by_user(trackInfo.user_id, conn=conn)
 
 
 @router.post("/puntos_recorrido")
-def attempt_get_track_points(trackInfo: GetTrackPoints):
-    return get_puntos_recorrido(trackInfo.track_id)
\ No newline at end of file
+def attempt_get_track_points(trackInfo: GetTrackPoints, conn=Depends(get_db)):
+    return get_puntos_recorrido(trackInfo.track_id, conn=conn)
\ No newline at end of file
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from ..db import get_db
+from ..sessions import Session, current_session, admin_session, SESSION_COOKIE
+from ..login_throttle import login_throttle, client_ip
+from ..password_hasher import password_hasher
 from ..schemas.users import (
     RegistrationData, LoginData,
     UpdateData, UserDeletionData
 )
 from ..user_actions import (
-    insert_user, login_user, update_user,
+    insert_user, login_user_async, update_user,
     delete_user, get_all_users
 )
 
@@ -12,31 +18,46 @@ router = APIRouter(prefix="/v1/users", tags=["Users"])
 
 
 @router.get("")
-def attempt_get_all_users():
-    return get_all_users()
+def attempt_get_all_users(limit: Optional[int] = None, cursor: Optional[str] = None,
+                          session: Session = Depends(admin_session), conn=Depends(get_db)):
+    return get_all_users(conn=conn, limit=limit, after=cursor)
 
 
+# Los endpoints con contraseña son async: bcrypt se espera sin ocupar un hilo
+# y la conexión solo se toma (en el threadpool) cuando ya se tiene el hash
+
 @router.post("/register")
-def attempt_create(user: RegistrationData):
-    return insert_user(user.username, user.email, user.password)
+async def attempt_create(user: RegistrationData):
+    hashed = await password_hasher.hash_async(user.password)
+    return await run_in_threadpool(insert_user, user.username, user.email, user.password, hashed_password=hashed)
 
 
 @router.post("/login")
-def attempt_login(user: LoginData, response: Response):
-    return login_user(user.username_or_email, user.password, response)
+async def attempt_login(user: LoginData, request: Request, response: Response):
+    # Antes de tocar la base de datos o bcrypt: sin get_db, la conexión solo se
+    # toma del pool si el intento pasa el límite
+    login_throttle.check(user.username_or_email, client_ip(request))
+    result = await login_user_async(user.username_or_email, user.password, response)
+    login_throttle.succeeded(user.username_or_email)
+    return result
 
 
 @router.put("/update")
-def attempt_update(user: UpdateData):
-    return update_user(user.username, user.email, user.password, user.profilePic)
+async def attempt_update(user: UpdateData, session: Session = Depends(current_session)):
+    hashed = await password_hasher.hash_async(user.password) if user.password else None
+    return await run_in_threadpool(
+        update_user, user.username, user.email, user.password, user.profilePic,
+        hashed_password=hashed, session=session
+    )
 
 
 @router.delete("/update")
-def attempt_delete(user: UserDeletionData):
-    return delete_user(user.user_id, user.username, user.email)
+def attempt_delete(user: UserDeletionData, session: Session = Depends(current_session), conn=Depends(get_db)):
+    return delete_user(user.user_id, user.username, user.email, conn=conn, session=session)
 
 
 @router.post("/logout")
 def attempt_logout(response: Response):
     response.delete_cookie("user_data")
+    response.delete_cookie(SESSION_COOKIE)
     return {"status": "ok", "mensaje": "Sesión cerrada exitosamente"}
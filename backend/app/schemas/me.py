@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class UserDashboard(BaseModel):
+    user_id: int
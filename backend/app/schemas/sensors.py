@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conlist, constr
 from typing import Optional
+import datetime as dt
 
 
 class AssociationData(BaseModel):
@@ -17,16 +18,49 @@ class UserSensorList(BaseModel):
     user_id: int
 
 
+# Anchos de MEDICIONES_HORARIAS (02_mediciones_horarias.sql): un valor más
+# largo haría fallar el resumen horario y, con él, toda la inserción
 class Reading(BaseModel):
-    associated_uuid: str
-    gasType: str
+    associated_uuid: constr(min_length=1, max_length=255)
+    gasType: constr(min_length=1, max_length=32)
     gas: float
     temperature: float
-    position: Optional[str] = None
+    position: Optional[constr(max_length=255)] = None
+
+class BatchReading(Reading):
+    timestamp: Optional[dt.datetime] = None
+
+class ReadingBatch(BaseModel):
+    readings: conlist(BatchReading, min_items=1, max_items=500)
 
-class MapReading(BaseModel):
-    datetime: str
+class MapSelection(BaseModel):
+    datetime: Optional[str] = None
+    start: Optional[dt.datetime] = Field(None, alias="from")
+    end: Optional[dt.datetime] = Field(None, alias="to")
+    # Rectángulo visible [oeste, sur, este, norte]
+    bbox: Optional[conlist(float, min_items=4, max_items=4)] = None
+
+    class Config:
+        allow_population_by_field_name = True
+
+class MapReading(MapSelection):
     gasType: str
+    resolution: Optional[float] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    stream: Optional[str] = None
+
+class MapView(MapSelection):
+    gasType: str
+    zoom: int
+
+class MultiGasMapReading(MapSelection):
+    gasTypes: conlist(str, min_items=1, max_items=8) = ["o3", "no2", "so2", "co"]
 
 class UserToday(BaseModel):
-    user_id: int
\ No newline at end of file
+    user_id: int
+
+class UserSummary(BaseModel):
+    user_id: int
+    date: Optional[str] = None
+    gasTypes: conlist(str, min_items=1, max_items=8) = ["o3", "no2", "so2", "co"]
\ No newline at end of file
@@ -0,0 +1,80 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: sensor_cache.py
+#   Descripción: Caché en memoria de los UUID de sensores vinculados, para no
+#   consultar SENSORES en cada medición recibida
+#-----------------------------------
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+SENSOR_CACHE_TTL = float(os.environ.get("SENSOR_CACHE_TTL", 300))
+SENSOR_CACHE_MAX_ENTRIES = int(os.environ.get("SENSOR_CACHE_MAX_ENTRIES", 100000))
+
+
+class SensorRegistry:
+    """
+    @brief Conjunto de UUID de sensores que se sabe que existen.
+
+    Solo guarda aciertos: un UUID desconocido siempre se consulta en la base
+    de datos, así un sensor recién vinculado se acepta al momento. Cada entrada
+    caduca a los `ttl` segundos y, si se supera `max_entries`, se expulsa la
+    usada hace más tiempo.
+    """
+
+    def __init__(self, ttl: float = SENSOR_CACHE_TTL, max_entries: int = SENSOR_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def contains(self, uuid: str) -> bool:
+        """
+        @brief Indica si el UUID está en caché y no ha caducado.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(uuid)
+            if expires is not None and expires > now:
+                self._entries.move_to_end(uuid)
+                self._hits += 1
+                return True
+            if expires is not None:
+                del self._entries[uuid]
+            self._misses += 1
+            return False
+
+    def add(self, uuid: str):
+        with self._lock:
+            self._entries[uuid] = time.monotonic() + self.ttl
+            self._entries.move_to_end(uuid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, *uuids: str):
+        with self._lock:
+            for uuid in uuids:
+                self._entries.pop(uuid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+sensor_registry = SensorRegistry()
@@ -0,0 +1,412 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: sensor_sweeper.py
+#   Descripción: Barrido periódico en segundo plano que clasifica los sensores
+#   en activos, inactivos (STALE) y muertos (DEAD) según LAST_ACTIVE, guarda
+#   los cambios de estado y avisa por correo a sus dueños
+#-----------------------------------
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+from .db import get_connection, connection
+from .pagination import page_limit, decode_cursor, split_page
+from .email_utils import send_sensor_inactive_email
+
+logger = logging.getLogger(__name__)
+
+SENSOR_SWEEPER_ENABLED = os.environ.get("SENSOR_SWEEPER_ENABLED", "1") == "1"
+SENSOR_SWEEP_INTERVAL = float(os.environ.get("SENSOR_SWEEP_INTERVAL", 300))
+SENSOR_SWEEP_BATCH = int(os.environ.get("SENSOR_SWEEP_BATCH", 1000))
+SENSOR_STALE_AFTER = timedelta(hours=float(os.environ.get("SENSOR_STALE_AFTER_HOURS", 24)))
+SENSOR_DEAD_AFTER = timedelta(days=float(os.environ.get("SENSOR_DEAD_AFTER_DAYS", 7)))
+SENSOR_ALERTS_ENABLED = os.environ.get("SENSOR_ALERTS_ENABLED", "0") == "1"
+# Estados que generan un correo al dueño del sensor, separados por comas
+SENSOR_ALERT_STATES = tuple(
+    s.strip().upper() for s in os.environ.get("SENSOR_ALERT_STATES", "DEAD").split(",") if s.strip()
+)
+
+ACTIVE, STALE, DEAD = "ACTIVE", "STALE", "DEAD"
+STATES = (ACTIVE, STALE, DEAD)
+_RANK = {state: rank for rank, state in enumerate(STATES)}
+
+# Evita que dos procesos barran a la vez (GET_LOCK es por servidor MySQL)
+SWEEP_LOCK = "oxigo_sensor_sweeper"
+
+NOTIFY_PENDING, NOTIFY_SENT, NOTIFY_SKIPPED = 0, 1, 2
+
+UPSERT_STATE_SQL = (
+    "INSERT INTO SENSORES_ESTADO (UUID, STATE, LAST_ACTIVE, SINCE) VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE STATE = VALUES(STATE), LAST_ACTIVE = VALUES(LAST_ACTIVE), SINCE = VALUES(SINCE)"
+)
+
+INSERT_EVENT_SQL = (
+    "INSERT INTO SENSORES_EVENTOS (UUID, OLD_STATE, NEW_STATE, LAST_ACTIVE, CREATED_AT, NOTIFIED) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+UPSERT_HIGH_WATER_SQL = (
+    "INSERT INTO SENSORES_BARRIDO (NAME, HIGH_WATER, HIGH_WATER_UUID) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE HIGH_WATER = VALUES(HIGH_WATER), HIGH_WATER_UUID = VALUES(HIGH_WATER_UUID)"
+)
+
+
+def target_state(last_active: datetime, dead_cutoff: datetime) -> str:
+    """
+    @brief Estado de un sensor que ya ha superado el umbral de inactividad.
+    """
+    return DEAD if last_active <= dead_cutoff else STALE
+
+
+def transitions_for(rows: list, dead_cutoff: datetime) -> list:
+    """
+    @brief Cambios de estado de los sensores leídos en un lote. Solo se sube de
+    estado (ACTIVE -> STALE -> DEAD); volver a activo lo decide la recuperación.
+    @param rows Filas con UUID, LAST_ACTIVE y STATE (None si está activo).
+    @param dead_cutoff Fecha a partir de la cual un sensor se considera muerto.
+    @return Lista de tuplas (uuid, estado anterior, estado nuevo, LAST_ACTIVE).
+    """
+    transitions = []
+    for sensor in rows:
+        current = sensor["STATE"] or ACTIVE
+        new = target_state(sensor["LAST_ACTIVE"], dead_cutoff)
+        if _RANK[new] > _RANK[current]:
+            transitions.append((sensor["UUID"], current, new, sensor["LAST_ACTIVE"]))
+    return transitions
+
+
+def _keyset_clause(last) -> tuple:
+    """
+    @brief Condición para seguir después de la clave (LAST_ACTIVE, UUID) dada.
+    """
+    if last is None:
+        return "", []
+    last_active, last_uuid = last
+    return " AND (s.LAST_ACTIVE > %s OR (s.LAST_ACTIVE = %s AND s.UUID > %s))", [last_active, last_active, last_uuid]
+
+
+class SensorSweeper:
+    """
+    @brief Clasificación incremental de los sensores por inactividad.
+
+    Cada pasada hace tres cosas:
+    - Recupera: los sensores de SENSORES_ESTADO que han vuelto a enviar datos
+      pasan a activos (y se borran de la tabla).
+    - Avanza cada umbral (STALE y DEAD) desde su marca guardada hasta el
+      corte actual, leyendo SENSORES en orden (LAST_ACTIVE, UUID) por lotes.
+      Como LAST_ACTIVE nunca retrocede, solo hay que mirar los sensores cuya
+      última actividad ha cruzado el umbral desde la pasada anterior.
+    - Avisa por correo de los cambios pendientes.
+
+    La marca se guarda tras cada lote, así que un reinicio continúa donde se
+    quedó. Volver a procesar un sensor no tiene efecto si su estado no cambia.
+    Los sensores sin LAST_ACTIVE (anteriores a que se guardara al vincular)
+    no se clasifican: nunca han estado activos.
+    """
+
+    def __init__(self, enabled: bool = SENSOR_SWEEPER_ENABLED, interval: float = SENSOR_SWEEP_INTERVAL,
+                 batch_size: int = SENSOR_SWEEP_BATCH, stale_after: timedelta = SENSOR_STALE_AFTER,
+                 dead_after: timedelta = SENSOR_DEAD_AFTER, alerts_enabled: bool = SENSOR_ALERTS_ENABLED,
+                 alert_states: tuple = SENSOR_ALERT_STATES, send_alert=send_sensor_inactive_email):
+        self.enabled = enabled
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stale_after = stale_after
+        self.dead_after = dead_after
+        self.alerts_enabled = alerts_enabled
+        self.alert_states = alert_states
+        self._send_alert = send_alert
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {
+            "sweeps": 0,
+            "skipped": 0,
+            "errors": 0,
+            "scanned": 0,
+            "transitions": 0,
+            "alerts_sent": 0,
+            "alerts_failed": 0,
+        }
+        self._last_sweep_at = None
+        self._last_sweep_ms = 0.0
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counters[key] += n
+
+    # ---------- Pasos del barrido ----------
+
+    def _record(self, cursor, transitions: list, now: datetime):
+        """
+        @brief Guarda los cambios de estado (uuid, anterior, nuevo, LAST_ACTIVE).
+        """
+        if not transitions:
+            return
+        upserts = [(uuid, new, last_active, now) for uuid, _old, new, last_active in transitions if new != ACTIVE]
+        recovered = [uuid for uuid, _old, new, _last_active in transitions if new == ACTIVE]
+        if upserts:
+            cursor.executemany(UPSERT_STATE_SQL, upserts)
+        if recovered:
+            placeholders = ",".join(["%s"] * len(recovered))
+            cursor.execute(f"DELETE FROM SENSORES_ESTADO WHERE UUID IN ({placeholders})", tuple(recovered))
+
+        cursor.executemany(INSERT_EVENT_SQL, [
+            (uuid, old, new, last_active, now,
+             NOTIFY_PENDING if self.alerts_enabled and new in self.alert_states else NOTIFY_SKIPPED)
+            for uuid, old, new, last_active in transitions
+        ])
+        self._count("transitions", len(transitions))
+
+    def _recover(self, conn, cursor, now: datetime, stale_cutoff: datetime):
+        """
+        @brief Reactiva los sensores que han vuelto a enviar datos y olvida los borrados.
+        """
+        cursor.execute(
+            "SELECT e.UUID, e.STATE, s.UUID AS SENSOR, s.LAST_ACTIVE "
+            "FROM SENSORES_ESTADO e LEFT JOIN SENSORES s ON s.UUID = e.UUID "
+            "WHERE s.UUID IS NULL OR s.LAST_ACTIVE > %s",
+            (stale_cutoff,)
+        )
+        rows = cursor.fetchall()
+
+        deleted = [row["UUID"] for row in rows if row["SENSOR"] is None]
+        if deleted:
+            placeholders = ",".join(["%s"] * len(deleted))
+            cursor.execute(f"DELETE FROM SENSORES_ESTADO WHERE UUID IN ({placeholders})", tuple(deleted))
+
+        self._record(cursor, [
+            (row["UUID"], row["STATE"], ACTIVE, row["LAST_ACTIVE"])
+            for row in rows if row["SENSOR"] is not None
+        ], now)
+        conn.commit()
+
+    def _advance(self, conn, cursor, name: str, cutoff: datetime, dead_cutoff: datetime, now: datetime):
+        """
+        @brief Procesa los sensores cuyo LAST_ACTIVE está entre la marca de `name` y `cutoff`.
+        """
+        cursor.execute("SELECT HIGH_WATER, HIGH_WATER_UUID FROM SENSORES_BARRIDO WHERE NAME = %s", (name,))
+        row = cursor.fetchone()
+        last = (row["HIGH_WATER"], row["HIGH_WATER_UUID"]) if row else None
+
+        while True:
+            keyset_sql, keyset_params = _keyset_clause(last)
+            cursor.execute(
+                "SELECT s.UUID, s.LAST_ACTIVE, e.STATE "
+                "FROM SENSORES s LEFT JOIN SENSORES_ESTADO e ON e.UUID = s.UUID "
+                "WHERE s.LAST_ACTIVE <= %s" + keyset_sql + " "
+                "ORDER BY s.LAST_ACTIVE, s.UUID LIMIT %s",
+                (cutoff, *keyset_params, self.batch_size)
+            )
+            rows = cursor.fetchall()
+            self._count("scanned", len(rows))
+
+            self._record(cursor, transitions_for(rows, dead_cutoff), now)
+
+            if len(rows) < self.batch_size:
+                # Terminado: la próxima pasada empieza en el corte actual
+                cursor.execute(UPSERT_HIGH_WATER_SQL, (name, cutoff, ""))
+                conn.commit()
+                return
+
+            last = (rows[-1]["LAST_ACTIVE"], rows[-1]["UUID"])
+            cursor.execute(UPSERT_HIGH_WATER_SQL, (name, *last))
+            conn.commit()
+
+    def _notify(self):
+        """
+        @brief Envía los correos pendientes. Un envío fallido no se reintenta.
+        """
+        with connection() as conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute(
+                "SELECT ev.ID, ev.UUID, ev.NEW_STATE, ev.LAST_ACTIVE, u.EMAIL, u.USERNAME "
+                "FROM SENSORES_EVENTOS ev "
+                "JOIN SENSORES s ON s.UUID = ev.UUID "
+                "JOIN USUARIOS u ON u.ID = s.ASSOCIATED_USER "
+                "WHERE ev.NOTIFIED = %s ORDER BY ev.ID LIMIT %s",
+                (NOTIFY_PENDING, self.batch_size)
+            )
+            pending = cursor.fetchall()
+
+        results = []
+        for event in pending:
+            sent = self._send_alert(
+                event["EMAIL"], event["USERNAME"], event["UUID"], event["NEW_STATE"], event["LAST_ACTIVE"]
+            )
+            results.append((NOTIFY_SENT if sent else NOTIFY_SKIPPED, event["ID"]))
+            self._count("alerts_sent" if sent else "alerts_failed")
+
+        if results:
+            with connection() as conn, conn.cursor() as cursor:
+                cursor.executemany("UPDATE SENSORES_EVENTOS SET NOTIFIED = %s WHERE ID = %s", results)
+
+    def sweep(self, now: datetime = None) -> bool:
+        """
+        @brief Ejecuta una pasada completa.
+        @param now Momento de referencia (por defecto, ahora).
+        @return bool False si otro proceso estaba barriendo y no se hizo nada.
+        """
+        now = now or datetime.now().replace(microsecond=0)
+        stale_cutoff = now - self.stale_after
+        dead_cutoff = now - self.dead_after
+        start = time.perf_counter()
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SELECT GET_LOCK(%s, 0) AS LOCKED", (SWEEP_LOCK,))
+            if not cursor.fetchone()["LOCKED"]:
+                self._count("skipped")
+                return False
+            try:
+                self._recover(conn, cursor, now, stale_cutoff)
+                self._advance(conn, cursor, STALE, stale_cutoff, dead_cutoff, now)
+                self._advance(conn, cursor, DEAD, dead_cutoff, dead_cutoff, now)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (SWEEP_LOCK,))
+                cursor.fetchall()
+                cursor.close()
+        finally:
+            conn.close()
+
+        if self.alerts_enabled:
+            self._notify()
+
+        with self._lock:
+            self._counters["sweeps"] += 1
+            self._last_sweep_at = now
+            self._last_sweep_ms = (time.perf_counter() - start) * 1000
+        return True
+
+    # ---------- Ciclo de vida ----------
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"Error en el barrido de sensores: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                **self._counters,
+                "last_sweep_at": self._last_sweep_at,
+                "last_sweep_ms": round(self._last_sweep_ms, 3),
+            }
+
+
+sensor_sweeper = SensorSweeper()
+
+#-----------------------------------
+#   CONSULTAS DEL PANEL DE ADMINISTRACIÓN
+#-----------------------------------
+
+def get_sensor_states(state: str = None, conn=None, limit: int = None, after: str = None):
+    """
+    @brief Devuelve los sensores no activos según el último barrido, del que lleva
+    más tiempo inactivo al más reciente, y cuántos hay en cada estado.
+    @param state 'STALE' o 'DEAD' para filtrar (opcional).
+    @param conn Conexión opcional a la base de datos.
+    @param limit Sensores por página (opcional).
+    @param after Cursor devuelto en "siguiente" por la página anterior (opcional).
+    @return dict Recuento por estado, sensores de la página y cursor siguiente.
+    @exception HTTPException 400 si el estado, el cursor o el tamaño de página no son válidos.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    limit = page_limit(limit)
+    if state is not None:
+        state = state.upper()
+        if state not in (STALE, DEAD):
+            raise HTTPException(status_code=400, detail=f"Estado no válido, use {STALE} o {DEAD}")
+
+    where, params = "WHERE 1 = 1", []
+    if state:
+        where += " AND e.STATE = %s"
+        params.append(state)
+    if after:
+        last_active, last_uuid = decode_cursor("sensor_states", after, 2)
+        where += " AND (e.LAST_ACTIVE > %s OR (e.LAST_ACTIVE = %s AND e.UUID > %s))"
+        params.extend((last_active, last_active, last_uuid))
+
+    try:
+        with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT STATE, COUNT(*) AS N FROM SENSORES_ESTADO GROUP BY STATE")
+            recuento = {STALE: 0, DEAD: 0}
+            recuento.update({row["STATE"]: row["N"] for row in cursor.fetchall()})
+
+            cursor.execute(
+                "SELECT e.UUID, s.ASSOCIATED_USER, e.STATE, e.LAST_ACTIVE, e.SINCE "
+                "FROM SENSORES_ESTADO e JOIN SENSORES s ON s.UUID = e.UUID "
+                f"{where} ORDER BY e.LAST_ACTIVE, e.UUID LIMIT %s",
+                (*params, limit + 1)
+            )
+            sensors, siguiente = split_page(
+                cursor.fetchall(), limit, "sensor_states", lambda s: (s["LAST_ACTIVE"], s["UUID"])
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+
+    return {
+        "status": "ok",
+        "recuento": recuento,
+        "sensors": sensors,
+        "siguiente": siguiente
+    }
+
+
+def get_sensor_events(conn=None, limit: int = None, after: str = None):
+    """
+    @brief Devuelve los cambios de estado de los sensores, del más reciente al más antiguo.
+    @param conn Conexión opcional a la base de datos.
+    @param limit Eventos por página (opcional).
+    @param after Cursor devuelto en "siguiente" por la página anterior (opcional).
+    @return dict Eventos de la página y cursor siguiente.
+    @exception HTTPException 400 si el cursor o el tamaño de página no son válidos.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    limit = page_limit(limit)
+    last_id = decode_cursor("sensor_events", after, 1)[0] if after else None
+
+    try:
+        with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute(
+                "SELECT ID, UUID, OLD_STATE, NEW_STATE, LAST_ACTIVE, CREATED_AT FROM SENSORES_EVENTOS "
+                + ("WHERE ID < %s " if last_id is not None else "")
+                + "ORDER BY ID DESC LIMIT %s",
+                (*((last_id,) if last_id is not None else ()), limit + 1)
+            )
+            events, siguiente = split_page(cursor.fetchall(), limit, "sensor_events", lambda e: (e["ID"],))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+
+    return {
+        "status": "ok",
+        "eventos": events,
+        "siguiente": siguiente
+    }
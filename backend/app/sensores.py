@@ -9,17 +9,167 @@
 #   manejan cualquier cosa relacionada a los sensores
 #-----------------------------------
 
+import re
 from datetime import datetime, timedelta
-from fastapi import HTTPException
-from .db import get_connection
+import numpy as np
+from fastapi import HTTPException, Response
+from mysql.connector import errors as mysql_errors
+from .db import get_connection, connection, on_commit
+from .ingest_buffer import IngestBuffer
+from .sensor_cache import sensor_registry
+from .recent_readings import recent_readings, RECENT_READINGS_SIZE
+from .response_cache import map_cache
+from .streaming import stream_query
+from .tiles import (
+    render_tile, tile_bounds, tile_cache_path, read_cached_tile, write_cached_tile, live_version,
+    TILE_MAX_ZOOM, TILE_RADIUS_PX
+)
+from .pagination import page_limit, decode_cursor, split_page
+from .rollups import accumulate_rollups, use_hourly_rollup, hourly_summary
+from .map_logic import (
+    parse_position, positions_to_arrays, bin_readings, bbox_mask, cell_size_for_zoom, snap_bbox,
+    MIN_CELL_SIZE, MAX_CELL_SIZE, MAP_RAW_ZOOM, MAP_POINT_BUDGET
+)
+
+#-----------------------------------
+#   CONSULTAS COMPARTIDAS DE INGESTA
+#-----------------------------------
+
+INSERT_MEDICION_SQL = (
+    "INSERT INTO MEDICIONES (ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION, "
+    "LATITUDE, LONGITUDE) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+# Margen admitido para marcas de tiempo de lotes que llegan algo adelantadas
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _known_sensors(cursor, uuids) -> set:
+    """
+    @brief Devuelve cuáles de los UUID dados existen en SENSORES. Los que están
+    en la caché de sensores no generan consulta; el resto se comprueba con un
+    único IN (...) y los encontrados se añaden a la caché.
+    @param cursor Cursor abierto en modo diccionario.
+    @param uuids UUID a comprobar.
+    @return set con los UUID existentes.
+    """
+    known = {uuid for uuid in uuids if sensor_registry.contains(uuid)}
+    missing = sorted(set(uuids) - known)
+    if missing:
+        placeholders = ",".join(["%s"] * len(missing))
+        cursor.execute(f"SELECT UUID FROM SENSORES WHERE UUID IN ({placeholders})", tuple(missing))
+        for row in cursor.fetchall():
+            sensor_registry.add(row["UUID"])
+            known.add(row["UUID"])
+    return known
+
+
+def _medicion_params(row: tuple) -> tuple:
+    """
+    @brief Añade a una fila de medición la latitud y longitud de su posición
+    (None si no es un GeoJSON Point válido).
+    @param row Tupla (uuid, fecha, gas, valor, temperatura, posición).
+    @return Parámetros para INSERT_MEDICION_SQL.
+    """
+    return (*row, *(parse_position(row[5]) or (None, None)))
+
+
+def _insert_readings(cursor, rows: list):
+    """
+    @brief Inserta varias mediciones de una vez. mysql-connector convierte el
+    executemany de un INSERT ... VALUES en un único INSERT de varias filas.
+    @param cursor Cursor abierto.
+    @param rows Tuplas (uuid, fecha, gas, valor, temperatura, posición).
+    """
+    cursor.executemany(INSERT_MEDICION_SQL, [_medicion_params(row) for row in rows])
+
+
+def _touch_sensors(cursor, last_active: dict):
+    """
+    @brief Actualiza LAST_ACTIVE de varios sensores en una sola sentencia.
+    Nunca retrocede la fecha si llegan lecturas atrasadas.
+    @param cursor Cursor abierto.
+    @param last_active Diccionario {uuid: datetime} con la última actividad de cada sensor.
+    """
+    if not last_active:
+        return
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(last_active))
+    placeholders = ",".join(["%s"] * len(last_active))
+    params = []
+    for uuid, date in last_active.items():
+        params.extend((uuid, date.strftime("%Y-%m-%d %H:%M:%S")))
+    params.extend(last_active.keys())
+
+    cursor.execute(
+        f"UPDATE SENSORES SET LAST_ACTIVE = GREATEST(COALESCE(LAST_ACTIVE, '1970-01-01'), "
+        f"CASE UUID {cases} END) WHERE UUID IN ({placeholders})",
+        tuple(params)
+    )
+
+
+def _publish_readings(rows: list):
+    """
+    @brief Refleja en las cachés en memoria unas mediciones ya confirmadas.
+    Se llama tras el commit (ver db.on_commit): antes, otra petición podría
+    volver a llenar las cachés sin ellas.
+    @param rows Tuplas (uuid, fecha, gas, valor, temperatura, posición).
+    """
+    map_cache.invalidate((row[2], row[1]) for row in rows)
+    recent_readings.append(rows)
+
+
+def _write_buffered_readings(rows: list):
+    """
+    @brief Vuelca un lote del buffer de ingesta: un INSERT de varias filas y
+    un único UPDATE de LAST_ACTIVE con la fecha más reciente de cada sensor.
+    @param rows Tuplas (uuid, fecha, gas, valor, temperatura, posición) con fecha datetime.
+    """
+    last_active = {}
+    for row in rows:
+        uuid, date = row[0], row[1]
+        if uuid not in last_active or date > last_active[uuid]:
+            last_active[uuid] = date
+
+    with connection() as conn, conn.cursor() as cursor:
+        _insert_readings(cursor, rows)
+        accumulate_rollups(cursor, rows)
+        _touch_sensors(cursor, last_active)
+    _publish_readings(rows)
+
+
+def _is_row_error(error: Exception) -> bool:
+    """
+    @brief Errores de MySQL que dependen de los valores de una fila (dato que
+    no cabe en su columna, clave ajena que ya no existe) y no de la conexión.
+    """
+    return isinstance(error, (mysql_errors.DataError, mysql_errors.IntegrityError))
+
+
+ingest_buffer = IngestBuffer(_write_buffered_readings, is_row_error=_is_row_error)
 
 #-----------------------------------
 #   FUNCIONES DE GESTIÓN DE SENSORES
 #-----------------------------------
 
+def _forget_sensors(uuids: list):
+    """
+    @brief Quita unos sensores de las cachés en memoria tras vincularlos o
+    borrarlos. Se llama tras el commit (ver db.on_commit): antes, otra
+    petición podría volver a cargar la fila anterior y dejarla en caché
+    hasta que caduque.
+    """
+    sensor_registry.discard(*uuids)
+    recent_readings.discard(*uuids)
+
+
 def bind_sensor_to_user(user_id: int, uuid: str, conn=None):
     """
     @brief Vincula un sensor a un usuario en la base de datos.
+    Aunque el endpoint ya lo ha identificado con su token de sesión, se
+    comprueba que el usuario siga existiendo: la revocación de tokens al
+    borrar un usuario solo llega al proceso que lo borró.
     @param user_id ID del usuario.
     @param uuid Identificador único del sensor.
     @param conn Conexión opcional a la base de datos.
@@ -34,9 +184,8 @@ def bind_sensor_to_user(user_id: int, uuid: str, conn=None):
             close_conn = True
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT ID FROM USUARIOS WHERE ID = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
+        cursor.execute("SELECT 1 FROM USUARIOS WHERE ID = %s", (user_id,))
+        if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
         last_active = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -45,6 +194,7 @@ def bind_sensor_to_user(user_id: int, uuid: str, conn=None):
             "INSERT INTO SENSORES (UUID, ASSOCIATED_USER, LAST_ACTIVE) VALUES (%s, %s, %s)",
             (uuid, user_id, last_active)
         )
+        on_commit(conn, lambda: _forget_sensors([uuid]))
 
         if close_conn:
             conn.commit()
@@ -89,9 +239,8 @@ def delete_sensor_records(user_id: int, erase_all: bool, uuid: str = None, conn=
 
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT ID FROM USUARIOS WHERE ID = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
+        cursor.execute("SELECT 1 FROM USUARIOS WHERE ID = %s", (user_id,))
+        if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
         cursor.execute("SELECT UUID FROM SENSORES WHERE ASSOCIATED_USER = %s", (user_id,))
@@ -101,6 +250,7 @@ def delete_sensor_records(user_id: int, erase_all: bool, uuid: str = None, conn=
 
         if erase_all:
             cursor.execute("DELETE FROM SENSORES WHERE ASSOCIATED_USER = %s", (user_id,))
+            on_commit(conn, lambda: _forget_sensors([s["UUID"] for s in sensores]))
             message = f"Todos los sensores del usuario {user_id} han sido eliminados"
         else:
             if uuid is None:
@@ -119,6 +269,7 @@ def delete_sensor_records(user_id: int, erase_all: bool, uuid: str = None, conn=
                     detail=f"El sensor '{uuid}' no está asociado al usuario {user_id}"
                 )
             cursor.execute("DELETE FROM SENSORES WHERE UUID = %s", (uuid,))
+            on_commit(conn, lambda: _forget_sensors([uuid]))
             message = f"El sensor '{uuid}' ha sido eliminado del usuario {user_id}"
 
         if close_conn:
@@ -161,24 +312,22 @@ def add_reading(associated_uuid: str, gas_type: str, gas_value: float, temperatu
             close_conn = True
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT UUID FROM SENSORES WHERE UUID = %s", (associated_uuid,))
-        sensor = cursor.fetchone()
-        if not sensor:
+        if associated_uuid not in _known_sensors(cursor, [associated_uuid]):
             raise HTTPException(status_code=404, detail="Sensor no encontrado")
 
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now().replace(microsecond=0)
+        row = (associated_uuid, now, gas_type, gas_value, temperature_value, position)
 
-        cursor.execute(
-            "INSERT INTO MEDICIONES (ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION) "
-            "VALUES (%s, %s, %s, %s, %s, %s)",
-            (associated_uuid, now, gas_type, gas_value, temperature_value, position)
-        )
+        cursor.execute(INSERT_MEDICION_SQL, _medicion_params(row))
+        accumulate_rollups(cursor, [row])
 
         cursor.execute(
             "UPDATE SENSORES SET LAST_ACTIVE = %s WHERE UUID = %s",
             (now, associated_uuid)
         )
 
+        # Con la conexión de get_db el commit llega al terminar la petición
+        on_commit(conn, lambda: _publish_readings([row]))
         if close_conn:
             conn.commit()
 
@@ -196,48 +345,211 @@ def add_reading(associated_uuid: str, gas_type: str, gas_value: float, temperatu
         "mensaje": f"Medición agregada exitosamente para el sensor '{associated_uuid}'"
     }
 
+def add_readings_batch(readings: list, conn=None):
+    """
+    @brief Agrega un lote de mediciones. Los sensores desconocidos se rechazan
+    uno a uno sin invalidar el resto del lote.
+    @param readings Lista de BatchReading (mismo formato que Reading más un timestamp opcional).
+    @param conn Conexión opcional a la base de datos.
+    @return dict Totales de aceptadas y rechazadas y el resultado de cada elemento.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    close_conn = False
+    cursor = None
+    # Sin microsegundos, como add_reading: DATETIME los redondearía y la caché
+    # de mediciones recientes guardaría otra fecha
+    now = datetime.now().replace(microsecond=0)
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+        cursor = conn.cursor(dictionary=True)
+
+        # Como mucho una consulta para comprobar todos los UUID del lote
+        known = _known_sensors(cursor, {r.associated_uuid for r in readings})
+
+        rows, resultados, last_active = [], [], {}
+        for index, reading in enumerate(readings):
+            uuid = reading.associated_uuid
+            date = reading.timestamp or now
+            if date.tzinfo is not None:
+                date = date.astimezone().replace(tzinfo=None)
+            date = date.replace(microsecond=0)
+
+            if uuid not in known:
+                motivo = "Sensor no encontrado"
+            elif date > now + MAX_CLOCK_SKEW:
+                motivo = "La fecha de la medición está en el futuro"
+            else:
+                motivo = None
+
+            resultados.append({
+                "indice": index,
+                "uuid": uuid,
+                "aceptada": motivo is None,
+                "motivo": motivo
+            })
+            if motivo:
+                continue
+
+            rows.append((
+                uuid, date, reading.gasType,
+                reading.gas, reading.temperature, reading.position
+            ))
+            if uuid not in last_active or date > last_active[uuid]:
+                last_active[uuid] = date
+
+        if rows:
+            _insert_readings(cursor, rows)
+            accumulate_rollups(cursor, rows)
+            _touch_sensors(cursor, last_active)
+
+        on_commit(conn, lambda: _publish_readings(rows))
+        if close_conn:
+            conn.commit()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    return {
+        "status": "ok",
+        "aceptadas": len(rows),
+        "rechazadas": len(readings) - len(rows),
+        "resultados": resultados
+    }
+
+def queue_reading(associated_uuid: str, gas_type: str, gas_value: float, temperature_value: float, position: str = None, conn=None):
+    """
+    @brief Acepta una medición y la deja en el buffer de ingesta para escribirla
+    por lotes. La actualización de LAST_ACTIVE se agrupa en cada volcado.
+    @param associated_uuid UUID del sensor.
+    @param gas_type Tipo de gas medido.
+    @param gas_value Valor del gas.
+    @param temperature_value Valor de temperatura.
+    @param position Posición o ubicación del sensor (opcional).
+    @param conn Conexión opcional a la base de datos.
+    @return dict Mensaje de éxito de la operación.
+    @exception HTTPException 404 si el sensor no existe.
+    @exception HTTPException 503 si la cola de ingesta está llena.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+        cursor = conn.cursor(dictionary=True)
+
+        if associated_uuid not in _known_sensors(cursor, [associated_uuid]):
+            raise HTTPException(status_code=404, detail="Sensor no encontrado")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    row = (associated_uuid, datetime.now().replace(microsecond=0), gas_type, gas_value, temperature_value, position)
+    if not ingest_buffer.offer(row):
+        raise HTTPException(status_code=503, detail="La cola de ingesta está llena, inténtelo más tarde")
+
+    return {
+        "status": "ok",
+        "mensaje": f"Medición encolada para el sensor '{associated_uuid}'"
+    }
+
+# Mediciones recientes que se devuelven por sensor en get_user_sensors
+USER_SENSOR_READINGS = RECENT_READINGS_SIZE
+
+USER_SENSOR_READINGS_SQL = (
+    "SELECT ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION "
+    "FROM ("
+    "  SELECT ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION, "
+    "         ROW_NUMBER() OVER (PARTITION BY ASSOCIATED_UUID ORDER BY DATE DESC, ID DESC) AS RN "
+    "  FROM MEDICIONES "
+    "  WHERE ASSOCIATED_UUID IN ({placeholders})"
+    ") ultimas "
+    "WHERE RN <= %s "
+    "ORDER BY ASSOCIATED_UUID, RN"
+)
+
+def user_sensors_with_readings(cursor, user_id: int, token: int) -> list:
+    """
+    @brief Sensores de un usuario con sus últimas mediciones, sin comprobar el usuario.
+    Las mediciones salen de la caché recent_readings; solo los sensores que
+    no están en ella se consultan, todos en una única consulta.
+    @param cursor Cursor abierto en modo diccionario.
+    @param user_id ID del usuario.
+    @param token Marca de recent_readings.begin_load() tomada antes de la primera consulta
+    de la transacción.
+    @return Lista de {uuid, last_active, mediciones} (vacía si no tiene sensores).
+    """
+    cursor.execute("SELECT UUID, LAST_ACTIVE FROM SENSORES WHERE ASSOCIATED_USER = %s", (user_id,))
+    sensores = cursor.fetchall()
+
+    por_sensor = {sensor["UUID"]: recent_readings.get(sensor["UUID"]) for sensor in sensores}
+    missing = [uuid for uuid, mediciones in por_sensor.items() if mediciones is None]
+
+    if missing:
+        # Una sola consulta para los que faltan: ROW_NUMBER numera las
+        # mediciones de cada sensor de la más reciente a la más antigua
+        placeholders = ",".join(["%s"] * len(missing))
+        cursor.execute(
+            USER_SENSOR_READINGS_SQL.format(placeholders=placeholders),
+            (*missing, USER_SENSOR_READINGS)
+        )
+        for uuid in missing:
+            por_sensor[uuid] = []
+        for medicion in cursor.fetchall():
+            por_sensor[medicion.pop("ASSOCIATED_UUID")].append(medicion)
+        for uuid in missing:
+            recent_readings.load(uuid, por_sensor[uuid], token)
+
+    return [
+        {
+            "uuid": sensor["UUID"],
+            "last_active": sensor["LAST_ACTIVE"],
+            "mediciones": por_sensor[sensor["UUID"]]
+        }
+        for sensor in sensores
+    ]
+
 def get_user_sensors(user_id: int, conn=None):
     """
     @brief Devuelve los sensores de un usuario y sus últimas 20 mediciones.
     @param user_id ID del usuario.
     @param conn Conexión opcional a la base de datos.
     @return dict Sensores y mediciones del usuario.
-    @exception HTTPException 404 si el usuario o sensores no existen.
+    @exception HTTPException 404 si el usuario no tiene sensores.
     @exception HTTPException 500 si ocurre un error en la base de datos.
     """
     close_conn = False
     cursor = None
+    # Antes de cualquier consulta, para que la transacción no vea un estado
+    # anterior a la marca (ver RecentReadings)
+    token = recent_readings.begin_load()
     try:
         if conn is None:
             conn = get_connection()
             close_conn = True
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT ID FROM USUARIOS WHERE ID = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-        cursor.execute("SELECT UUID, LAST_ACTIVE FROM SENSORES WHERE ASSOCIATED_USER = %s", (user_id,))
-        sensores = cursor.fetchall()
-        if not sensores:
+        resultado = user_sensors_with_readings(cursor, user_id, token)
+        if not resultado:
             raise HTTPException(status_code=404, detail="El usuario no tiene sensores asociados")
 
-        resultado = []
-        for sensor in sensores:
-            cursor.execute(
-                "SELECT DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION "
-                "FROM MEDICIONES WHERE ASSOCIATED_UUID = %s "
-                "ORDER BY DATE DESC LIMIT 20",
-                (sensor["UUID"],)
-            )
-            mediciones = cursor.fetchall()
-            resultado.append({
-                "uuid": sensor["UUID"],
-                "last_active": sensor["LAST_ACTIVE"],
-                "mediciones": mediciones
-            })
-
     except HTTPException:
         raise
     except Exception as e:
@@ -254,13 +566,116 @@ def get_user_sensors(user_id: int, conn=None):
         "sensores": resultado
     }
 
-def get_all_sensors(conn=None):
+# Ventanas de inactividad (en días) de los filtros del panel de administración
+INACTIVITY_WINDOWS = (1, 7, 30, 180)
+
+
+def _like_pattern(term: str) -> str:
+    """
+    @brief Patrón LIKE que busca `term` como subcadena literal.
+    """
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _sensor_search_clause(uuid: str = None, user: str = None) -> tuple:
+    """
+    @brief Filtros de búsqueda por subcadena del UUID y del ID del usuario asociado.
+    @return Tupla (condiciones SQL, parámetros); las condiciones empiezan por AND.
+    """
+    sql, params = "", []
+    if uuid:
+        sql += " AND UUID LIKE %s"
+        params.append(_like_pattern(uuid.strip()))
+    if user:
+        sql += " AND CAST(ASSOCIATED_USER AS CHAR) LIKE %s"
+        params.append(_like_pattern(user.strip()))
+    return sql, params
+
+
+def _inactivity_cutoff(inactive_days: int = None):
+    """
+    @brief Fecha límite de un filtro de inactividad: un sensor cumple el filtro
+    si su última actividad es anterior o igual a ella (o no tiene ninguna).
+    @exception HTTPException 400 si el número de días es negativo.
+    """
+    if inactive_days is None or inactive_days == 0:
+        return None
+    if inactive_days < 0:
+        raise HTTPException(status_code=400, detail="Los días de inactividad no pueden ser negativos")
+    return datetime.now().replace(microsecond=0) - timedelta(days=inactive_days)
+
+
+def _count_inactivity_buckets(cursor, search_sql: str, search_params: list) -> dict:
+    """
+    @brief Cuenta en una sola consulta agrupada cuántos sensores llevan inactivos
+    al menos cada ventana de INACTIVITY_WINDOWS.
+    @return dict {"1": n, "7": n, "30": n, "180": n, "todos": total}.
+    """
+    now = datetime.now().replace(microsecond=0)
+    windows = sorted(INACTIVITY_WINDOWS, reverse=True)
+    cases = " ".join(["WHEN LAST_ACTIVE <= %s THEN %s"] * len(windows))
+    case_params = []
+    for days in windows:
+        case_params.extend((now - timedelta(days=days), days))
+
+    cursor.execute(
+        f"SELECT CASE WHEN LAST_ACTIVE IS NULL THEN {windows[0]} {cases} ELSE 0 END AS BUCKET, "
+        "COUNT(*) AS N "
+        "FROM SENSORES WHERE 1 = 1" + search_sql + " "
+        "GROUP BY BUCKET",
+        (*case_params, *search_params)
+    )
+    exclusive = {int(row["BUCKET"]): row["N"] for row in cursor.fetchall()}
+
+    # Los botones son acumulativos: "+1 día" incluye también a los de "+1 semana"
+    counts = {
+        str(days): sum(n for bucket, n in exclusive.items() if bucket >= days)
+        for days in INACTIVITY_WINDOWS
+    }
+    counts["todos"] = sum(exclusive.values())
+    return counts
+
+
+def get_all_sensors(conn=None, limit: int = None, after: str = None, inactive_days: int = None,
+                    uuid: str = None, user: str = None):
     """
-    @brief Devuelve una lista con todos los sensores de la base de datos.
+    @brief Devuelve una página de los sensores, del que lleva más tiempo inactivo al más reciente.
+
+    Los filtros se resuelven en la base de datos: la inactividad con un rango
+    sobre el índice (LAST_ACTIVE, UUID) y la búsqueda por subcadena sobre las
+    filas que recorre. La primera página (sin cursor) incluye además cuántos
+    sensores cumplen cada ventana de inactividad, con la misma búsqueda.
+
     @param conn Conexión opcional a la base de datos.
-    @return dict Lista de sensores y su última actividad.
+    @param limit Sensores por página (opcional).
+    @param after Cursor devuelto en "siguiente" por la página anterior (opcional).
+    @param inactive_days Solo sensores sin actividad en al menos estos días (0 o None, todos).
+    @param uuid Subcadena del UUID (opcional).
+    @param user Subcadena del ID del usuario asociado (opcional).
+    @return dict Sensores con su última actividad, el cursor de la página siguiente
+    y, en la primera página, los recuentos por inactividad.
+    @exception HTTPException 400 si el cursor, el tamaño de página o los días no son válidos.
     @exception HTTPException 500 si ocurre un error en la base de datos.
     """
+    limit = page_limit(limit)
+    cutoff = _inactivity_cutoff(inactive_days)
+    search_sql, search_params = _sensor_search_clause(uuid, user)
+
+    where, params = "WHERE 1 = 1" + search_sql, list(search_params)
+    if cutoff is not None:
+        where += " AND (LAST_ACTIVE <= %s OR LAST_ACTIVE IS NULL)"
+        params.append(cutoff)
+    if after:
+        last_active, last_uuid = decode_cursor("sensors", after, 2)
+        # MySQL ordena los NULL primero
+        if last_active is None:
+            where += " AND ((LAST_ACTIVE IS NULL AND UUID > %s) OR LAST_ACTIVE IS NOT NULL)"
+            params.append(last_uuid)
+        else:
+            where += " AND (LAST_ACTIVE > %s OR (LAST_ACTIVE = %s AND UUID > %s))"
+            params.extend((last_active, last_active, last_uuid))
+
     close_conn = False
     cursor = None
     try:
@@ -269,8 +684,16 @@ def get_all_sensors(conn=None):
             close_conn = True
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT UUID, ASSOCIATED_USER, LAST_ACTIVE FROM SENSORES")
-        sensors = cursor.fetchall()
+        cursor.execute(
+            "SELECT UUID, ASSOCIATED_USER, LAST_ACTIVE FROM SENSORES "
+            f"{where} ORDER BY LAST_ACTIVE, UUID LIMIT %s",
+            (*params, limit + 1)
+        )
+        sensors, siguiente = split_page(
+            cursor.fetchall(), limit, "sensors", lambda s: (s["LAST_ACTIVE"], s["UUID"])
+        )
+
+        inactividad = None if after else _count_inactivity_buckets(cursor, search_sql, search_params)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
@@ -282,24 +705,193 @@ def get_all_sensors(conn=None):
 
     return {
         "status": "ok",
-        "sensors": sensors
+        "sensors": sensors,
+        "siguiente": siguiente,
+        "inactividad": inactividad
     }
+
+
+def stream_all_sensors(fmt: str, inactive_days: int = None, uuid: str = None, user: str = None):
+    """
+    @brief Devuelve en streaming todos los sensores que cumplen los filtros,
+    en el mismo orden que get_all_sensors().
+    @param fmt 'ndjson' o 'json'.
+    @param inactive_days Solo sensores sin actividad en al menos estos días (opcional).
+    @param uuid Subcadena del UUID (opcional).
+    @param user Subcadena del ID del usuario asociado (opcional).
+    @return StreamingResponse con un sensor por elemento.
+    @exception HTTPException 400 si el formato o los días no son válidos, 500 si falla la consulta.
+    """
+    cutoff = _inactivity_cutoff(inactive_days)
+    search_sql, params = _sensor_search_clause(uuid, user)
+    if cutoff is not None:
+        search_sql += " AND (LAST_ACTIVE <= %s OR LAST_ACTIVE IS NULL)"
+        params.append(cutoff)
+
+    return stream_query(
+        "SELECT UUID, ASSOCIATED_USER, LAST_ACTIVE FROM SENSORES "
+        "WHERE 1 = 1" + search_sql + " ORDER BY LAST_ACTIVE, UUID",
+        tuple(params),
+        fmt
+    )
     
 #-----------------------------------
-#   Devuelve todas las mediciones registradas en una fecha o fecha-hora específica
-#   String: datetime_str -> get_all_readings_for_datetime() -> 200 OK | Error
+#   Convierte la fecha pedida en un rango semiabierto [desde, hasta)
+#   String: datetime_str | datetime: start, end -> parse_time_range() -> (desde, hasta) | Error
+#-----------------------------------
+
+# Formatos admitidos y la duración del periodo que representa cada uno
+DATETIME_FORMATS = (
+    ("%Y-%m-%d %H:%M:%S", timedelta(seconds=1)),
+    ("%Y-%m-%dT%H:%M:%S", timedelta(seconds=1)),
+    ("%Y-%m-%d %H:%M", timedelta(minutes=1)),
+    ("%Y-%m-%dT%H:%M", timedelta(minutes=1)),
+    ("%Y-%m-%d %H", timedelta(hours=1)),
+    ("%Y-%m-%dT%H", timedelta(hours=1)),
+    ("%Y-%m-%d", timedelta(days=1)),
+)
+
+# Rango máximo que se puede pedir de una vez
+MAX_TIME_RANGE = timedelta(days=31)
+
+
+def parse_time_range(datetime_str: str = None, start: datetime = None, end: datetime = None):
+    """
+    @brief Traduce la selección de fechas a un rango [desde, hasta) sobre DATE.
+
+    Una fecha 'YYYY-MM-DD' cubre el día entero, 'YYYY-MM-DD HH' la hora entera,
+    y así con minutos y segundos. También se admite un rango explícito from/to.
+    Comparar DATE contra un rango permite usar el índice (GAS_TYPE, DATE).
+
+    @param datetime_str Fecha o fecha-hora (opcional si se pasan start y end).
+    @param start Inicio del rango (incluido).
+    @param end Fin del rango (excluido).
+    @return Tupla (desde, hasta) de datetime.
+    @exception HTTPException 400 si la fecha o el rango no son válidos.
+    """
+    if start is not None or end is not None:
+        if start is None or end is None:
+            raise HTTPException(status_code=400, detail="Debe proporcionar 'from' y 'to' a la vez")
+        if start.tzinfo is not None:
+            start = start.astimezone().replace(tzinfo=None)
+        if end.tzinfo is not None:
+            end = end.astimezone().replace(tzinfo=None)
+        if end <= start:
+            raise HTTPException(status_code=400, detail="'to' debe ser posterior a 'from'")
+        if end - start > MAX_TIME_RANGE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"El rango no puede superar {MAX_TIME_RANGE.days} días"
+            )
+        return start, end
+
+    if not datetime_str or not isinstance(datetime_str, str):
+        raise HTTPException(
+            status_code=400,
+            detail="Debe proporcionar una fecha válida en formato 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'"
+        )
+
+    for fmt, span in DATETIME_FORMATS:
+        try:
+            desde = datetime.strptime(datetime_str.strip(), fmt)
+        except ValueError:
+            continue
+        return desde, desde + span
+
+    raise HTTPException(
+        status_code=400,
+        detail="Debe proporcionar una fecha válida en formato 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'"
+    )
+
+#-----------------------------------
+#   Valida el rectángulo visible del mapa y lo traduce a un filtro SQL
+#   List: bbox -> parse_bbox() -> (oeste, sur, este, norte) | Error
 #-----------------------------------
 
-def get_all_readings_for_datetime(datetime_str: str, gasType: str, conn=None):
+def parse_bbox(bbox):
+    """
+    @brief Valida un rectángulo [oeste, sur, este, norte] en grados (orden GeoJSON).
+    @param bbox Lista de cuatro números o None.
+    @return Tupla (oeste, sur, este, norte) o None si no se pidió filtro.
+    @exception HTTPException 400 si el rectángulo no es válido.
+    """
+    if bbox is None:
+        return None
+    try:
+        west, south, east, north = (float(v) for v in bbox)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="bbox debe ser [oeste, sur, este, norte]")
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise HTTPException(
+            status_code=400,
+            detail="bbox debe ser [oeste, sur, este, norte] con oeste < este y sur < norte"
+        )
+    return west, south, east, north
+
+
+def map_view_bbox(bbox, zoom: int):
+    """
+    @brief Valida el rectángulo y el zoom de una vista del mapa y amplía el
+    rectángulo a la rejilla de celdas de ese zoom (ver snap_bbox), de modo que
+    la clave de caché y la consulta usen el mismo rectángulo alineado.
+    @param bbox Lista [oeste, sur, este, norte].
+    @param zoom Nivel de zoom del mapa (0 a 22).
+    @return Tupla (oeste, sur, este, norte) alineada.
+    @exception HTTPException 400 si falta el rectángulo, no es válido o el zoom está fuera de rango.
     """
-    Obtiene todas las mediciones de una fecha específica y tipo de gas.
+    bbox = parse_bbox(bbox)
+    if bbox is None:
+        raise HTTPException(status_code=400, detail="Debe proporcionar el área visible (bbox)")
+    if not 0 <= zoom <= 22:
+        raise HTTPException(status_code=400, detail="El zoom debe estar entre 0 y 22")
+    return snap_bbox(bbox, cell_size_for_zoom(zoom))
 
-    @param datetime_str: Fecha en formato 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'.
+
+def _bbox_clause(bbox) -> tuple:
+    """
+    @brief Condición SQL sobre LATITUDE/LONGITUDE para un rectángulo ya validado.
+    @return Tupla (fragmento SQL, parámetros); vacía si no hay rectángulo.
+    """
+    if bbox is None:
+        return "", ()
+    west, south, east, north = bbox
+    return "AND LATITUDE BETWEEN %s AND %s AND LONGITUDE BETWEEN %s AND %s ", (south, north, west, east)
+
+
+#-----------------------------------
+#   Devuelve por páginas las mediciones registradas en una fecha, hora o rango específico
+#   String: datetime_str, int: limit, String: after -> get_all_readings_for_datetime() -> 200 OK | Error
+#-----------------------------------
+
+def get_all_readings_for_datetime(datetime_str: str, gasType: str, conn=None, start: datetime = None, end: datetime = None,
+                                  limit: int = None, after: str = None, bbox=None):
+    """
+    Obtiene las mediciones de una fecha, hora o rango y tipo de gas, por páginas
+    de la más reciente a la más antigua (orden estable por DATE e ID).
+
+    @param datetime_str: Fecha en formato 'YYYY-MM-DD', 'YYYY-MM-DD HH' o 'YYYY-MM-DD HH:MM:SS'.
     @param gasType: Tipo de gas a filtrar ('O3', 'CO', 'NO2', 'SO2', etc.).
     @param conn: Conexión a la base de datos (opcional).
-    @return: Diccionario con status, consulta, total de mediciones y lista de mediciones.
-    @raises HTTPException: Si la fecha o gas son inválidos, o falla la consulta.
+    @param start: Inicio de un rango explícito (alternativa a datetime_str).
+    @param end: Fin (excluido) de un rango explícito.
+    @param limit: Mediciones por página (opcional).
+    @param after: Cursor devuelto en "siguiente" por la página anterior (opcional).
+    @param bbox: Rectángulo [oeste, sur, este, norte] al que limitar las mediciones (opcional).
+    @return: Diccionario con status, consulta, mediciones de la página y cursor de la siguiente.
+    @raises HTTPException: Si la fecha, el gas, el cursor o el rectángulo son inválidos, o falla la consulta.
     """
+    desde, hasta = parse_time_range(datetime_str, start, end)
+    bbox = parse_bbox(bbox)
+
+    if not gasType or not isinstance(gasType, str):
+        raise HTTPException(
+            status_code=400,
+            detail="Debe proporcionar un tipo de gas válido"
+        )
+
+    limit = page_limit(limit)
+    last_key = decode_cursor("readings", after, 2) if after else None
+
     close_conn = False
     cursor = None
     try:
@@ -309,32 +901,458 @@ def get_all_readings_for_datetime(datetime_str: str, gasType: str, conn=None):
 
         cursor = conn.cursor(dictionary=True)
 
-        if not datetime_str or not isinstance(datetime_str, str):
+        # Consulta filtrando por tipo de gas y rango de fechas (usa el índice
+        # GAS_TYPE, DATE, que en InnoDB incluye ID al final)
+        query = (
+            "SELECT ID, ASSOCIATED_UUID, DATE, GAS_VALUE, TEMPERATURE_VALUE, POSITION "
+            "FROM MEDICIONES "
+            "WHERE GAS_TYPE = %s AND DATE >= %s AND DATE < %s "
+        )
+        params = [gasType, desde, hasta]
+        bbox_sql, bbox_params = _bbox_clause(bbox)
+        query += bbox_sql
+        params += bbox_params
+        if last_key:
+            query += "AND DATE <= %s AND (DATE < %s OR ID < %s) "
+            params += [last_key[0], last_key[0], last_key[1]]
+        query += "ORDER BY DATE DESC, ID DESC LIMIT %s"
+        params.append(limit + 1)
+
+        cursor.execute(query, tuple(params))
+        mediciones, siguiente = split_page(
+            cursor.fetchall(), limit, "readings", lambda m: (m["DATE"], m["ID"])
+        )
+
+        if not mediciones and not last_key:
             raise HTTPException(
-                status_code=400,
-                detail="Debe proporcionar una fecha válida en formato 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'"
+                status_code=404,
+                detail=f"No se encontraron mediciones para '{datetime_str or desde}' y gas '{gasType}'"
             )
 
-        if not gasType or not isinstance(gasType, str):
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    return {
+        "status": "ok",
+        "consulta": datetime_str,
+        "desde": desde,
+        "hasta": hasta,
+        "gasType": gasType,
+        "total_mediciones": len(mediciones),
+        "mediciones": mediciones,
+        "siguiente": siguiente
+    }
+
+
+def stream_readings_for_datetime(datetime_str: str, gasType: str, fmt: str, start: datetime = None, end: datetime = None,
+                                 bbox=None):
+    """
+    Devuelve en streaming todas las mediciones de una fecha, hora o rango y
+    tipo de gas, de la más reciente a la más antigua, sin paginar.
+
+    @param datetime_str: Fecha en formato 'YYYY-MM-DD', 'YYYY-MM-DD HH' o 'YYYY-MM-DD HH:MM:SS'.
+    @param gasType: Tipo de gas a filtrar.
+    @param fmt: 'ndjson' o 'json'.
+    @param start: Inicio de un rango explícito (alternativa a datetime_str).
+    @param end: Fin (excluido) de un rango explícito.
+    @param bbox: Rectángulo [oeste, sur, este, norte] al que limitar las mediciones (opcional).
+    @return: StreamingResponse con una medición por elemento.
+    @raises HTTPException: Si la fecha, el gas, el rectángulo o el formato son inválidos, o falla la consulta.
+    """
+    desde, hasta = parse_time_range(datetime_str, start, end)
+    bbox_sql, bbox_params = _bbox_clause(parse_bbox(bbox))
+
+    if not gasType or not isinstance(gasType, str):
+        raise HTTPException(status_code=400, detail="Debe proporcionar un tipo de gas válido")
+
+    return stream_query(
+        "SELECT ID, ASSOCIATED_UUID, DATE, GAS_VALUE, TEMPERATURE_VALUE, POSITION "
+        "FROM MEDICIONES "
+        "WHERE GAS_TYPE = %s AND DATE >= %s AND DATE < %s "
+        + bbox_sql +
+        "ORDER BY DATE DESC, ID DESC",
+        (gasType, desde, hasta, *bbox_params),
+        fmt
+    )
+
+
+#-----------------------------------
+#   Devuelve las mediciones de una fecha agregadas en celdas de una cuadrícula
+#   String: datetime_str, float: resolution -> get_binned_readings_for_datetime() -> 200 OK | Error
+#-----------------------------------
+
+def _fetch_binnable(cursor, origen: str, gasType: str, desde: datetime, hasta: datetime, bbox):
+    """
+    @brief Lee los puntos a agrupar en celdas, de MEDICIONES o del resumen horario.
+    @param cursor Cursor abierto (de tuplas).
+    @param origen 'horario' para MEDICIONES_HORARIAS, 'mediciones' para MEDICIONES.
+    @param gasType Tipo de gas.
+    @param desde Inicio del rango.
+    @param hasta Fin del rango, excluido.
+    @param bbox Rectángulo (oeste, sur, este, norte) ya validado, o None.
+    @return Tupla (lats, lons, values, counts, maxs); counts y maxs son None con
+        mediciones sueltas y values son sumas con el resumen horario.
+    """
+    if origen == "horario":
+        cursor.execute(
+            "SELECT LAST_POSITION, VALUE_SUM, READINGS_COUNT, VALUE_MAX FROM MEDICIONES_HORARIAS "
+            "WHERE GAS_TYPE = %s AND HOUR_START >= %s AND HOUR_START < %s AND LAST_POSITION IS NOT NULL",
+            (gasType, desde, hasta)
+        )
+        arrays = positions_to_arrays(cursor.fetchall(), 0, 1, 2, 3)
+        if bbox is not None:
+            inside = bbox_mask(arrays[0], arrays[1], bbox)
+            arrays = tuple(array[inside] for array in arrays)
+        return arrays
+
+    bbox_sql, bbox_params = _bbox_clause(bbox)
+    cursor.execute(
+        "SELECT LATITUDE, LONGITUDE, GAS_VALUE FROM MEDICIONES "
+        "WHERE GAS_TYPE = %s AND DATE >= %s AND DATE < %s "
+        "AND LATITUDE IS NOT NULL AND GAS_VALUE IS NOT NULL " + bbox_sql,
+        (gasType, desde, hasta, *bbox_params)
+    )
+    lats, lons, values = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, 3).T
+    return lats, lons, values, None, None
+
+
+def get_binned_readings_for_datetime(datetime_str: str, gasType: str, resolution: float, conn=None, start: datetime = None, end: datetime = None,
+                                     bbox=None):
+    """
+    Obtiene las mediciones de una fecha y gas agregadas en celdas de `resolution` grados.
+
+    En lugar de una fila por medición devuelve una por celda con la media, el
+    máximo y el número de mediciones, así que el tamaño de la respuesta depende
+    del área cubierta y no del volumen de mediciones.
+
+    Si el rango cubre horas completas y la celda es de al menos
+    ROLLUP_MIN_CELL_SIZE grados, se lee MEDICIONES_HORARIAS (una fila por
+    sensor y hora, situada en su última posición) en lugar de MEDICIONES.
+
+    @param datetime_str: Fecha en formato 'YYYY-MM-DD', 'YYYY-MM-DD HH' o 'YYYY-MM-DD HH:MM:SS'.
+    @param gasType: Tipo de gas a filtrar.
+    @param resolution: Lado de la celda en grados.
+    @param conn: Conexión a la base de datos (opcional).
+    @param start: Inicio de un rango explícito (alternativa a datetime_str).
+    @param end: Fin (excluido) de un rango explícito.
+    @param bbox: Rectángulo [oeste, sur, este, norte] al que limitar las mediciones (opcional).
+    @return: Diccionario con status, rango consultado y lista de celdas.
+    @raises HTTPException: Si la fecha, el gas o la resolución son inválidos, o falla la consulta.
+    """
+    desde, hasta = parse_time_range(datetime_str, start, end)
+
+    if not gasType or not isinstance(gasType, str):
+        raise HTTPException(status_code=400, detail="Debe proporcionar un tipo de gas válido")
+
+    if not MIN_CELL_SIZE <= resolution <= MAX_CELL_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La resolución debe estar entre {MIN_CELL_SIZE} y {MAX_CELL_SIZE} grados"
+        )
+
+    bbox = parse_bbox(bbox)
+
+    # Con celdas grandes y un rango de horas completas basta el resumen horario
+    origen = "horario" if use_hourly_rollup(desde, hasta, resolution) else "mediciones"
+
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        cursor = conn.cursor()
+        lats, lons, values, counts, maxs = _fetch_binnable(cursor, origen, gasType, desde, hasta, bbox)
+
+        if len(values) == 0:
             raise HTTPException(
-                status_code=400,
-                detail="Debe proporcionar un tipo de gas válido"
+                status_code=404,
+                detail=f"No se encontraron mediciones para '{datetime_str or desde}' y gas '{gasType}'"
             )
 
-        # Consulta filtrando por fecha y tipo de gas
-        query = (
-            "SELECT ASSOCIATED_UUID, DATE, GAS_VALUE, TEMPERATURE_VALUE, POSITION "
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    celdas = bin_readings(lats, lons, values, resolution, counts=counts, maxs=maxs)
+
+    return {
+        "status": "ok",
+        "consulta": datetime_str,
+        "desde": desde,
+        "hasta": hasta,
+        "gasType": gasType,
+        "resolucion": resolution,
+        "origen": origen,
+        "total_mediciones": len(values) if counts is None else int(counts.sum()),
+        "total_celdas": len(celdas),
+        "celdas": celdas
+    }
+
+#-----------------------------------
+#   Devuelve lo que cabe en la vista del mapa según el zoom: grupos a poco zoom,
+#   mediciones sueltas a mucho zoom, y nunca más de MAP_POINT_BUDGET puntos
+#   String: datetime_str, List: bbox, int: zoom -> get_map_view() -> 200 OK | Error
+#-----------------------------------
+
+def get_map_view(datetime_str: str, gasType: str, bbox, zoom: int, conn=None, start: datetime = None, end: datetime = None):
+    """
+    Obtiene los puntos a dibujar en el área visible del mapa para un gas y una fecha.
+
+    Por debajo de MAP_RAW_ZOOM las mediciones se agrupan en celdas del tamaño
+    que corresponde al zoom y se devuelve el centroide de cada grupo con su
+    media, máximo y número de mediciones (el peso). Desde MAP_RAW_ZOOM se
+    devuelven las mediciones sueltas más recientes. En ambos casos la
+    respuesta se limita a MAP_POINT_BUDGET puntos.
+
+    @param datetime_str: Fecha en formato 'YYYY-MM-DD', 'YYYY-MM-DD HH' o 'YYYY-MM-DD HH:MM:SS'.
+    @param gasType: Tipo de gas a filtrar.
+    @param bbox: Rectángulo visible [oeste, sur, este, norte]; se amplía a la rejilla del zoom.
+    @param zoom: Nivel de zoom del mapa (0 a 22).
+    @param conn: Conexión a la base de datos (opcional).
+    @param start: Inicio de un rango explícito (alternativa a datetime_str).
+    @param end: Fin (excluido) de un rango explícito.
+    @return: Diccionario con status, modo ('grupos' o 'mediciones'), puntos y si se ha recortado.
+    @raises HTTPException: Si la fecha, el gas, el rectángulo o el zoom son inválidos, o falla la consulta.
+    """
+    desde, hasta = parse_time_range(datetime_str, start, end)
+
+    if not gasType or not isinstance(gasType, str):
+        raise HTTPException(status_code=400, detail="Debe proporcionar un tipo de gas válido")
+
+    bbox = map_view_bbox(bbox, zoom)
+
+    modo = "mediciones" if zoom >= MAP_RAW_ZOOM else "grupos"
+    resolucion = None
+    origen = "mediciones"
+
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        cursor = conn.cursor()
+        if modo == "mediciones":
+            bbox_sql, bbox_params = _bbox_clause(bbox)
+            cursor.execute(
+                "SELECT LATITUDE, LONGITUDE, GAS_VALUE, DATE FROM MEDICIONES "
+                "WHERE GAS_TYPE = %s AND DATE >= %s AND DATE < %s "
+                "AND LATITUDE IS NOT NULL AND GAS_VALUE IS NOT NULL " + bbox_sql +
+                "ORDER BY DATE DESC, ID DESC LIMIT %s",
+                (gasType, desde, hasta, *bbox_params, MAP_POINT_BUDGET + 1)
+            )
+            rows = cursor.fetchall()
+        else:
+            resolucion = cell_size_for_zoom(zoom)
+            if use_hourly_rollup(desde, hasta, resolucion):
+                origen = "horario"
+            lats, lons, values, counts, maxs = _fetch_binnable(cursor, origen, gasType, desde, hasta, bbox)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    if modo == "mediciones":
+        truncado = len(rows) > MAP_POINT_BUDGET
+        puntos = [
+            {"lat": float(lat), "lon": float(lon), "value": value, "date": date}
+            for lat, lon, value, date in rows[:MAP_POINT_BUDGET]
+        ]
+    else:
+        puntos = bin_readings(lats, lons, values, resolucion, counts=counts, maxs=maxs, centroids=True)
+        truncado = len(puntos) > MAP_POINT_BUDGET
+        if truncado:
+            # Se conservan los grupos con más mediciones
+            puntos = sorted(puntos, key=lambda p: p["count"], reverse=True)[:MAP_POINT_BUDGET]
+
+    return {
+        "status": "ok",
+        "consulta": datetime_str,
+        "desde": desde,
+        "hasta": hasta,
+        "gasType": gasType,
+        "zoom": zoom,
+        "bbox": bbox,
+        "modo": modo,
+        "resolucion": resolucion,
+        "origen": origen,
+        "truncado": truncado,
+        "total_puntos": len(puntos),
+        "puntos": puntos
+    }
+
+#-----------------------------------
+#   Devuelve una tesela PNG del mapa de un gas y una fecha, renderizada o de la caché en disco
+#   String: gas, String: date_str, int: z, x, y -> get_tile() -> 200 OK (image/png) | 304 | Error
+#-----------------------------------
+
+def get_tile(gas: str, date_str: str, z: int, x: int, y: int, if_none_match: str = None, conn=None):
+    """
+    Obtiene la tesela (z, x, y) del mapa interpolado de un gas en una fecha.
+
+    La versión de los datos (número de mediciones y la más reciente, según el
+    resumen horario) forma parte de la clave de la caché en disco y del ETag,
+    así una tesela solo se vuelve a renderizar si han llegado mediciones nuevas
+    a esa fecha. Si el rango sigue abierto (hoy), la versión es un tramo de
+    TILE_LIVE_BUCKET segundos: con el número de mediciones cada medición nueva
+    invalidaría todas las teselas. Las de días pasados se sirven con caché larga.
+
+    @param gas: Tipo de gas.
+    @param date_str: Fecha en formato 'YYYY-MM-DD' (o 'YYYY-MM-DD HH').
+    @param z, x, y: Tesela en el esquema XYZ.
+    @param if_none_match: Valor de la cabecera If-None-Match (opcional).
+    @param conn: Conexión a la base de datos (opcional).
+    @return: Response con el PNG, o 304 si el cliente ya tiene esta versión.
+    @raises HTTPException: Si el gas, la fecha o la tesela no son válidos, o falla la consulta.
+    """
+    if not gas or not re.fullmatch(r"[A-Za-z0-9_]+", gas):
+        raise HTTPException(status_code=400, detail="Debe proporcionar un tipo de gas válido")
+    if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Tesela fuera de rango")
+
+    desde, hasta = parse_time_range(date_str)
+    date_key = desde.strftime("%Y%m%d%H%M%S")
+
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT COALESCE(SUM(READINGS_COUNT), 0), MAX(LAST_DATE) FROM MEDICIONES_HORARIAS "
+            "WHERE GAS_TYPE = %s AND HOUR_START >= %s AND HOUR_START < %s",
+            (gas, desde.replace(minute=0, second=0, microsecond=0), hasta)
+        )
+        total, ultima = cursor.fetchone()
+        now = datetime.now()
+        if not ultima:
+            version = "0"
+        elif hasta > now:
+            version = live_version(now.timestamp())
+        else:
+            version = f"{int(total)}-{ultima:%Y%m%d%H%M%S}"
+
+        etag = f'"{version}"'
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=86400" if hasta <= today else "public, max-age=60"
+        }
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        path = tile_cache_path(gas, date_key, version, z, x, y)
+        png = read_cached_tile(path)
+        lats = lons = values = np.empty(0)
+        counts = None
+        if png is None and version != "0":
+            resolution = cell_size_for_zoom(z)
+            origen = "horario" if use_hourly_rollup(desde, hasta, resolution) else "mediciones"
+            bbox = tile_bounds(z, x, y, margin_px=TILE_RADIUS_PX)
+            lats, lons, values, counts, _ = _fetch_binnable(cursor, origen, gas, desde, hasta, bbox)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    # El renderizado se hace ya sin conexión prestada
+    if png is None:
+        png = render_tile(z, x, y, lats, lons, values, gas, counts=counts)
+        write_cached_tile(path, png)
+
+    return Response(content=png, media_type="image/png", headers=headers)
+
+#-----------------------------------
+#   Devuelve, agrupadas por posición, las mediciones de varios gases a la vez
+#   String: datetime_str, List: gas_types -> get_multi_gas_readings_for_datetime() -> 200 OK | Error
+#-----------------------------------
+
+def get_multi_gas_readings_for_datetime(datetime_str: str, gas_types: list, conn=None, start: datetime = None, end: datetime = None,
+                                        bbox=None):
+    """
+    Obtiene en una sola consulta las mediciones de varios gases y las agrupa por posición.
+
+    Para cada posición se devuelve el valor más reciente de cada gas dentro del
+    rango, o None si ese gas no se midió allí.
+
+    @param datetime_str: Fecha en formato 'YYYY-MM-DD', 'YYYY-MM-DD HH' o 'YYYY-MM-DD HH:MM:SS'.
+    @param gas_types: Lista de gases ('o3', 'no2', 'so2', 'co', ...).
+    @param conn: Conexión a la base de datos (opcional).
+    @param start: Inicio de un rango explícito (alternativa a datetime_str).
+    @param end: Fin (excluido) de un rango explícito.
+    @param bbox: Rectángulo [oeste, sur, este, norte] al que limitar las mediciones (opcional).
+    @return: Diccionario con status, rango consultado y lista de posiciones con un valor por gas.
+    @raises HTTPException: Si la fecha, los gases o el rectángulo son inválidos, o falla la consulta.
+    """
+    desde, hasta = parse_time_range(datetime_str, start, end)
+    bbox_sql, bbox_params = _bbox_clause(parse_bbox(bbox))
+
+    gases = list(dict.fromkeys(g.lower() for g in gas_types if g))
+    if not gases:
+        raise HTTPException(status_code=400, detail="Debe proporcionar al menos un tipo de gas válido")
+
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        cursor = conn.cursor(dictionary=True)
+
+        placeholders = ",".join(["%s"] * len(gases))
+        cursor.execute(
+            "SELECT POSITION, GAS_TYPE, GAS_VALUE, DATE "
             "FROM MEDICIONES "
-            "WHERE DATE LIKE %s AND GAS_TYPE = %s "
-            "ORDER BY DATE DESC"
+            f"WHERE GAS_TYPE IN ({placeholders}) AND DATE >= %s AND DATE < %s "
+            "AND POSITION IS NOT NULL " + bbox_sql,
+            (*gases, desde, hasta, *bbox_params)
         )
-        cursor.execute(query, (f"{datetime_str}%", gasType))
-        mediciones = cursor.fetchall()
 
-        if not mediciones:
+        # Pivote en una pasada: {posición: {gas: (fecha, valor)}}
+        posiciones = {}
+        for row in cursor.fetchall():
+            gas = row["GAS_TYPE"].lower()
+            valores = posiciones.setdefault(row["POSITION"], {})
+            previo = valores.get(gas)
+            if previo is None or row["DATE"] > previo[0]:
+                valores[gas] = (row["DATE"], row["GAS_VALUE"])
+
+        if not posiciones:
             raise HTTPException(
                 status_code=404,
-                detail=f"No se encontraron mediciones para '{datetime_str}' y gas '{gasType}'"
+                detail=f"No se encontraron mediciones para '{datetime_str or desde}'"
             )
 
     except HTTPException:
@@ -347,22 +1365,54 @@ def get_all_readings_for_datetime(datetime_str: str, gasType: str, conn=None):
         if close_conn and conn:
             conn.close()
 
+    resultado = []
+    for position, valores in posiciones.items():
+        fila = {"POSITION": position}
+        for gas in gases:
+            fila[gas] = valores[gas][1] if gas in valores else None
+        resultado.append(fila)
+
     return {
         "status": "ok",
         "consulta": datetime_str,
-        "gasType": gasType,
-        "total_mediciones": len(mediciones),
-        "mediciones": mediciones
+        "desde": desde,
+        "hasta": hasta,
+        "gasTypes": gases,
+        "total_posiciones": len(resultado),
+        "posiciones": resultado
     }
 
 
+def today_measurements(cursor, uuids: list) -> list:
+    """
+    @brief Mediciones del día actual de varios sensores, de la más reciente a la más antigua.
+    @param cursor Cursor abierto en modo diccionario.
+    @param uuids UUID de los sensores.
+    @return Lista de mediciones (vacía si no hay sensores).
+    """
+    if not uuids:
+        return []
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # El rango usa el índice (ASSOCIATED_UUID, DATE)
+    format_strings = ','.join(['%s'] * len(uuids))
+    query = f"""
+        SELECT ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION
+        FROM MEDICIONES
+        WHERE ASSOCIATED_UUID IN ({format_strings}) AND DATE >= %s AND DATE < %s
+        ORDER BY DATE DESC
+    """
+    cursor.execute(query, (*uuids, today, today + timedelta(days=1)))
+    return cursor.fetchall()
+
 def get_today_measurements_for_user(user_id: int, conn=None):
     """
     @brief Devuelve todas las mediciones del día actual de todos los sensores asociados a un usuario.
     @param user_id ID del usuario.
     @param conn Conexión opcional a la base de datos.
     @return dict con un listado de mediciones de hoy.
-    @exception HTTPException 404 si el usuario no existe o no tiene sensores.
+    @exception HTTPException 404 si el usuario no tiene sensores.
     @exception HTTPException 500 si ocurre un error en la base de datos.
     """
     close_conn = False
@@ -374,32 +1424,14 @@ def get_today_measurements_for_user(user_id: int, conn=None):
         cursor = conn.cursor(dictionary=True)
 
         # Verificar usuario
-        cursor.execute("SELECT ID FROM USUARIOS WHERE ID = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
         # Obtener UUID de todos los sensores del usuario
         cursor.execute("SELECT UUID FROM SENSORES WHERE ASSOCIATED_USER = %s", (user_id,))
         sensores = cursor.fetchall()
         if not sensores:
             raise HTTPException(status_code=404, detail="El usuario no tiene sensores asociados")
 
-        # Obtener lista de UUIDs
-        uuids = [s["UUID"] for s in sensores]
-
-        today_str = datetime.now().strftime("%Y-%m-%d")
-
         # Traer todas las mediciones del día
-        format_strings = ','.join(['%s'] * len(uuids))
-        query = f"""
-            SELECT ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE, TEMPERATURE_VALUE, POSITION
-            FROM MEDICIONES
-            WHERE ASSOCIATED_UUID IN ({format_strings}) AND DATE(DATE) = %s
-            ORDER BY DATE DESC
-        """
-        cursor.execute(query, (*uuids, today_str))
-        mediciones = cursor.fetchall()
+        mediciones = today_measurements(cursor, [s["UUID"] for s in sensores])
 
     except HTTPException:
         raise
@@ -415,4 +1447,82 @@ def get_today_measurements_for_user(user_id: int, conn=None):
         "status": "ok",
         "usuario": user_id,
         "mediciones": mediciones
-    }
\ No newline at end of file
+    }
+
+#-----------------------------------
+#   Int: user_id, String: date, List: gas_types -> get_daily_summary_for_user() -> 200 OK | Error
+#-----------------------------------
+
+def get_daily_summary_for_user(user_id: int, date_str: str = None, gas_types: list = None, conn=None):
+    """
+    @brief Resumen horario de un día de los sensores de un usuario: mínimo,
+    media, máximo y número de mediciones de cada gas en cada hora.
+
+    Se calcula con una sola consulta agrupada sobre MEDICIONES_HORARIAS, así
+    que el tamaño de la respuesta (24 horas x gases) no depende de cuántas
+    mediciones haya.
+
+    @param user_id ID del usuario.
+    @param date_str Día en formato 'YYYY-MM-DD' (por defecto, hoy).
+    @param gas_types Gases a incluir (por defecto o3, no2, so2 y co).
+    @param conn Conexión opcional a la base de datos.
+    @return dict con el día, los gases y la matriz horaria de cada gas.
+    @exception HTTPException 400 si la fecha o los gases no son válidos.
+    @exception HTTPException 404 si el usuario no tiene sensores.
+    @exception HTTPException 500 si ocurre un error en la base de datos.
+    """
+    if date_str is None:
+        desde = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        try:
+            desde = datetime.strptime(date_str.strip(), "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Debe proporcionar una fecha válida en formato 'YYYY-MM-DD'")
+    hasta = desde + timedelta(days=1)
+
+    gases = list(dict.fromkeys(g.lower() for g in (gas_types or ["o3", "no2", "so2", "co"]) if g))
+    if not gases:
+        raise HTTPException(status_code=400, detail="Debe proporcionar al menos un tipo de gas válido")
+
+    close_conn = False
+    cursor = None
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute("SELECT 1 FROM SENSORES WHERE ASSOCIATED_USER = %s LIMIT 1", (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="El usuario no tiene sensores asociados")
+
+        placeholders = ",".join(["%s"] * len(gases))
+        cursor.execute(
+            "SELECT h.GAS_TYPE, h.HOUR_START, SUM(h.READINGS_COUNT) AS READINGS_COUNT, "
+            "SUM(h.VALUE_SUM) AS VALUE_SUM, MIN(h.VALUE_MIN) AS VALUE_MIN, MAX(h.VALUE_MAX) AS VALUE_MAX "
+            "FROM MEDICIONES_HORARIAS h "
+            "JOIN SENSORES s ON s.UUID = h.ASSOCIATED_UUID "
+            f"WHERE s.ASSOCIATED_USER = %s AND h.GAS_TYPE IN ({placeholders}) "
+            "AND h.HOUR_START >= %s AND h.HOUR_START < %s "
+            "GROUP BY h.GAS_TYPE, h.HOUR_START",
+            (user_id, *gases, desde, hasta)
+        )
+        rows = cursor.fetchall()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if close_conn and conn:
+            conn.close()
+
+    return {
+        "status": "ok",
+        "usuario": user_id,
+        "fecha": desde.strftime("%Y-%m-%d"),
+        "gasTypes": gases,
+        "resumen": hourly_summary(rows, desde, gases)
+    }
@@ -0,0 +1,215 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: sessions.py
+#   Descripción: Tokens de sesión firmados con HMAC que se emiten al iniciar
+#   sesión y dependencia de FastAPI que los comprueba sin consultar la base de datos
+#-----------------------------------
+
+import os
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = "session"
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 60 * 60 * 24))
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", 10000))
+SESSION_INSECURE_DEV = os.environ.get("SESSION_INSECURE_DEV", "0") == "1"
+
+
+def _load_secret() -> bytes:
+    """
+    @brief Clave de firma de los tokens, leída de SESSION_SECRET.
+    Sin ella el servidor no arranca: una clave aleatoria por proceso haría que
+    los tokens solo valieran en el proceso que los emitió. Solo para
+    desarrollo, SESSION_INSECURE_DEV=1 permite arrancar con una temporal.
+    @exception RuntimeError si no hay clave y no se ha pedido el modo de desarrollo.
+    """
+    secret = os.environ.get("SESSION_SECRET")
+    if secret:
+        return secret.encode("utf-8")
+    if SESSION_INSECURE_DEV:
+        logger.warning("SESSION_SECRET no está definida; se usa una clave aleatoria temporal (SESSION_INSECURE_DEV)")
+        return secrets.token_bytes(32)
+    raise RuntimeError("SESSION_SECRET no está definida (SESSION_INSECURE_DEV=1 solo para desarrollo)")
+
+
+@dataclass(frozen=True)
+class Session:
+    """
+    @brief Usuario identificado por un token de sesión válido.
+    """
+    user_id: int
+    is_admin: bool
+    issued_at: int
+    expires: int
+
+
+class SessionManager:
+    """
+    @brief Emisión y comprobación de tokens de sesión.
+
+    El token es "<id>.<admin>.<emitido>.<caduca>.<firma>", con la firma
+    HMAC-SHA256 del resto. Comprobarlo solo necesita CPU: si la firma y la
+    fecha son válidas, el usuario existe y su rol es el indicado, sin consultar
+    USUARIOS. Los tokens ya comprobados se guardan en un LRU de `cache_size`
+    entradas para no repetir el cálculo en cada petición.
+
+    Al borrar un usuario se llama a revoke_user() y sus tokens emitidos antes
+    dejan de valer en este proceso; en los demás caducan solos en `ttl` segundos.
+    """
+
+    def __init__(self, secret: bytes = None, ttl: int = SESSION_TTL, cache_size: int = SESSION_CACHE_SIZE):
+        self._secret = secret or _load_secret()
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "issued": 0,
+            "hits": 0,
+            "misses": 0,
+            "rejected": 0,
+        }
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._secret, payload.encode("utf-8"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def issue(self, user_id: int, is_admin: bool) -> str:
+        """
+        @brief Crea un token de sesión para un usuario recién autenticado.
+        @param user_id ID del usuario.
+        @param is_admin Si el usuario es administrador.
+        @return str Token firmado.
+        """
+        now = int(time.time())
+        payload = f"{user_id}.{int(bool(is_admin))}.{now}.{now + self.ttl}"
+        with self._lock:
+            self._counters["issued"] += 1
+        return f"{payload}.{self._sign(payload)}"
+
+    def _parse(self, token: str):
+        try:
+            payload, signature = token.rsplit(".", 1)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            user_id, is_admin, issued_at, expires = (int(part) for part in payload.split("."))
+        except ValueError:
+            return None
+        return Session(user_id, bool(is_admin), issued_at, expires)
+
+    def resolve(self, token: str):
+        """
+        @brief Comprueba un token.
+        @param token Token recibido del cliente.
+        @return Session del usuario, o None si el token no es válido, ha caducado o se ha revocado.
+        """
+        now = int(time.time())
+        with self._lock:
+            session = self._cache.get(token)
+            if session is not None:
+                self._cache.move_to_end(token)
+                self._counters["hits"] += 1
+
+        if session is None:
+            session = self._parse(token)
+            with self._lock:
+                self._counters["misses"] += 1
+                if session is not None:
+                    self._cache[token] = session
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        with self._lock:
+            revoked_at = self._revoked.get(session.user_id) if session else None
+            if session is None or session.expires <= now or (revoked_at is not None and session.issued_at <= revoked_at):
+                self._cache.pop(token, None)
+                self._counters["rejected"] += 1
+                return None
+        return session
+
+    def revoke_user(self, user_id: int):
+        """
+        @brief Invalida en este proceso los tokens emitidos hasta ahora para un usuario.
+        """
+        now = int(time.time())
+        with self._lock:
+            self._revoked[user_id] = now
+            # Las revocaciones más antiguas que `ttl` ya no afectan a ningún token
+            for uid in [uid for uid, at in self._revoked.items() if at + self.ttl < now]:
+                del self._revoked[uid]
+            for token in [t for t, s in self._cache.items() if s.user_id == user_id]:
+                del self._cache[token]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._revoked.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "cache_size": self.cache_size,
+                "revoked_users": len(self._revoked),
+                **self._counters,
+            }
+
+
+session_manager = SessionManager()
+
+
+def current_session(request: Request) -> Session:
+    """
+    @brief Dependencia de FastAPI que exige un token de sesión válido, en la
+    cabecera "Authorization: Bearer <token>" o en la cookie de sesión.
+    @return Session del usuario.
+    @exception HTTPException 401 si no hay token o no es válido.
+    """
+    token = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token:
+        token = request.cookies.get(SESSION_COOKIE)
+    if not token:
+        raise HTTPException(status_code=401, detail="Debe iniciar sesión")
+
+    session = session_manager.resolve(token)
+    if session is None:
+        raise HTTPException(status_code=401, detail="La sesión no es válida o ha caducado")
+    return session
+
+
+def authorize(session: Session, user_id: int):
+    """
+    @brief Comprueba que la sesión pertenece al usuario pedido (o a un administrador).
+    @exception HTTPException 403 si no es así.
+    """
+    if session.user_id != user_id and not session.is_admin:
+        raise HTTPException(status_code=403, detail="No tiene permiso para acceder a los datos de otro usuario")
+
+
+def admin_session(session: Session = Depends(current_session)) -> Session:
+    """
+    @brief Dependencia de FastAPI para los endpoints de administración.
+    @return Session del administrador.
+    @exception HTTPException 401 sin sesión válida, 403 si no es administrador.
+    """
+    if not session.is_admin:
+        raise HTTPException(status_code=403, detail="Solo un administrador puede acceder a este recurso")
+    return session
@@ -0,0 +1,161 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: streaming.py
+#   Descripción: Respuestas en streaming para consultas grandes. Las filas se
+#   leen con fetchmany y se envían al cliente por bloques (NDJSON o un array
+#   JSON), así la memoria no depende del número de filas
+#-----------------------------------
+
+import os
+import json
+import logging
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from .db import get_connection, POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 1000))
+# Cada descarga tiene una conexión del pool prestada hasta el final: por debajo
+# del tamaño del pool para que las descargas lentas no dejen sin conexiones a la API
+STREAM_MAX_CONCURRENT = int(os.environ.get("STREAM_MAX_CONCURRENT", max(1, POOL_SIZE // 2)))
+# Última línea (NDJSON) o último elemento (JSON) si la descarga se corta por un error
+STREAM_ERROR_KEY = "_error"
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def encode_rows(rows: list, fmt: str, first: bool) -> bytes:
+    """
+    @brief Codifica un bloque de filas en el formato pedido.
+    @param rows Filas (diccionarios) del bloque.
+    @param fmt 'ndjson' (una fila por línea) o 'json' (elementos de un array).
+    @param first True si es el primer bloque del array (sin coma inicial).
+    @return bytes Bloque listo para enviar.
+    """
+    items = [json.dumps(row, default=_json_default, ensure_ascii=False) for row in rows]
+    if fmt == "ndjson":
+        return ("\n".join(items) + "\n").encode("utf-8")
+    return (("" if first else ",") + ",".join(items)).encode("utf-8")
+
+
+def check_stream_format(fmt: str) -> str:
+    """
+    @brief Valida el formato de streaming pedido.
+    @exception HTTPException 400 si no es 'ndjson' ni 'json'.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de streaming no válido, use uno de: {', '.join(STREAM_FORMATS)}"
+        )
+    return fmt
+
+
+def stream_query(query: str, params: tuple, fmt: str, chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingResponse:
+    """
+    @brief Ejecuta una consulta y devuelve su resultado en streaming.
+
+    La consulta se lanza antes de responder, así un error de la base de datos
+    sigue llegando como 500. La conexión es propia (no la de get_db, que se
+    libera antes de enviar el cuerpo) y se devuelve al pool al terminar o si
+    el cliente se desconecta a medias.
+
+    Como la conexión queda prestada durante toda la descarga, como mucho hay
+    STREAM_MAX_CONCURRENT descargas a la vez; por encima se responde 503 sin
+    tocar el pool. Si la lectura falla a mitad, el estado ya se ha enviado
+    como 200: el cuerpo termina con una fila {"_error": ...} para que el
+    cliente no tome el resultado parcial por completo.
+
+    @param query Consulta SQL.
+    @param params Parámetros de la consulta.
+    @param fmt 'ndjson' o 'json'.
+    @param chunk_size Filas por fetchmany.
+    @return StreamingResponse con las filas.
+    @exception HTTPException 503 si ya hay demasiadas descargas en curso.
+    @exception HTTPException 500 si falla la consulta.
+    """
+    check_stream_format(fmt)
+
+    if not _stream_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Demasiadas descargas en curso, inténtelo de nuevo en unos segundos")
+
+    conn = cursor = None
+    released = False
+
+    def cleanup():
+        # La llaman el propio cuerpo y la tarea de fondo: solo cuenta la primera vez
+        nonlocal released
+        if released:
+            return
+        released = True
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                # Quedan filas sin leer: release() descartará la conexión
+                pass
+        if conn is not None:
+            conn.close()
+        _stream_slots.release()
+
+    try:
+        conn = get_connection()
+        # Cursor sin buffer: las filas se leen del socket según se piden
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params)
+    except Exception as e:
+        cleanup()
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error en la base de datos: {e}")
+
+    def body():
+        try:
+            if fmt == "json":
+                yield b"["
+            first = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield encode_rows(rows, fmt, first)
+                first = False
+            if fmt == "json":
+                yield b"]"
+        except Exception as e:
+            logger.error(f"Streaming interrumpido: {e}")
+            yield encode_rows([{STREAM_ERROR_KEY: "Descarga interrumpida por un error del servidor"}], fmt, first)
+            if fmt == "json":
+                yield b"]"
+        finally:
+            cleanup()
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[fmt],
+        background=BackgroundTask(cleanup)
+    )
@@ -10,7 +10,7 @@
 #-----------------------------------
 
 from datetime import datetime
-from .db import get_connection
+from .db import connection
 from .schemas.system import (
     IncidentFilter, IncidentCreate, IncidentUpdate
     )
@@ -20,7 +20,7 @@ from .email_utils import (
     send_incident_updated_email
 )
 
-def get_incidents(filters: IncidentFilter):
+def get_incidents(filters: IncidentFilter, conn=None):
     """
     @brief Obtiene una lista de incidencias filtradas según los parámetros recibidos.
     
@@ -31,12 +31,10 @@ def get_incidents(filters: IncidentFilter):
         - state: Filtrar por estado de la incidencia.
         - submit_date_from: Fecha mínima de creación.
         - submit_date_to: Fecha máxima de creación.
+    @param conn Conexión opcional a la base de datos.
     
     @return Lista de diccionarios representando las incidencias obtenidas de la base de datos.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
     base_query = "SELECT * FROM INCIDENCIAS"
     conditions = []
     params = []
@@ -72,16 +70,14 @@ def get_incidents(filters: IncidentFilter):
     else:
         final_query = base_query
 
-    cursor.execute(final_query, params)
-    data = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        cursor.execute(final_query, params)
+        data = cursor.fetchall()
 
     return data
 
 
-def create_incident(incident: IncidentCreate):
+def create_incident(incident: IncidentCreate, conn=None):
     """
     @brief Crea una nueva incidencia en la base de datos.
     
@@ -91,12 +87,10 @@ def create_incident(incident: IncidentCreate):
         - description: Descripción detallada.
         - user_handled: ID del usuario asignado (opcional).
         - state: Estado inicial de la incidencia.
+    @param conn Conexión opcional a la base de datos.
     
     @return Diccionario con el ID de la incidencia creada y un mensaje de confirmación.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
     query = """
         INSERT INTO INCIDENCIAS (
             USER_ID,
@@ -122,17 +116,14 @@ def create_incident(incident: IncidentCreate):
         now
     )
 
-    cursor.execute(query, values)
-    conn.commit()
-
-    new_id = cursor.lastrowid
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        cursor.execute(query, values)
 
-    cursor.execute("SELECT EMAIL FROM USUARIOS WHERE ID = %s", (incident.user_id,))
-    row = cursor.fetchone()
-    user_email = row["EMAIL"] if row else None
+        new_id = cursor.lastrowid
 
-    cursor.close()
-    conn.close()
+        cursor.execute("SELECT EMAIL FROM USUARIOS WHERE ID = %s", (incident.user_id,))
+        row = cursor.fetchone()
+        user_email = row["EMAIL"] if row else None
 
     if user_email:
         send_incident_created_email(
@@ -144,7 +135,7 @@ def create_incident(incident: IncidentCreate):
     return {"id": new_id, "message": "Incident created successfully"}
 
 
-def update_incident(incident_id: int, incident: IncidentUpdate):
+def update_incident(incident_id: int, incident: IncidentUpdate, conn=None):
     """
     @brief Actualiza una incidencia existente en la base de datos.
     
@@ -154,67 +145,60 @@ def update_incident(incident_id: int, incident: IncidentUpdate):
         - description: Nueva descripción.
         - user_handled: Nuevo usuario responsable.
         - state: Nuevo estado de la incidencia.
+    @param conn Conexión opcional a la base de datos.
     
     @return Diccionario indicando:
         - updated: Numero de filas afectadas (0 o 1).
         - message: Mensaje indicando si se actualizó correctamente o no se encontró.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        # Obtener datos originales antes de modificar (bloqueando la fila)
+        cursor.execute("SELECT * FROM INCIDENCIAS WHERE ID = %s FOR UPDATE", (incident_id,))
+        original = cursor.fetchone()
 
-    # Obtener datos originales antes de modificar
-    cursor.execute("SELECT * FROM INCIDENCIAS WHERE ID = %s", (incident_id,))
-    original = cursor.fetchone()
+        if original is None:
+            return {"updated": 0, "message": "Incident not found"}
 
-    if original is None:
-        cursor.close()
-        conn.close()
-        return {"updated": 0, "message": "Incident not found"}
+        # Detectar cambios
+        changes = compute_incident_changes(original, incident)
 
-    # Detectar cambios
-    changes = compute_incident_changes(original, incident)
+        fields = []
+        params = []
 
-    fields = []
-    params = []
-
-    if incident.subject is not None:
-        fields.append("SUBJECT = %s")
-        params.append(incident.subject)
+        if incident.subject is not None:
+            fields.append("SUBJECT = %s")
+            params.append(incident.subject)
 
-    if incident.description is not None:
-        fields.append("DESCRIPTION = %s")
-        params.append(incident.description)
+        if incident.description is not None:
+            fields.append("DESCRIPTION = %s")
+            params.append(incident.description)
 
-    if incident.user_handled is not None:
-        fields.append("USER_HANDLED = %s")
-        params.append(incident.user_handled)
+        if incident.user_handled is not None:
+            fields.append("USER_HANDLED = %s")
+            params.append(incident.user_handled)
 
-    if incident.state is not None:
-        fields.append("STATE = %s")
-        params.append(incident.state)
+        if incident.state is not None:
+            fields.append("STATE = %s")
+            params.append(incident.state)
 
-    fields.append("CHANGE_DATE = %s")
-    params.append(datetime.now())
-
-    query = f"""
-        UPDATE INCIDENCIAS
-        SET {', '.join(fields)}
-        WHERE ID = %s
-    """
+        fields.append("CHANGE_DATE = %s")
+        params.append(datetime.now())
 
-    params.append(incident_id)
+        query = f"""
+            UPDATE INCIDENCIAS
+            SET {', '.join(fields)}
+            WHERE ID = %s
+        """
 
-    cursor.execute(query, params)
-    conn.commit()
+        params.append(incident_id)
 
-    updated = cursor.rowcount
+        cursor.execute(query, params)
 
-    cursor.execute("SELECT EMAIL FROM USUARIOS WHERE ID = %s", (original["USER_ID"],))
-    row = cursor.fetchone()
-    user_email = row["EMAIL"] if row else None
+        updated = cursor.rowcount
 
-    cursor.close()
-    conn.close()
+        cursor.execute("SELECT EMAIL FROM USUARIOS WHERE ID = %s", (original["USER_ID"],))
+        row = cursor.fetchone()
+        user_email = row["EMAIL"] if row else None
 
     if updated and user_email and changes:
         send_incident_updated_email(
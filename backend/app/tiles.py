@@ -0,0 +1,362 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: tiles.py
+#   Descripción: Renderizado de teselas PNG del mapa de contaminación
+#   (interpolación por inverso de la distancia con NumPy) y su caché en disco
+#-----------------------------------
+
+import os
+import time
+import zlib
+import struct
+import shutil
+import logging
+import tempfile
+import threading
+import numpy as np
+
+from .map_logic import bin_readings
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+# Resolución a la que se interpola; se escala a TILE_SIZE al codificar
+TILE_GRID = 128
+TILE_MAX_ZOOM = 18
+# Radio de influencia de cada medición, en píxeles de la tesela
+TILE_RADIUS_PX = 48
+TILE_POWER = 2
+# Por encima de este número de mediciones se agrupan antes de interpolar
+TILE_MAX_POINTS = 2048
+TILE_MAX_ALPHA = 180
+TILE_CACHE_DIR = os.environ.get("TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "oxigo_tiles"))
+TILE_CACHE_MAX_BYTES = int(os.environ.get("TILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+TILE_CACHE_MAX_AGE = float(os.environ.get("TILE_CACHE_MAX_AGE", 7 * 86400))
+TILE_CACHE_PRUNE_INTERVAL = float(os.environ.get("TILE_CACHE_PRUNE_INTERVAL", 300))
+# Para los rangos que siguen abiertos (hoy), la versión cambia cada tantos segundos
+TILE_LIVE_BUCKET = int(os.environ.get("TILE_LIVE_BUCKET", 60))
+
+# Umbrales (bueno < a <= medio < b <= malo) de evaluarCalidad.js para O3 y
+# de classifyGas() en gen_map.js para el resto de gases
+GAS_THRESHOLDS = {
+    "o3": (120, 180),
+    "no2": (50, 100),
+    "so2": (40, 80),
+    "co": (5, 10),
+}
+DEFAULT_THRESHOLDS = (50, 100)
+
+# Colores de la leyenda del mapa: Bajo, Medio, Alto
+LEVEL_COLORS = np.array([
+    [0x0C, 0x95, 0x67],
+    [0xFF, 0x9D, 0x00],
+    [0xFF, 0x00, 0x00],
+], dtype=np.uint8)
+
+MAX_LATITUDE = 85.0511287798
+
+
+def project(lats, lons, zoom: int):
+    """
+    @brief Proyecta coordenadas a píxeles del mundo en Web Mercator.
+    @return Tupla (px, py) de arrays, con el origen en la esquina noroeste.
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    lats = np.clip(lats, -MAX_LATITUDE, MAX_LATITUDE)
+    px = (lons + 180.0) / 360.0 * scale
+    py = (1 - np.log(np.tan(np.radians(lats)) + 1 / np.cos(np.radians(lats))) / np.pi) / 2 * scale
+    return px, py
+
+
+def unproject(px, py, zoom: int):
+    """
+    @brief Inversa de project(): píxeles del mundo a (lat, lon).
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    lon = px / scale * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py / scale))))
+    return lat, lon
+
+
+def tile_bounds(zoom: int, x: int, y: int, margin_px: float = 0):
+    """
+    @brief Rectángulo [oeste, sur, este, norte] de una tesela, ampliado en `margin_px` píxeles.
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    left = max(x * TILE_SIZE - margin_px, 0)
+    right = min((x + 1) * TILE_SIZE + margin_px, scale)
+    top = max(y * TILE_SIZE - margin_px, 0)
+    bottom = min((y + 1) * TILE_SIZE + margin_px, scale)
+    north, west = unproject(left, top, zoom)
+    south, east = unproject(right, bottom, zoom)
+    return float(west), float(south), float(east), float(north)
+
+
+def interpolate(px, py, values, weights, grid_x, grid_y, radius: float, power: float = TILE_POWER):
+    """
+    @brief Interpolación por inverso de la distancia sobre una rejilla.
+
+    Solo cuentan las mediciones a menos de `radius` píxeles; se procesa por
+    bloques de filas para acotar la memoria de la matriz de distancias.
+
+    @param px, py Posición de cada medición en píxeles.
+    @param values Valor de cada medición.
+    @param weights Peso adicional de cada medición (p. ej. cuántas resume).
+    @param grid_x, grid_y Coordenadas de las columnas y filas de la rejilla.
+    @param radius Radio de influencia en píxeles.
+    @param power Exponente de la distancia.
+    @return Tupla (valores, distancia a la medición más cercana) con la forma de la rejilla.
+    """
+    result = np.full((len(grid_y), len(grid_x)), np.nan)
+    nearest = np.full((len(grid_y), len(grid_x)), np.inf)
+    rows_per_block = max(1, 2 ** 21 // max(len(values) * len(grid_x), 1))
+
+    for start in range(0, len(grid_y), rows_per_block):
+        gy = grid_y[start:start + rows_per_block]
+        dx = grid_x[None, :, None] - px[None, None, :]
+        dy = gy[:, None, None] - py[None, None, :]
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        w = np.where(dist < radius, weights / np.maximum(dist, 1.0) ** power, 0.0)
+        total = w.sum(axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[start:start + len(gy)] = (w * values).sum(axis=2) / total
+        nearest[start:start + len(gy)] = dist.min(axis=2)
+
+    return result, nearest
+
+
+def colorize(values, nearest, gas: str, radius: float):
+    """
+    @brief Colorea la rejilla interpolada con los niveles Bajo/Medio/Alto.
+    La opacidad disminuye con la distancia a la medición más cercana.
+    @return Array RGBA (alto, ancho, 4) de uint8.
+    """
+    good, bad = GAS_THRESHOLDS.get(gas.lower(), DEFAULT_THRESHOLDS)
+    levels = np.digitize(np.nan_to_num(values), [good, bad])
+
+    rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = LEVEL_COLORS[levels]
+    alpha = TILE_MAX_ALPHA * np.clip(1 - nearest / radius, 0, 1)
+    rgba[..., 3] = np.where(np.isnan(values), 0, alpha).astype(np.uint8)
+    return rgba
+
+
+def encode_png(rgba) -> bytes:
+    """
+    @brief Codifica un array RGBA como PNG (sin dependencias externas).
+    """
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def render_tile(zoom: int, x: int, y: int, lats, lons, values, gas: str, counts=None) -> bytes:
+    """
+    @brief Renderiza una tesela a partir de las mediciones cercanas.
+    @param zoom, x, y Tesela en el esquema XYZ.
+    @param lats, lons, values Arrays de las mediciones (o sumas, si se pasa `counts`).
+    @param gas Tipo de gas, para los umbrales de color.
+    @param counts Número de mediciones que resume cada punto (opcional).
+    @return bytes PNG de TILE_SIZE x TILE_SIZE.
+    """
+    if counts is not None:
+        values = values / counts
+    weights = np.ones(len(values)) if counts is None else counts
+
+    if len(values) > TILE_MAX_POINTS:
+        # Celdas de 8 píxeles: acota el número de puntos sin perder forma
+        west, south, east, north = tile_bounds(zoom, x, y)
+        cells = bin_readings(lats, lons, values * weights, (east - west) / 32,
+                             counts=weights, centroids=True)
+        lats = np.array([c["lat"] for c in cells])
+        lons = np.array([c["lon"] for c in cells])
+        values = np.array([c["mean"] for c in cells])
+        weights = np.array([c["count"] for c in cells], dtype=np.float64)
+
+    step = TILE_SIZE / TILE_GRID
+    grid = (np.arange(TILE_GRID) + 0.5) * step
+    rgba = np.zeros((TILE_GRID, TILE_GRID, 4), dtype=np.uint8)
+
+    if len(values):
+        px, py = project(lats, lons, zoom)
+        interpolated, nearest = interpolate(
+            px - x * TILE_SIZE, py - y * TILE_SIZE, values, weights,
+            grid, grid, TILE_RADIUS_PX
+        )
+        rgba = colorize(interpolated, nearest, gas, TILE_RADIUS_PX)
+
+    factor = TILE_SIZE // TILE_GRID
+    rgba = np.repeat(np.repeat(rgba, factor, axis=0), factor, axis=1)
+    return encode_png(rgba)
+
+
+#-----------------------------------
+#   CACHÉ EN DISCO
+#   {TILE_CACHE_DIR}/{gas}/{fecha}/{versión}/{z}/{x}/{y}.png
+#-----------------------------------
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def live_version(now: float = None) -> str:
+    """
+    @brief Versión de los datos de un rango que sigue recibiendo mediciones.
+    Cambia una vez por TILE_LIVE_BUCKET y no con cada medición, para que las
+    teselas de hoy se reutilicen entre peticiones.
+    """
+    now = time.time() if now is None else now
+    return f"t{int(now) // TILE_LIVE_BUCKET}"
+
+
+def tile_cache_path(gas: str, date_key: str, version: str, zoom: int, x: int, y: int) -> str:
+    # El gas en minúsculas: "O3" y "o3" son la misma tesela
+    return os.path.join(TILE_CACHE_DIR, gas.lower(), date_key, version, str(zoom), str(x), f"{y}.png")
+
+
+def version_key(version: str) -> tuple:
+    """
+    @brief Orden de las versiones de un mismo gas y fecha, de la más antigua a
+    la más reciente: "0" (sin datos), las de un rango en curso ("t<tramo>",
+    por tramo) y las de un rango cerrado ("<total>-<última fecha>", por última
+    fecha y total). Un nombre desconocido va antes que todas.
+    """
+    if version == "0":
+        return (0,)
+    if version.startswith("t") and version[1:].isdigit():
+        return (1, int(version[1:]))
+    total, _, ultima = version.partition("-")
+    if total.isdigit() and ultima.isdigit():
+        return (2, ultima, int(total))
+    return (-1,)
+
+
+def read_cached_tile(path: str):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cached_tile(path: str, data: bytes):
+    """
+    @brief Guarda una tesela de forma atómica. Las versiones anteriores no se
+    borran aquí (otra petición puede estar escribiendo en ellas): lo hace
+    prune_tile_cache(), que se lanza en segundo plano como mucho una vez por
+    TILE_CACHE_PRUNE_INTERVAL. Los errores de disco no impiden servir la tesela.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    _schedule_prune()
+
+
+def _schedule_prune():
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < TILE_CACHE_PRUNE_INTERVAL or not _prune_lock.acquire(blocking=False):
+        return
+    _last_prune = now
+
+    def run():
+        try:
+            prune_tile_cache()
+        except Exception:
+            logger.exception("Error al limpiar la caché de teselas")
+        finally:
+            _prune_lock.release()
+
+    threading.Thread(target=run, name="tile-cache-prune", daemon=True).start()
+
+
+def prune_tile_cache(root: str = None, max_bytes: int = TILE_CACHE_MAX_BYTES,
+                     max_age: float = TILE_CACHE_MAX_AGE, now: float = None) -> dict:
+    """
+    @brief Acota la caché de teselas en disco.
+
+    1. De cada gas y fecha solo se conserva la versión más reciente según
+       version_key(); las anteriores ya no se van a servir.
+    2. Se borran las teselas con más de `max_age` segundos.
+    3. Si aún se pasa de `max_bytes`, se borran las más antiguas hasta bajar
+       del límite.
+
+    @param root Carpeta de la caché (por defecto TILE_CACHE_DIR).
+    @param max_bytes Tamaño máximo total de las teselas.
+    @param max_age Antigüedad máxima de una tesela, en segundos.
+    @param now Instante de referencia (para tests).
+    @return dict con las teselas borradas por antigüedad o tamaño y los bytes que quedan.
+    """
+    root = TILE_CACHE_DIR if root is None else root
+    now = time.time() if now is None else now
+    removed = 0
+    if not os.path.isdir(root):
+        return {"removed": 0, "bytes": 0}
+
+    for gas in os.listdir(root):
+        gas_dir = os.path.join(root, gas)
+        if not os.path.isdir(gas_dir):
+            continue
+        for date_key in os.listdir(gas_dir):
+            date_dir = os.path.join(gas_dir, date_key)
+            try:
+                versions = sorted(
+                    (entry for entry in os.scandir(date_dir) if entry.is_dir()),
+                    key=lambda entry: version_key(entry.name)
+                )
+            except OSError:
+                continue
+            for old in versions[:-1]:
+                shutil.rmtree(old.path, ignore_errors=True)
+
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if mtime >= now - max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except OSError:
+            pass
+
+    # Carpetas que han quedado vacías, de las hojas hacia arriba
+    for dirpath, _, _ in os.walk(root, topdown=False):
+        if dirpath != root:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+
+    return {"removed": removed, "bytes": total}
@@ -8,49 +8,44 @@
 #   Descripción: Funciones de la lógica de negocio que manejan los recorridos
 #-----------------------------------
 
-from .db import get_connection
+from .db import connection
 from datetime import datetime
 import json
 
 
-def create_track(user_id: int):
+def create_track(user_id: int, conn=None):
     """
     @brief Crea un nuevo recorrido asociado a un usuario existente.
-    
+
     @param user_id ID del usuario al que pertenece el recorrido.
-    
+    @param conn Conexión opcional a la base de datos.
+
     @return Diccionario con:
         - id: ID del recorrido creado (si procede).
         - message: Mensaje de confirmación o error.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT 1 FROM USUARIOS WHERE ID = %s", (user_id,))
-    user_exists = cursor.fetchone()
-
-    if user_exists is None:
-        cursor.close()
-        conn.close()
-        return {
-            "id": None,
-            "message": "User not found"
-        }
-
-    query = """
-        INSERT INTO RECORRIDOS (
-            USER_ID
-        )
-        VALUES (%s)
-    """
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        # La sesión no basta: un administrador puede pedirlo para cualquier ID
+        # y la revocación al borrar un usuario no llega a los demás procesos
+        cursor.execute("SELECT 1 FROM USUARIOS WHERE ID = %s", (user_id,))
+        user_exists = cursor.fetchone()
 
-    cursor.execute(query, (user_id,))
-    conn.commit()
+        if user_exists is None:
+            return {
+                "id": None,
+                "message": "User not found"
+            }
 
-    new_id = cursor.lastrowid
+        query = """
+            INSERT INTO RECORRIDOS (
+                USER_ID
+            )
+            VALUES (%s)
+        """
 
-    cursor.close()
-    conn.close()
+        cursor.execute(query, (user_id,))
+
+        new_id = cursor.lastrowid
 
     return {
         "id": new_id,
@@ -58,28 +53,23 @@ def create_track(user_id: int):
     }
 
 
-def delete_track(track_id: int):
+def delete_track(track_id: int, conn=None):
     """
     @brief Elimina un recorrido existente de la base de datos.
-    
+
     @param track_id ID del recorrido a eliminar.
-    
+    @param conn Conexión opcional a la base de datos.
+
     @return Diccionario indicando:
         - deleted: Número de filas eliminadas (0 o 1).
         - message: Mensaje indicando si se eliminó correctamente o no se encontró.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        query = "DELETE FROM RECORRIDOS WHERE ID = %s"
 
-    query = "DELETE FROM RECORRIDOS WHERE ID = %s"
+        cursor.execute(query, (track_id,))
 
-    cursor.execute(query, (track_id,))
-    conn.commit()
-
-    deleted = cursor.rowcount
-
-    cursor.close()
-    conn.close()
+        deleted = cursor.rowcount
 
     return {
         "deleted": deleted,
@@ -87,51 +77,43 @@ def delete_track(track_id: int):
     }
 
 
-def create_punto_recorrido(recorrido_id: int, location):
+def create_punto_recorrido(recorrido_id: int, location, conn=None):
     """
     @brief Crea un nuevo punto asociado a un recorrido.
-    
+
     @param recorrido_id ID del recorrido al que pertenece el punto.
     @param location Ubicación en formato GeoJSON (GeoJSONPoint Pydantic object).
-    
+    @param conn Conexión opcional a la base de datos.
+
     @return Diccionario con:
         - recorrido_id: ID del recorrido asociado
         - location: GeoJSON insertado
         - time: Hora local de inserción
         - message: Mensaje de confirmación o error
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-
-    cursor.execute("SELECT 1 FROM RECORRIDOS WHERE ID = %s", (recorrido_id,))
-    recorrido_exists = cursor.fetchone()
-
-    if recorrido_exists is None:
-        cursor.close()
-        conn.close()
-        return {
-            "message": "Track not found"
-        }
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT 1 FROM RECORRIDOS WHERE ID = %s", (recorrido_id,))
+        recorrido_exists = cursor.fetchone()
 
-    query = """
-        INSERT INTO PUNTOS_RECORRIDO (
-            RECORRIDO_ID,
-            LOCATION,
-            TIME
-        )
-        VALUES (%s, %s, %s)
-    """
+        if recorrido_exists is None:
+            return {
+                "message": "Track not found"
+            }
 
-    now = datetime.now()
+        query = """
+            INSERT INTO PUNTOS_RECORRIDO (
+                RECORRIDO_ID,
+                LOCATION,
+                TIME
+            )
+            VALUES (%s, %s, %s)
+        """
 
-    location_json = json.dumps(location.dict())
+        now = datetime.now()
 
-    cursor.execute(query, (recorrido_id, location_json, now))
-    conn.commit()
+        location_json = json.dumps(location.dict())
 
-    cursor.close()
-    conn.close()
+        cursor.execute(query, (recorrido_id, location_json, now))
 
     return {
         "recorrido_id": recorrido_id,
@@ -141,57 +123,48 @@ def create_punto_recorrido(recorrido_id: int, location):
     }
 
 
-def get_recorridos_by_user(user_id: int):
+def get_recorridos_by_user(user_id: int, conn=None):
     """
     @brief Obtiene todos los recorridos asociados a un usuario.
-    
+
     @param user_id ID del usuario.
-    
+    @param conn Conexión opcional a la base de datos.
+
     @return Lista de diccionarios con los recorridos del usuario.
             Cada diccionario contiene:
             - id: ID del recorrido
             - user_id: ID del usuario propietario
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    query = "SELECT * FROM RECORRIDOS WHERE USER_ID = %s"
-    cursor.execute(query, (user_id,))
-    recorridos = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        query = "SELECT * FROM RECORRIDOS WHERE USER_ID = %s"
+        cursor.execute(query, (user_id,))
+        recorridos = cursor.fetchall()
 
     return recorridos
 
 
-def get_puntos_recorrido(recorrido_id: int):
+def get_puntos_recorrido(recorrido_id: int, conn=None):
     """
     @brief Obtiene todos los puntos asociados a un recorrido específico.
-    
+
     @param recorrido_id ID del recorrido.
-    
+    @param conn Conexión opcional a la base de datos.
+
     @return Lista de diccionarios con cada punto:
             - location: GeoJSON (dict)
             - time: datetime
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT 1 FROM RECORRIDOS WHERE ID = %s", (recorrido_id,))
-    recorrido_exists = cursor.fetchone()
-    if not recorrido_exists:
-        cursor.close()
-        conn.close()
-        return {"message": "Track not found"}
-
-
-    cursor.execute(
-        "SELECT LOCATION, TIME FROM PUNTOS_RECORRIDO WHERE RECORRIDO_ID = %s ORDER BY TIME ASC",
-        (recorrido_id,)
-    )
-    puntos = cursor.fetchall()
-
+    with connection(conn) as conn, conn.cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT 1 FROM RECORRIDOS WHERE ID = %s", (recorrido_id,))
+        recorrido_exists = cursor.fetchone()
+        if not recorrido_exists:
+            return {"message": "Track not found"}
+
+        cursor.execute(
+            "SELECT LOCATION, TIME FROM PUNTOS_RECORRIDO WHERE RECORRIDO_ID = %s ORDER BY TIME ASC",
+            (recorrido_id,)
+        )
+        puntos = cursor.fetchall()
 
     for punto in puntos:
         try:
@@ -200,7 +173,4 @@ def get_puntos_recorrido(recorrido_id: int):
             punto["location"] = None
         del punto["LOCATION"]
 
-    cursor.close()
-    conn.close()
-
-    return puntos
\ No newline at end of file
+    return puntos
@@ -12,38 +12,51 @@ import random
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from dataclasses import dataclass
-import bcrypt
 import json
 import base64
 
 from .db import get_connection
+from .pagination import page_limit, decode_cursor, split_page
 from .email_utils import send_confirmation_email
+from .password_hasher import password_hasher
+from .sessions import Session, session_manager, authorize, SESSION_COOKIE
 
 
 #-----------------------------------
-#   Obtiene a todos los usuarios de la base de datos
-#   get_all_users() -> Json: usuarios | Error
+#   Obtiene una página de usuarios de la base de datos, ordenados por ID
+#   int: limit, String: after -> get_all_users() -> Json: usuarios, siguiente | Error
 #-----------------------------------
-def get_all_users():
-    conn = None
+def get_all_users(conn=None, limit: int = None, after: str = None):
+    limit = page_limit(limit)
+    last_id = decode_cursor("users", after, 1)[0] if after else 0
+
+    close_conn = False
     try:
-        conn = get_connection()
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute("SELECT ID, USERNAME, EMAIL, PROFILE_PICTURE, REGISTER_DATE, LAST_LOGIN FROM USUARIOS")
-            users = cursor.fetchall()
+            cursor.execute(
+                "SELECT ID, USERNAME, EMAIL, PROFILE_PICTURE, REGISTER_DATE, LAST_LOGIN FROM USUARIOS "
+                "WHERE ID > %s ORDER BY ID LIMIT %s",
+                (last_id, limit + 1)
+            )
+            users, siguiente = split_page(cursor.fetchall(), limit, "users", lambda u: (u["ID"],))
 
         return {
             "status": "ok",
-            "usuarios": users
+            "usuarios": users,
+            "siguiente": siguiente
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener los usuarios: {e}")
 
     finally:
-        if conn:
+        if close_conn and conn:
             conn.close()
     
 
@@ -51,9 +64,12 @@ def get_all_users():
 #   Inserta un nuevo usuario en la base de datos
 #   String: username, String: email, String: pass -> insert_user() -> 200 OK | Error
 #-----------------------------------
-def insert_user(username: str, email: str, password: str, conn=None):
+def insert_user(username: str, email: str, password: str, conn=None, hashed_password: Optional[str] = None):
     close_conn = False
     user_id = None
+    # Antes de tomar la conexión, para no tenerla prestada mientras se calcula
+    if hashed_password is None:
+        hashed_password = password_hasher.hash(password)
     try:
         if conn is None:
             conn = get_connection()
@@ -68,7 +84,6 @@ def insert_user(username: str, email: str, password: str, conn=None):
                 raise HTTPException(status_code=400, detail="El usuario o el correo ya existen")
 
             today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
             cursor.execute(
                 "INSERT INTO USUARIOS (USERNAME, EMAIL, PASSWORD, REGISTER_DATE, LAST_LOGIN) VALUES (%s, %s, %s, %s, %s)",
@@ -95,10 +110,14 @@ def insert_user(username: str, email: str, password: str, conn=None):
 #   Añade a la base de datos un usuario provisional y le envia el correo de verificacion
 #   String: email, String: usernames, String: pass -> register_request() -> 200 OK | HTTP Error
 #-----------------------------------
-def register_request(email: str, username: str, password: str):
-    conn = None
+def register_request(email: str, username: str, password: str, conn=None, hashed_password: Optional[str] = None):
+    close_conn = False
+    if hashed_password is None:
+        hashed_password = password_hasher.hash(password)
     try:
-        conn = get_connection()
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         with conn.cursor(dictionary=True) as cursor:
             cursor.execute(
@@ -121,7 +140,6 @@ def register_request(email: str, username: str, password: str):
                     (email,)
                 )
 
-            hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
             code = str(random.randint(100000, 999999))
             expires = datetime.now() + timedelta(minutes=20)
 
@@ -130,7 +148,8 @@ def register_request(email: str, username: str, password: str):
                 (email, username, hashed_password, code, expires)
             )
 
-        conn.commit()
+        if close_conn:
+            conn.commit()
 
         send_confirmation_email(email, code)
 
@@ -145,7 +164,7 @@ def register_request(email: str, username: str, password: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al procesar registro: {e}")
     finally:
-        if conn:
+        if close_conn and conn:
             conn.close()
 
             
@@ -153,10 +172,12 @@ def register_request(email: str, username: str, password: str):
 #   Añade a la base de datos un usuario si el codigo de verificacion es correcto
 #   String: email, R: code -> register_verify() -> 200 OK | HTTP Error
 #-----------------------------------
-def register_verify(email: str, code: int):
-    conn = None
+def register_verify(email: str, code: int, conn=None):
+    close_conn = False
     try:
-        conn = get_connection()
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         with conn.cursor(dictionary=True) as cursor:
             cursor.execute(
@@ -172,6 +193,7 @@ def register_verify(email: str, code: int):
                 raise HTTPException(status_code=400, detail="El código es incorrecto")
 
             if datetime.now() > row["EXPIRES"]:
+                # El borrado del código caducado se confirma aunque la petición falle
                 cursor.execute("DELETE FROM CODIGOS WHERE EMAIL = %s", (email,))
                 conn.commit()
                 raise HTTPException(status_code=400, detail="El código ha expirado")
@@ -190,7 +212,8 @@ def register_verify(email: str, code: int):
 
             cursor.execute("DELETE FROM CODIGOS WHERE EMAIL = %s", (email,))
 
-        conn.commit()
+        if close_conn:
+            conn.commit()
 
         return {
             "status": "ok",
@@ -208,16 +231,16 @@ def register_verify(email: str, code: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al verificar el código: {e}")
     finally:
-        if conn:
+        if close_conn and conn:
             conn.close()
 
 
         
 #-----------------------------------
-#   Autentifica al usuario usando el correo o el nombre de usuario y la contraseña
-#   String: user_or_email, String: pass -> login_user() -> JSON: user | HTTP Error
+#   Busca al usuario que intenta iniciar sesión, con su hash de contraseña
+#   String: user_or_email -> _find_login_user() -> dict: fila de USUARIOS | HTTP Error
 #-----------------------------------
-def login_user(username_or_email: str, password: str, response: Response, conn=None):
+def _find_login_user(username_or_email: str, conn=None):
     close_conn = False
     try:
         if conn is None:
@@ -232,20 +255,33 @@ def login_user(username_or_email: str, password: str, response: Response, conn=N
             )
             row = cursor.fetchone()
 
-        if not row:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+    finally:
+        if close_conn and conn:
+            conn.close()
 
-        user_id = row["ID"]
-        username = row["USERNAME"]
-        email = row["EMAIL"]
-        stored_hash = row["PASSWORD"]
-        registration_date = row["REGISTER_DATE"].strftime("%Y-%m-%d %H:%M:%S")
-        is_admin = row["ADMINISTRATOR"]
-        
-        if not bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
-            raise HTTPException(status_code=401, detail="Contraseña incorrecta")
-        
-        role = "Administrador" if is_admin else "Usuario"
+    if not row:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return row
+
+#-----------------------------------
+#   Registra el inicio de sesión de un usuario ya autenticado y crea sus cookies
+#   dict: fila de USUARIOS, Response -> _finish_login() -> JSON: user | HTTP Error
+#-----------------------------------
+def _finish_login(row: dict, response: Response, conn=None):
+    close_conn = False
+    user_id = row["ID"]
+    username = row["USERNAME"]
+    email = row["EMAIL"]
+    registration_date = row["REGISTER_DATE"].strftime("%Y-%m-%d %H:%M:%S")
+    is_admin = row["ADMINISTRATOR"]
+    role = "Administrador" if is_admin else "Usuario"
+
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
 
         today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with conn.cursor() as cursor:
@@ -254,43 +290,76 @@ def login_user(username_or_email: str, password: str, response: Response, conn=N
         if close_conn:
             conn.commit()
 
-        cookie_data = {
-            "id": user_id,
-            "username": username,
-            "email": email,
-            "registration_date": registration_date,
-            "role": role
-        }
-        
-        cookie_json = json.dumps(cookie_data)
-        cookie_base64 = base64.b64encode(cookie_json.encode()).decode()
-
-        response.set_cookie(
-            key="user_data",
-            value=cookie_base64,
-            httponly=False,
-            secure=False,
-            samesite="Lax",
-            max_age=60*60*24
-        )
-
-    except HTTPException:
-        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Error en la base de datos")
     finally:
         if close_conn and conn:
             conn.close()
 
-    return {"status": "ok", "mensaje": "Inicio de sesión exitoso",
+    cookie_data = {
+        "id": user_id,
+        "username": username,
+        "email": email,
+        "registration_date": registration_date,
+        "role": role
+    }
+
+    cookie_json = json.dumps(cookie_data)
+    cookie_base64 = base64.b64encode(cookie_json.encode()).decode()
+
+    response.set_cookie(
+        key="user_data",
+        value=cookie_base64,
+        httponly=False,
+        secure=False,
+        samesite="Lax",
+        max_age=60*60*24
+    )
+
+    # Token firmado que identifica al usuario en el resto de endpoints
+    token = session_manager.issue(user_id, is_admin)
+    response.set_cookie(
+        key=SESSION_COOKIE,
+        value=token,
+        httponly=True,
+        secure=False,
+        samesite="Lax",
+        max_age=session_manager.ttl
+    )
+
+    return {"status": "ok", "mensaje": "Inicio de sesión exitoso", "token": token,
             "usuario": {"id": user_id, "username": username, "email": email, "registration_date": registration_date, "role": role}}
 
+#-----------------------------------
+#   Autentifica al usuario usando el correo o el nombre de usuario y la contraseña
+#   String: user_or_email, String: pass -> login_user() -> JSON: user | HTTP Error
+#-----------------------------------
+def login_user(username_or_email: str, password: str, response: Response, conn=None):
+    row = _find_login_user(username_or_email, conn=conn)
+    if not password_hasher.check(password, row["PASSWORD"]):
+        raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+    return _finish_login(row, response, conn=conn)
+
+#-----------------------------------
+#   Igual que login_user(), para endpoints asíncronos: bcrypt se espera sin
+#   ocupar un hilo y sin tener ninguna conexión del pool prestada
+#   String: user_or_email, String: pass -> login_user_async() -> JSON: user | HTTP Error
+#-----------------------------------
+async def login_user_async(username_or_email: str, password: str, response: Response):
+    row = await run_in_threadpool(_find_login_user, username_or_email)
+    if not await password_hasher.check_async(password, row["PASSWORD"]):
+        raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+    return await run_in_threadpool(_finish_login, row, response)
+
 #-----------------------------------
 #   Edita el usuario en la base de datos
 #   String: username, String: email, String: pass, String: profilePicture -> update_user() -> JSON: user | HTTP Error
 #-----------------------------------
-def update_user(username: str, email: str, password: Optional[str] = None, profilePicture: Optional[str] = None, conn=None):
+def update_user(username: str, email: str, password: Optional[str] = None, profilePicture: Optional[str] = None, conn=None,
+                hashed_password: Optional[str] = None, session: Optional[Session] = None):
     close_conn = False
+    if password and hashed_password is None:
+        hashed_password = password_hasher.hash(password)
     try:
         if conn is None:
             conn = get_connection()
@@ -298,9 +367,14 @@ def update_user(username: str, email: str, password: Optional[str] = None, profi
 
         with conn.cursor(dictionary=True) as cursor:
             cursor.execute("SELECT ID FROM USUARIOS WHERE USERNAME = %s OR EMAIL = %s", (username, email))
-            user = cursor.fetchone()
-            if not user:
+            users = cursor.fetchall()
+            if not users:
                 raise HTTPException(status_code=404, detail="Usuario no encontrado")
+            # Con sesión (endpoints), solo se modifica la cuenta propia, salvo un administrador
+            if session is not None:
+                for row in users:
+                    authorize(session, row["ID"])
+            user = users[0]
 
             user_id = user["ID"]
             updates, values = [], []
@@ -312,7 +386,6 @@ def update_user(username: str, email: str, password: Optional[str] = None, profi
                 updates.append("EMAIL = %s")
                 values.append(email)
             if password:
-                hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
                 updates.append("PASSWORD = %s")
                 values.append(hashed_password)
             if profilePicture:
@@ -346,7 +419,8 @@ def update_user(username: str, email: str, password: Optional[str] = None, profi
 #   Elimina un usuario de la BBDD
 #   R: user_id, String: username, String: email -> delete_user() -> 200 OK | HTTP Error
 #-----------------------------------
-def delete_user(user_id: int = None, username: str = None, email: str = None, conn=None):
+def delete_user(user_id: int = None, username: str = None, email: str = None, conn=None,
+                session: Optional[Session] = None):
     if user_id is None and username is None and email is None:
         raise HTTPException(status_code=400, detail="Debe proporcionar al menos un parámetro para eliminar al usuario")
 
@@ -371,11 +445,20 @@ def delete_user(user_id: int = None, username: str = None, email: str = None, co
             where_clause = " OR ".join(conditions)
 
             cursor.execute(f"SELECT ID, USERNAME, EMAIL FROM USUARIOS WHERE {where_clause}", tuple(values))
-            user = cursor.fetchone()
-            if not user:
+            users = cursor.fetchall()
+            if not users:
                 raise HTTPException(status_code=404, detail="Usuario no encontrado")
+            # Los criterios van con OR: cada cuenta que coincida debe ser la propia
+            if session is not None:
+                for row in users:
+                    authorize(session, row["ID"])
+            user = users[0]
+
+            ids = [row["ID"] for row in users]
+            cursor.execute(f"DELETE FROM USUARIOS WHERE ID IN ({','.join(['%s'] * len(ids))})", tuple(ids))
 
-            cursor.execute(f"DELETE FROM USUARIOS WHERE {where_clause}", tuple(values))
+        for deleted_id in ids:
+            session_manager.revoke_user(deleted_id)
 
         if close_conn:
             conn.commit()
@@ -0,0 +1,9 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 01_idx_mediciones_gas_date.sql
+--   Descripción: Índice compuesto para las consultas del mapa, que filtran
+--   por tipo de gas y por un rango de fechas [desde, hasta)
+-- -----------------------------------
+
+CREATE INDEX IDX_MEDICIONES_GAS_DATE ON MEDICIONES (GAS_TYPE, DATE);
@@ -0,0 +1,22 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 02_mediciones_horarias.sql
+--   Descripción: Resumen horario de MEDICIONES por sensor y gas. Se mantiene
+--   al insertar cada medición y se rellena con:
+--       python -m backend.app.rollups --desde YYYY-MM-DD
+-- -----------------------------------
+
+CREATE TABLE IF NOT EXISTS MEDICIONES_HORARIAS (
+    ASSOCIATED_UUID VARCHAR(255) NOT NULL,
+    GAS_TYPE VARCHAR(32) NOT NULL,
+    HOUR_START DATETIME NOT NULL,
+    READINGS_COUNT INT NOT NULL,
+    VALUE_SUM DOUBLE NOT NULL,
+    VALUE_MIN DOUBLE NOT NULL,
+    VALUE_MAX DOUBLE NOT NULL,
+    LAST_DATE DATETIME NOT NULL,
+    LAST_POSITION VARCHAR(255) NULL,
+    PRIMARY KEY (ASSOCIATED_UUID, GAS_TYPE, HOUR_START),
+    INDEX IDX_MEDICIONES_HORARIAS_GAS_HOUR (GAS_TYPE, HOUR_START)
+);
@@ -0,0 +1,42 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 03_mediciones_lat_lon.sql
+--   Descripción: Latitud y longitud de cada medición en columnas propias,
+--   extraídas del GeoJSON de POSITION, para poder filtrar por área visible.
+--
+--   No se usa un índice SPATIAL: exige una columna POINT NOT NULL (hay
+--   mediciones sin posición) y no se combina con el filtro por gas y rango
+--   de fechas, que es el que más descarta. El índice compuesto permite
+--   comprobar el rectángulo sobre el propio índice dentro del rango de fechas.
+-- -----------------------------------
+
+ALTER TABLE MEDICIONES
+    ADD COLUMN LATITUDE DECIMAL(9, 6) NULL,
+    ADD COLUMN LONGITUDE DECIMAL(9, 6) NULL;
+
+-- Conversión de las mediciones existentes; las posiciones que no son un
+-- GeoJSON Point válido se quedan a NULL. Se puede relanzar sin efecto.
+-- Los CASE anidados garantizan que solo se convierten coordenadas numéricas
+-- (con sql_mode estricto, un CAST fallido en un UPDATE es un error).
+-- LONGITUDE se asigna después de LATITUDE y reutiliza su resultado.
+UPDATE MEDICIONES
+SET LATITUDE = CASE
+        WHEN JSON_TYPE(JSON_EXTRACT(POSITION, '$.coordinates[1]')) IN ('INTEGER', 'UNSIGNED INTEGER', 'DOUBLE', 'DECIMAL')
+         AND JSON_TYPE(JSON_EXTRACT(POSITION, '$.coordinates[0]')) IN ('INTEGER', 'UNSIGNED INTEGER', 'DOUBLE', 'DECIMAL')
+        THEN CASE
+            WHEN CAST(JSON_EXTRACT(POSITION, '$.coordinates[1]') AS DECIMAL(12, 6)) BETWEEN -90 AND 90
+             AND CAST(JSON_EXTRACT(POSITION, '$.coordinates[0]') AS DECIMAL(12, 6)) BETWEEN -180 AND 180
+            THEN CAST(JSON_EXTRACT(POSITION, '$.coordinates[1]') AS DECIMAL(9, 6))
+        END
+    END,
+    LONGITUDE = CASE
+        WHEN LATITUDE IS NOT NULL
+        THEN CAST(JSON_EXTRACT(POSITION, '$.coordinates[0]') AS DECIMAL(9, 6))
+    END
+WHERE LATITUDE IS NULL AND JSON_VALID(POSITION);
+
+CREATE INDEX IDX_MEDICIONES_GAS_DATE_LAT_LON ON MEDICIONES (GAS_TYPE, DATE, LATITUDE, LONGITUDE);
+
+-- El índice (GAS_TYPE, DATE) de 01 es prefijo del nuevo y sobra
+DROP INDEX IDX_MEDICIONES_GAS_DATE ON MEDICIONES;
@@ -0,0 +1,11 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 04_idx_mediciones_uuid_date.sql
+--   Descripción: Índice compuesto para las últimas mediciones de cada sensor
+--   (get_user_sensors), que se numeran por sensor de la más reciente a la
+--   más antigua. Con él la consulta recorre el índice ya ordenado en lugar
+--   de ordenar todas las mediciones del usuario
+-- -----------------------------------
+
+CREATE INDEX IDX_MEDICIONES_UUID_DATE ON MEDICIONES (ASSOCIATED_UUID, DATE);
@@ -0,0 +1,11 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 05_idx_sensores_last_active.sql
+--   Descripción: Índice para el listado de sensores del panel de
+--   administración, que filtra por inactividad (LAST_ACTIVE <= fecha) y
+--   pagina en orden (LAST_ACTIVE, UUID). También sirve para contar los
+--   sensores de cada ventana de inactividad sin leer la tabla
+-- -----------------------------------
+
+CREATE INDEX IDX_SENSORES_LAST_ACTIVE ON SENSORES (LAST_ACTIVE, UUID);
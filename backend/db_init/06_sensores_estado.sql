@@ -0,0 +1,39 @@
+-- -----------------------------------
+--   © 2026 OxiGo. Todos los derechos reservados.
+-- -----------------------------------
+--   Fichero: 06_sensores_estado.sql
+--   Descripción: Estado de actividad de los sensores que calcula el barrido
+--   en segundo plano (sensor_sweeper.py).
+--
+--   SENSORES_ESTADO solo guarda los sensores que no están activos (STALE o
+--   DEAD), así que es pequeña; un sensor que no aparece está activo.
+--   SENSORES_EVENTOS guarda cada cambio de estado y si ya se avisó por correo.
+--   SENSORES_BARRIDO guarda hasta dónde (LAST_ACTIVE, UUID) llegó el barrido
+--   de cada umbral, para que cada pasada solo lea los sensores nuevos.
+-- -----------------------------------
+
+CREATE TABLE IF NOT EXISTS SENSORES_ESTADO (
+    UUID VARCHAR(255) NOT NULL PRIMARY KEY,
+    STATE VARCHAR(16) NOT NULL,
+    LAST_ACTIVE DATETIME NOT NULL,
+    SINCE DATETIME NOT NULL,
+    INDEX IDX_SENSORES_ESTADO_STATE (STATE, LAST_ACTIVE, UUID)
+);
+
+CREATE TABLE IF NOT EXISTS SENSORES_EVENTOS (
+    ID BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    UUID VARCHAR(255) NOT NULL,
+    OLD_STATE VARCHAR(16) NOT NULL,
+    NEW_STATE VARCHAR(16) NOT NULL,
+    LAST_ACTIVE DATETIME NOT NULL,
+    CREATED_AT DATETIME NOT NULL,
+    -- 0 pendiente de avisar, 1 avisado, 2 sin aviso (o el envío falló)
+    NOTIFIED TINYINT NOT NULL DEFAULT 2,
+    INDEX IDX_SENSORES_EVENTOS_NOTIFIED (NOTIFIED, ID)
+);
+
+CREATE TABLE IF NOT EXISTS SENSORES_BARRIDO (
+    NAME VARCHAR(16) NOT NULL PRIMARY KEY,
+    HIGH_WATER DATETIME NOT NULL,
+    HIGH_WATER_UUID VARCHAR(255) NOT NULL
+);
@@ -3,14 +3,6 @@
  * @brief Funciones para recibir datos y generar el mapa
  */
 
-const OFFICIAL_STATIONS = [
-    { name: "Prat de Cabanes", lat: 40.136944, lon: 0.165556 },
-    { name: "Aras de los Olmos", lat: 39.950278, lon: -1.108889 },
-    { name: "Valencia", lat: 39.472222, lon: -0.422500 },
-    { name: "Denia", lat: 38.821944, lon: 0.035833 },
-    { name: "Torrevieja", lat: 38.008333, lon: -0.658611 }
-];
-
 let mapInstance = null;
 let heatLayer = null;
 let officialLayer = null;
@@ -48,75 +40,41 @@ function createMap(lat, lon, zoomFallback = 6) {
 
 /* ================= BACKEND HEATMAP ================= */
 
-async function fetchReadings(dateStr, gasType) {
+async function fetchReadings(dateStr) {
 
-    if (gasType !== "general") {
-        const response = await fetch(`/v1/data/map_readings`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ datetime: dateStr, gasType })
-        });
+    // MODO GENERAL: una sola petición con todos los gases, ya agrupados por posición
+    // (con un gas concreto el mapa se pinta con teselas del servidor, ver addTileLayer)
+    const gases = ["o3", "no2", "so2", "co"];
 
-        if (!response.ok) throw new Error("HTTP " + response.status);
-        const data = await response.json();
-        return data.mediciones || [];
-    }
+    const resp = await fetch(`/v1/data/map_readings/multi`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ datetime: dateStr, gasTypes: gases })
+    });
 
-    // MODO GENERAL: pedir todos los gases por separado
-    const gases = ["o3", "no2", "so2", "co"];
-    const results = {};
+    if (!resp.ok) return [];
 
-    for (const g of gases) {
-        const resp = await fetch(`/v1/data/map_readings`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ datetime: dateStr, gasType: g })
-        });
-
-        if (!resp.ok) continue;
-
-        const json = await resp.json();
-        for (const m of (json.mediciones || [])) {
-            // usamos la posición como clave
-            if (!results[m.POSITION]) results[m.POSITION] = {};
-            results[m.POSITION][g] = m.GAS_VALUE;
-        }
-    }
+    const json = await resp.json();
 
-    // Convertimos a estructura unificada
-    return Object.entries(results).map(([pos, vals]) => ({
-        POSITION: pos,
-        o3: vals.o3 || 0,
-        no2: vals.no2 || 0,
-        so2: vals.so2 || 0,
-        co: vals.co || 0
+    return (json.posiciones || []).map(p => ({
+        POSITION: p.POSITION,
+        o3: p.o3 || 0,
+        no2: p.no2 || 0,
+        so2: p.so2 || 0,
+        co: p.co || 0
     }));
 }
 
 
-/* ================= OPEN-METEO (igual que Java) ================= */
+/* ================= ESTACIONES OFICIALES (proxy del backend) ================= */
 
-async function fetchOfficialStationData(st) {
-    const url =
-        `https://air-quality-api.open-meteo.com/v1/air-quality` +
-        `?latitude=${st.lat}&longitude=${st.lon}` +
-        `&current=nitrogen_dioxide,ozone,sulphur_dioxide,carbon_monoxide`;
-
-    const resp = await fetch(url);
-    if (!resp.ok) throw new Error("Open-Meteo error");
+async function fetchOfficialStations() {
+    // El backend consulta Open-Meteo en paralelo y guarda el resultado en caché
+    const resp = await fetch(`/v1/data/official_stations`);
+    if (!resp.ok) throw new Error("Error al obtener las estaciones oficiales");
 
     const json = await resp.json();
-    if (!json.current) return null;
-
-    return {
-        name: st.name,
-        lat: st.lat,
-        lon: st.lon,
-        o3: json.current.ozone || 0,
-        no2: json.current.nitrogen_dioxide || 0,
-        so2: json.current.sulphur_dioxide || 0,
-        co: json.current.carbon_monoxide || 0
-    };
+    return json.estaciones || [];
 }
 
 /* ================= COLOR POR GAS ================= */
@@ -133,11 +91,16 @@ function getColorForGasCategory(category) {
 async function loadOfficialStations(map, gasType) {
     officialLayer.clearLayers();
 
-    for (const st of OFFICIAL_STATIONS) {
-        try {
-            const data = await fetchOfficialStationData(st);
-            if (!data) continue;
+    let estaciones;
+    try {
+        estaciones = await fetchOfficialStations();
+    } catch (e) {
+        console.warn("Error estaciones oficiales", e);
+        return;
+    }
 
+    for (const data of estaciones) {
+        try {
             let category;
 
             if (gasType === "general") {
@@ -167,7 +130,7 @@ async function loadOfficialStations(map, gasType) {
                 .addTo(officialLayer);
 
         } catch (e) {
-            console.warn("Error estación", st.name, e);
+            console.warn("Error estación", data.name, e);
         }
     }
 }
@@ -226,6 +189,17 @@ function addHeatmap(map, mediciones, gasType) {
     return layer;
 }
 
+/**
+ * @brief Capa de teselas PNG renderizadas por el backend para un gas y una fecha.
+ * Solo se descargan las teselas visibles y el navegador las guarda en caché.
+ */
+function addTileLayer(map, dateStr, gasType) {
+    return L.tileLayer(`/v1/tiles/${encodeURIComponent(gasType)}/${encodeURIComponent(dateStr)}/{z}/{x}/{y}.png`, {
+        opacity: 0.8,
+        maxZoom: 18
+    }).addTo(map);
+}
+
 function classifyGas(value, gas) {
     const limits = {
         o3: [60, 120],
@@ -301,8 +275,12 @@ async function generateMap({ dateStr, gasType }) {
 
         await loadOfficialStations(mapInstance, gasType);
 
-        const data = await fetchReadings(dateStr, gasType);
-        heatLayer = addHeatmap(mapInstance, data, gasType);
+        if (gasType !== "general") {
+            heatLayer = addTileLayer(mapInstance, dateStr, gasType);
+        } else {
+            const data = await fetchReadings(dateStr);
+            heatLayer = addHeatmap(mapInstance, data, gasType);
+        }
 
         showLegend(mapInstance);
     });
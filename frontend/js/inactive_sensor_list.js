@@ -3,18 +3,35 @@
     ------------------------
     Módulo encargado de:
     - Renderizar tarjetas de sensores
-    - Filtrar por inactividad
-    - Filtrar por UUID
-    - Filtrar por ID de usuario asociado
-    - Ordenar resultados (más antiguo primero)
+    - Filtrar por inactividad, UUID e ID de usuario asociado
+      (los filtros y el orden, más antiguo primero, se aplican en el servidor)
+    - Cargar más resultados por páginas
 */
 
-/** Lista completa de sensores cargados desde el servidor */
-let sensoresCargados = [];
+/** Sensores por página */
+const TAMANO_PAGINA = 200;
 
 /** Valor del filtro de inactividad en días (0 = sin filtro) */
 let filtroDias = 0;
 
+/** Cursor de la página siguiente (null si no hay más) */
+let cursorSiguiente = null;
+
+/** Identificador de la última búsqueda, para descartar respuestas atrasadas */
+let busquedaActual = 0;
+
+/** Temporizador para no buscar en cada pulsación de tecla */
+let temporizadorBusqueda = null;
+
+/** Texto original de los botones de inactividad, por id y días */
+const BOTONES_INACTIVIDAD = {
+    "day-one": { dias: "1", texto: "+1 día" },
+    "week-one": { dias: "7", texto: "+1 semana" },
+    "month-one": { dias: "30", texto: "+1 mes" },
+    "month-six": { dias: "180", texto: "+6 meses" },
+    "show-all": { dias: "todos", texto: "Mostrar todos" }
+};
+
 /* -------------------------------------------------------------------------- */
 /*                               Funciones Utils                              */
 /* -------------------------------------------------------------------------- */
@@ -68,14 +85,15 @@ function TarjetaSensor(sensor) {
 
 /**
  * @brief Renderiza una lista de sensores en pantalla.
- * @param sensors Lista de sensores filtrados o completos.
+ * @param sensors Página de sensores, ya filtrada y ordenada por el servidor.
+ * @param anadir Si es true se añaden a los ya mostrados.
  */
-function renderSensores(sensors) {
+function renderSensores(sensors, anadir = false) {
     const contenedor = document.getElementById("lista-sensores");
-    contenedor.innerHTML = "";
+    if (!anadir) contenedor.innerHTML = "";
 
-    // Ordenar del más antiguo al más reciente
-    sensors.sort((a, b) => new Date(a.LAST_ACTIVE) - new Date(b.LAST_ACTIVE));
+    const botonAnterior = document.getElementById("cargar-mas");
+    if (botonAnterior) botonAnterior.remove();
 
     sensors.forEach(sensor => {
         const card = document.createElement("div");
@@ -83,6 +101,26 @@ function renderSensores(sensors) {
         card.innerHTML += TarjetaSensor(sensor);
         contenedor.appendChild(card);
     });
+
+    if (cursorSiguiente) {
+        const boton = document.createElement("button");
+        boton.id = "cargar-mas";
+        boton.textContent = "Cargar más";
+        boton.addEventListener("click", () => cargarSensores(true));
+        contenedor.appendChild(boton);
+    }
+}
+
+/**
+ * @brief Muestra en cada botón de inactividad cuántos sensores cumplen el filtro.
+ * @param inactividad Recuentos devueltos por el servidor ({"1": n, ..., "todos": n}).
+ */
+function renderRecuentos(inactividad) {
+    if (!inactividad) return;
+    for (const [id, boton] of Object.entries(BOTONES_INACTIVIDAD)) {
+        const elemento = document.getElementById(id);
+        if (elemento) elemento.textContent = `${boton.texto} (${inactividad[boton.dias] ?? 0})`;
+    }
 }
 
 /* -------------------------------------------------------------------------- */
@@ -95,42 +133,16 @@ function renderSensores(sensors) {
  */
 function cambiarFiltroInactividad(dias) {
     filtroDias = dias;
-    aplicarFiltros();
+    cargarSensores();
 }
 
 /**
- * @brief Aplica todos los filtros: UUID, usuario asociado y antigüedad.
- * Renderiza la lista resultante.
+ * @brief Vuelve a pedir los sensores con los filtros actuales (UUID, usuario
+ * asociado y antigüedad). Espera a que se deje de escribir.
  */
 function aplicarFiltros() {
-    const uuidInput = document.getElementById("busqueda-uuid").value.trim();
-    const usuarioInput = document.getElementById("busqueda-usuario").value.trim();
-
-    const ahora = new Date();
-
-    let filtrados = sensoresCargados.filter(sensor => {
-
-        // --- Filtrar por UUID ---
-        if (uuidInput && !String(sensor.UUID).includes(uuidInput)) {
-            return false;
-        }
-
-        // --- Filtrar por ID Usuario asociado (NUMÉRICO) ---
-        if (usuarioInput && !String(sensor.ASSOCIATED_USER).includes(usuarioInput)) {
-            return false;
-        }
-
-        // --- Filtrar por días de inactividad ---
-        if (filtroDias > 0) {
-            const fecha = new Date(sensor.LAST_ACTIVE);
-            const diffDias = Math.floor((ahora - fecha) / (1000 * 60 * 60 * 24));
-            if (diffDias < filtroDias) return false;
-        }
-
-        return true;
-    });
-
-    renderSensores(filtrados);
+    clearTimeout(temporizadorBusqueda);
+    temporizadorBusqueda = setTimeout(() => cargarSensores(), 250);
 }
 
 /* -------------------------------------------------------------------------- */
@@ -138,16 +150,30 @@ function aplicarFiltros() {
 /* -------------------------------------------------------------------------- */
 
 /**
- * @brief Obtiene sensores desde el backend y los almacena para filtrado.
+ * @brief Pide al backend una página de sensores con los filtros actuales.
+ * @param siguientePagina Si es true pide la página siguiente y la añade a la lista.
  */
-async function cargarSensores() {
+async function cargarSensores(siguientePagina = false) {
+    const busqueda = siguientePagina ? busquedaActual : ++busquedaActual;
+
+    const params = new URLSearchParams({ limit: TAMANO_PAGINA });
+    const uuidInput = document.getElementById("busqueda-uuid").value.trim();
+    const usuarioInput = document.getElementById("busqueda-usuario").value.trim();
+    if (filtroDias > 0) params.set("inactive_days", filtroDias);
+    if (uuidInput) params.set("uuid", uuidInput);
+    if (usuarioInput) params.set("user", usuarioInput);
+    if (siguientePagina && cursorSiguiente) params.set("cursor", cursorSiguiente);
+
     try {
-        const response = await fetch("/v1/data/admin/sensors");
+        const response = await fetch("/v1/data/admin/sensors?" + params.toString());
         const data = await response.json();
 
-        sensoresCargados = data.sensors;
+        // Si entretanto ha empezado otra búsqueda, esta respuesta ya no vale
+        if (busqueda !== busquedaActual) return;
 
-        aplicarFiltros(); 
+        cursorSiguiente = data.siguiente;
+        renderRecuentos(data.inactividad);
+        renderSensores(data.sensors, siguientePagina);
 
     } catch (error) {
         console.log("Error al cargar sensores:", error);
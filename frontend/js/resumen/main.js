@@ -2,35 +2,27 @@ document.addEventListener("DOMContentLoaded", () => {
     // Inicializar gráfica vacía con 24 horas
     initChart('medicionesChart');
 
-    // Hacer POST al endpoint para obtener mediciones
-    fetch('/v1/data/today', {
+    // Hacer POST al endpoint del resumen: 24 valores por hora ya agregados en el servidor
+    fetch('/v1/data/summary', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ user_id: getUserId() }) // Cambiar según usuario
+        body: JSON.stringify({ user_id: getUserId(), gasTypes: ["o3"] }) // Cambiar según usuario
     })
     .then(response => response.json())
     .then(data => {
-        if (data && Array.isArray(data.mediciones)) {
-            const hourlyO3 = Array(24).fill(0); // 24 horas
-
-            // Procesar solo O3
-            data.mediciones.forEach(m => {
-                if (m.GAS_TYPE === "O3") {
-                    const date = new Date(m.DATE);
-                    const hour = date.getHours();
-                    hourlyO3[hour] = m.GAS_VALUE;
-                }
-            });
+        if (data && data.resumen && data.resumen.o3) {
+            // Media horaria de O3; las horas sin mediciones cuentan como 0
+            const hourlyO3 = data.resumen.o3.media.map(v => v === null ? 0 : Math.round(v * 100) / 100);
 
             // Actualizar la gráfica
             updateChart(hourlyO3);
             evaluateAirQuality(hourlyO3, 'airQualityText');
 
         } else {
-            console.warn("No se recibieron mediciones del endpoint.");
+            console.warn("No se recibió el resumen del endpoint.");
         }
     })
-    .catch(error => console.error("Error al obtener las mediciones:", error));
+    .catch(error => console.error("Error al obtener el resumen:", error));
 
     // Botón para generar valores ficticios
     setupFictitiousButton('generarFicticios');
@@ -8,7 +8,12 @@
 #   Descripción: Modulo para realizar sentencias SQL teniendo la garantía de poder anularlas al terminar
 #-----------------------------------
 
+import os
 import pytest
+
+# Los tests no necesitan una clave de sesión real (ver sessions._load_secret)
+os.environ.setdefault("SESSION_INSECURE_DEV", "1")
+
 from backend.app.db import get_connection
 
 #-----------------------------------
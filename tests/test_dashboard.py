@@ -0,0 +1,47 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_dashboard.py
+#   Descripción: Módulo que realiza tests de la página de inicio del usuario
+#-----------------------------------
+
+import pytest
+from fastapi import HTTPException
+from backend.app.dashboard_logic import get_user_dashboard
+from backend.app.sensores import bind_sensor_to_user, add_reading
+from backend.app.user_actions import insert_user
+
+#-----------------------------------
+#   Test de página de inicio.
+#   Devuelve sensores, mediciones de hoy y recompensas del usuario
+#-----------------------------------
+
+def test_user_dashboard(db):
+    user = insert_user("dashuser", "dash@example.com", "password", conn=db)["usuario"]
+    bind_sensor_to_user(user["id"], "sensor-dash", conn=db)
+    add_reading("sensor-dash", "O3", 42.0, 21.0, conn=db)
+
+    result = get_user_dashboard(user["id"], conn=db)
+
+    assert result["usuario"]["id"] == user["id"]
+    assert [s["uuid"] for s in result["sensores"]] == ["sensor-dash"]
+    assert [m["GAS_VALUE"] for m in result["mediciones_hoy"]] == [42.0]
+    assert result["rewards"] == []
+
+#-----------------------------------
+#   Test de usuario sin sensores.
+#   Un usuario nuevo recibe las listas vacías; uno inexistente, 404
+#-----------------------------------
+
+def test_user_dashboard_without_sensors(db):
+    user = insert_user("emptyuser", "empty@example.com", "password", conn=db)["usuario"]
+
+    result = get_user_dashboard(user["id"], conn=db)
+    assert result["sensores"] == [] and result["mediciones_hoy"] == []
+
+    with pytest.raises(HTTPException) as error:
+        get_user_dashboard(-1, conn=db)
+    assert error.value.status_code == 404
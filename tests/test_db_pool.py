@@ -0,0 +1,106 @@
+#-----------------------------------
+#   © 2025 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_db_pool.py
+#   Descripción: Módulo que realiza tests del pool de conexiones de db.py
+#   (reutilización, límite de tamaño y reciclado)
+#-----------------------------------
+
+import pytest
+from mysql.connector import errors
+from backend.app.db import ConnectionPool, on_commit
+
+#-----------------------------------
+#   Conexión falsa para no depender de MySQL en estos tests
+#-----------------------------------
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.closed = False
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+#-----------------------------------
+#   Test de reutilización.
+#   Una conexión devuelta al pool se vuelve a prestar sin abrir otra
+#-----------------------------------
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(size=2, connect=FakeConnection)
+
+    conn = pool.acquire()
+    raw = conn._entry.raw
+    conn.close()
+
+    again = pool.acquire()
+    assert again._entry.raw is raw
+    assert pool.stats()["created"] == 1
+    again.close()
+
+#-----------------------------------
+#   Test de límite.
+#   Con todas las conexiones prestadas, acquire falla tras el timeout
+#-----------------------------------
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(size=1, timeout=0.05, connect=FakeConnection)
+
+    conn = pool.acquire()
+    with pytest.raises(errors.PoolError):
+        pool.acquire()
+
+    conn.close()
+    pool.acquire().close()
+    assert pool.stats()["timeouts"] == 1
+
+#-----------------------------------
+#   Test de reciclado.
+#   Las conexiones que superan su vida máxima se cierran y se sustituyen
+#-----------------------------------
+
+def test_pool_recycles_old_connections():
+    pool = ConnectionPool(size=1, max_lifetime=0.01, connect=FakeConnection)
+
+    conn = pool.acquire()
+    raw = conn._entry.raw
+    conn._entry.created_at -= 1
+    conn.close()
+
+    assert raw.closed
+    assert pool.stats()["recycled"] == 1
+
+#-----------------------------------
+#   Test de acciones tras el commit.
+#   Solo se ejecutan si la transacción se confirma, y una sola vez
+#-----------------------------------
+
+def test_on_commit_runs_only_after_commit():
+    pool = ConnectionPool(size=1, connect=FakeConnection)
+    calls = []
+
+    conn = pool.acquire()
+    on_commit(conn, lambda: calls.append("rollback"))
+    conn.rollback()
+    on_commit(conn, lambda: calls.append("commit"))
+    assert calls == []
+    conn.commit()
+    conn.commit()
+    assert calls == ["commit"]
+
+    on_commit(conn, lambda: calls.append("close"))
+    conn.close()
+    assert calls == ["commit"]
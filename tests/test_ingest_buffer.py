@@ -0,0 +1,137 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_ingest_buffer.py
+#   Descripción: Módulo que realiza tests del buffer de ingesta
+#   (volcado por lotes, límite de memoria y volcado al apagar)
+#-----------------------------------
+
+import time
+from backend.app.ingest_buffer import IngestBuffer
+
+#-----------------------------------
+#   Test de volcado por lotes.
+#   flush() escribe como máximo batch_size filas por llamada
+#-----------------------------------
+
+def test_flush_writes_in_batches():
+    written = []
+    buffer = IngestBuffer(written.append, enabled=True, max_size=10, batch_size=2)
+
+    for i in range(3):
+        assert buffer.offer(i)
+
+    buffer.flush()
+    buffer.flush()
+    assert written == [[0, 1], [2]]
+    assert buffer.stats()["flushed_rows"] == 3
+
+#-----------------------------------
+#   Test de límite de memoria.
+#   Con la cola llena se rechazan las nuevas filas
+#-----------------------------------
+
+def test_offer_rejects_when_full():
+    buffer = IngestBuffer(lambda rows: None, enabled=True, max_size=2)
+
+    assert buffer.offer(1)
+    assert buffer.offer(2)
+    assert not buffer.offer(3)
+    assert buffer.stats()["rejected"] == 1
+
+#-----------------------------------
+#   Test de error de escritura.
+#   Las filas vuelven a la cola si el volcado falla
+#-----------------------------------
+
+def test_failed_flush_requeues_rows():
+    def failing_writer(rows):
+        raise RuntimeError("base de datos caída")
+
+    buffer = IngestBuffer(failing_writer, enabled=True, max_size=10, batch_size=5)
+    buffer.offer(1)
+    buffer.offer(2)
+
+    assert not buffer.flush()
+    assert buffer.stats()["depth"] == 2
+
+#-----------------------------------
+#   Test de fila mala.
+#   Una fila que falla sola se aísla partiendo el lote, el resto se escribe
+#   y, agotados sus reintentos, se descarta sin bloquear la cola
+#-----------------------------------
+
+class BadRow(Exception):
+    pass
+
+
+def test_bad_row_is_isolated_and_dropped():
+    written, calls = [], []
+
+    def writer(rows):
+        calls.append(list(rows))
+        if "mala" in rows:
+            raise BadRow("Data too long for column 'GAS_TYPE'")
+        written.extend(rows)
+
+    buffer = IngestBuffer(writer, enabled=True, max_size=20, batch_size=8, max_row_retries=2,
+                          is_row_error=lambda e: isinstance(e, BadRow))
+    rows = [1, 2, 3, "mala", 5, 6, 7, 8]
+    for row in rows:
+        buffer.offer(row)
+
+    assert not buffer.flush()
+    assert written == [1, 2, 3, 5, 6, 7, 8]
+    # Lote completo + 2 mitades + 2 cuartos + 2 filas sueltas
+    assert len(calls) == 7
+    assert buffer.stats()["depth"] == 1
+
+    buffer.offer(9)
+    assert not buffer.flush()
+    stats = buffer.stats()
+    assert written[-1] == 9
+    assert stats["depth"] == 0 and stats["bad_rows"] == 1
+    assert stats["flushed_rows"] == 8
+
+#-----------------------------------
+#   Test de reintentos.
+#   Mientras la escritura falla, el hilo espera entre intentos en lugar de
+#   reintentar en bucle aunque la cola tenga un lote completo
+#-----------------------------------
+
+def test_failing_writer_backs_off():
+    calls = []
+
+    def failing_writer(rows):
+        calls.append(len(rows))
+        raise RuntimeError("base de datos caída")
+
+    buffer = IngestBuffer(failing_writer, enabled=True, max_size=10, batch_size=2,
+                          flush_interval=0.05, max_backoff=0.2)
+    for i in range(5):
+        buffer.offer(i)
+    buffer.start()
+    time.sleep(0.5)
+    buffer.stop()
+
+    # 0.05 + 0.1 + 0.2 + 0.2 ... en 0.5 s: unos pocos intentos (más el del apagado)
+    assert 2 <= len(calls) <= 8
+    assert buffer.stats()["depth"] == 5
+
+#-----------------------------------
+#   Test de apagado.
+#   stop() vuelca todo lo pendiente antes de terminar el hilo
+#-----------------------------------
+
+def test_stop_flushes_pending_rows():
+    written = []
+    buffer = IngestBuffer(written.extend, enabled=True, batch_size=100, flush_interval=60)
+    buffer.start()
+    for i in range(5):
+        buffer.offer(i)
+    buffer.stop()
+
+    assert written == [0, 1, 2, 3, 4]
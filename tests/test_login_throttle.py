@@ -0,0 +1,96 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_login_throttle.py
+#   Descripción: Módulo que realiza tests del límite de intentos de inicio de sesión
+#-----------------------------------
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from backend.app.login_throttle import LoginThrottle, client_ip
+
+
+def request_from(host: str, forwarded: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode("ascii"))] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (host, 50000)})
+
+#-----------------------------------
+#   Test de límite por cuenta.
+#   Agotados los intentos se responde 429 con Retry-After, sin afectar a otras
+#   cuentas, y un inicio de sesión correcto los devuelve
+#-----------------------------------
+
+def test_account_limit_and_reset():
+    throttle = LoginThrottle(account_burst=2, account_per_minute=1, ip_burst=100, ip_per_minute=100)
+    throttle.check("Usuario", "1.1.1.1")
+    throttle.check("usuario ", "2.2.2.2")
+
+    with pytest.raises(HTTPException) as error:
+        throttle.check("usuario", "3.3.3.3")
+    assert error.value.status_code == 429
+    assert 1 <= int(error.value.headers["Retry-After"]) <= 60
+
+    throttle.check("otro", "1.1.1.1")
+    throttle.succeeded("usuario")
+    throttle.check("usuario", "1.1.1.1")
+
+    stats = throttle.stats()
+    assert stats["allowed"] == 4 and stats["rejected_account"] == 1
+
+#-----------------------------------
+#   Test de límite por IP.
+#   Una IP que prueba muchas cuentas se bloquea y los rechazos no gastan intentos
+#-----------------------------------
+
+def test_ip_limit():
+    throttle = LoginThrottle(account_burst=100, account_per_minute=100, ip_burst=3, ip_per_minute=1)
+    for i in range(3):
+        throttle.check(f"cuenta{i}", "1.1.1.1")
+
+    for i in range(3):
+        with pytest.raises(HTTPException):
+            throttle.check(f"nueva{i}", "1.1.1.1")
+    throttle.check("nueva0", "2.2.2.2")
+
+    stats = throttle.stats()
+    assert stats["rejected_ip"] == 3 and stats["accounts"] == 4
+
+#-----------------------------------
+#   Test de memoria acotada.
+#   Por encima de `max_keys` se olvidan las claves usadas hace más tiempo
+#-----------------------------------
+
+def test_max_keys_evicts_oldest():
+    throttle = LoginThrottle(account_burst=1, account_per_minute=1, ip_burst=100, ip_per_minute=100, max_keys=2)
+    for account in ("a", "b", "c"):
+        throttle.check(account, "1.1.1.1")
+
+    # "a" se ha olvidado y vuelve a tener su intento; "c" no
+    throttle.check("a", "1.1.1.1")
+    with pytest.raises(HTTPException):
+        throttle.check("c", "1.1.1.1")
+    assert throttle.stats()["accounts"] == 2 and throttle.stats()["evicted"] >= 1
+
+#-----------------------------------
+#   Test de IP detrás de un proxy.
+#   Solo cuenta la entrada de X-Forwarded-For que añade el proxy: cambiar
+#   las de la izquierda no da fichas nuevas
+#-----------------------------------
+
+def test_spoofed_forwarded_for_does_not_reset_ip_bucket():
+    throttle = LoginThrottle(account_burst=100, account_per_minute=100, ip_burst=2, ip_per_minute=1)
+    for i in range(2):
+        throttle.check(f"cuenta{i}", client_ip(request_from("10.0.0.1", f"1.2.3.{i}, 5.5.5.5"), trusted_proxies=1))
+
+    with pytest.raises(HTTPException) as error:
+        throttle.check("cuenta9", client_ip(request_from("10.0.0.1", "9.9.9.9, 5.5.5.5"), trusted_proxies=1))
+    assert error.value.status_code == 429
+
+    # Sin proxies de confianza se ignora la cabecera; con dos, se salta la del proxy interno
+    assert client_ip(request_from("10.0.0.1", "1.2.3.4"), trusted_proxies=0) == "10.0.0.1"
+    assert client_ip(request_from("10.0.0.1", "1.2.3.4, 5.5.5.5, 10.0.0.2"), trusted_proxies=2) == "5.5.5.5"
+    assert client_ip(request_from("10.0.0.1"), trusted_proxies=1) == "10.0.0.1"
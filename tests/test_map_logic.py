@@ -0,0 +1,97 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_map_logic.py
+#   Descripción: Módulo que realiza tests de las utilidades del mapa
+#   (lectura de posiciones y agregación en celdas)
+#-----------------------------------
+
+import json
+import numpy as np
+from backend.app.map_logic import (
+    parse_position, positions_to_arrays, bin_readings,
+    cell_size_for_zoom, snap_bbox, MIN_CELL_SIZE, MAX_CELL_SIZE
+)
+
+#-----------------------------------
+#   Test de lectura de posiciones.
+#   Las posiciones GeoJSON se leen como (lat, lon) y las demás se descartan
+#-----------------------------------
+
+def test_parse_position():
+    position = json.dumps({"type": "Point", "coordinates": [-0.376, 39.47]})
+
+    assert parse_position(position) == (39.47, -0.376)
+    assert parse_position("Lab") is None
+    assert parse_position(None) is None
+
+#-----------------------------------
+#   Test de agregación.
+#   Dos mediciones en la misma celda se combinan en una sola entrada
+#-----------------------------------
+
+def test_bin_readings_groups_by_cell():
+    lats = np.array([39.471, 39.472, 39.61])
+    lons = np.array([-0.376, -0.377, -0.51])
+    values = np.array([10.0, 30.0, 5.0])
+
+    cells = bin_readings(lats, lons, values, 0.01)
+
+    assert len(cells) == 2
+    busiest = max(cells, key=lambda c: c["count"])
+    assert busiest["count"] == 2
+    assert busiest["mean"] == 20.0
+    assert busiest["max"] == 30.0
+
+#-----------------------------------
+#   Test de agregación ponderada.
+#   Con counts y maxs cada punto es un resumen (suma, número, máximo)
+#-----------------------------------
+
+def test_bin_readings_weighted():
+    position = json.dumps({"type": "Point", "coordinates": [-0.376, 39.471]})
+    rows = [(position, 30.0, 3, 15.0), (position, 10.0, 1, 10.0), ("Lab", 5.0, 1, 5.0)]
+
+    lats, lons, sums, counts, maxs = positions_to_arrays(rows, 0, 1, 2, 3)
+    cells = bin_readings(lats, lons, sums, 0.1, counts=counts, maxs=maxs)
+
+    assert len(cells) == 1
+    assert cells[0]["count"] == 4
+    assert cells[0]["mean"] == 10.0
+    assert cells[0]["max"] == 15.0
+
+#-----------------------------------
+#   Test de nivel de detalle.
+#   El tamaño de celda se reduce con el zoom y el grupo se sitúa en su centroide
+#-----------------------------------
+
+def test_zoom_cells_and_centroids():
+    assert cell_size_for_zoom(0) == MAX_CELL_SIZE
+    assert cell_size_for_zoom(22) == MIN_CELL_SIZE
+    assert cell_size_for_zoom(10) < cell_size_for_zoom(9)
+
+    lats = np.array([39.40, 39.44])
+    lons = np.array([-0.30, -0.34])
+    cells = bin_readings(lats, lons, np.array([1.0, 3.0]), 1.0, centroids=True)
+
+    assert cells[0]["lat"] == 39.42
+    assert cells[0]["lon"] == -0.32
+
+#-----------------------------------
+#   Test de alineación del área visible.
+#   Dos vistas casi iguales quedan en el mismo rectángulo, que contiene a
+#   ambas y no cambia al alinearlo otra vez
+#-----------------------------------
+
+def test_snap_bbox_to_zoom_grid():
+    cell = cell_size_for_zoom(12)
+    a = snap_bbox((-0.3812, 39.4601, -0.3513, 39.4809), cell)
+    b = snap_bbox((-0.3809, 39.4603, -0.3515, 39.4805), cell)
+
+    assert a == b
+    assert a[0] <= -0.3812 and a[1] <= 39.4601 and a[2] >= -0.3513 and a[3] >= 39.4809
+    assert snap_bbox(a, cell) == a
+    assert snap_bbox((-179.99, -89.99, 179.99, 89.99), 5.0) == (-180.0, -90.0, 180.0, 90.0)
@@ -0,0 +1,36 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_migrations.py
+#   Descripción: Módulo que realiza tests del aplicador de migraciones
+#-----------------------------------
+
+import os
+from backend.app.migrations import MIGRATIONS_DIR, split_statements, pending_migrations
+
+#-----------------------------------
+#   Test de separación de sentencias.
+#   Se quitan los comentarios y se corta en cada ';'
+#-----------------------------------
+
+def test_split_statements():
+    sql = "-- comentario; con punto y coma\nCREATE TABLE A (ID INT);\n\n-- otro\nUPDATE A\nSET ID = 1;\n"
+    assert split_statements(sql) == ["CREATE TABLE A (ID INT)", "UPDATE A\nSET ID = 1"]
+
+    with open(os.path.join(MIGRATIONS_DIR, "03_mediciones_lat_lon.sql"), encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    assert [s.split()[0] for s in statements] == ["ALTER", "UPDATE", "CREATE", "DROP"]
+
+#-----------------------------------
+#   Test de migraciones pendientes.
+#   Solo las no aplicadas, en orden por número
+#-----------------------------------
+
+def test_pending_migrations_in_order():
+    pending = pending_migrations({"01_idx_mediciones_gas_date.sql"})
+    assert pending[0].startswith("02_")
+    assert pending == sorted(pending)
+    assert "01_idx_mediciones_gas_date.sql" not in pending
@@ -0,0 +1,121 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_official_stations.py
+#   Descripción: Módulo que realiza tests del proxy de las estaciones oficiales
+#   contra un servidor local que imita a Open-Meteo
+#-----------------------------------
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+from backend.app.official_stations import StationProxy
+
+STATIONS = [
+    {"name": "A", "lat": 39.0, "lon": -0.5},
+    {"name": "B", "lat": 40.0, "lon": 0.1},
+]
+
+
+class StubOpenMeteo(BaseHTTPRequestHandler):
+    requests = 0
+    delay = 0.0
+    fail = False
+
+    def do_GET(self):
+        type(self).requests += 1
+        time.sleep(type(self).delay)
+        if type(self).fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        body = json.dumps({"current": {
+            "ozone": float(query["latitude"][0]),
+            "nitrogen_dioxide": 20,
+            "sulphur_dioxide": 3,
+            "carbon_monoxide": 150,
+        }}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            # El proxy ya cerró la conexión por tardar demasiado
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    StubOpenMeteo.requests = 0
+    StubOpenMeteo.delay = 0.0
+    StubOpenMeteo.fail = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenMeteo)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+#-----------------------------------
+#   Test de caché.
+#   Se pide cada estación una vez y la segunda consulta sale de memoria
+#-----------------------------------
+
+def test_stations_are_fetched_once_and_cached(stub):
+    async def run():
+        proxy = StationProxy(stations=STATIONS, base_url=stub, ttl=60, timeout=2)
+        try:
+            first = await proxy.get_stations()
+            second = await proxy.get_stations()
+        finally:
+            await proxy.stop()
+        return first, second, proxy.stats()
+
+    first, second, stats = asyncio.run(run())
+
+    assert StubOpenMeteo.requests == len(STATIONS)
+    assert [e["name"] for e in first["estaciones"]] == ["A", "B"]
+    assert first["estaciones"][1]["o3"] == 40.0
+    assert first["obsoleto"] is False
+    assert second == first
+    assert stats["hits"] == 1 and stats["refreshes"] == 1
+
+#-----------------------------------
+#   Test de datos obsoletos.
+#   Si el proveedor falla o tarda se sirven los datos anteriores
+#-----------------------------------
+
+def test_stale_data_is_served_when_upstream_fails(stub):
+    async def run():
+        proxy = StationProxy(stations=STATIONS, base_url=stub, ttl=0, timeout=0.3)
+        try:
+            fresh = await proxy.get_stations()
+            StubOpenMeteo.fail = True
+            failed = await proxy.get_stations()
+            StubOpenMeteo.fail = False
+            StubOpenMeteo.delay = 1.0
+            slow = await proxy.get_stations()
+        finally:
+            await proxy.stop()
+        return fresh, failed, slow
+
+    fresh, failed, slow = asyncio.run(run())
+
+    assert failed["obsoleto"] is True
+    assert failed["estaciones"] == fresh["estaciones"]
+    assert slow["obsoleto"] is True
+    assert slow["estaciones"] == fresh["estaciones"]
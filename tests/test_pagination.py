@@ -0,0 +1,55 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_pagination.py
+#   Descripción: Módulo que realiza tests de la paginación por clave
+#-----------------------------------
+
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from backend.app.pagination import encode_cursor, decode_cursor, split_page
+
+#-----------------------------------
+#   Test de cursor.
+#   La clave de orden (con fechas) sobrevive a la codificación
+#-----------------------------------
+
+def test_cursor_roundtrip():
+    key = (datetime(2026, 10, 18, 12, 30, 5), 1234)
+    token = encode_cursor("readings", key)
+
+    assert decode_cursor("readings", token, 2) == key
+
+#-----------------------------------
+#   Test de cursor inválido.
+#   Un token corrupto o de otro listado se rechaza con 400
+#-----------------------------------
+
+def test_cursor_rejects_other_kind():
+    token = encode_cursor("users", (7,))
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("sensors", token, 1)
+    assert error.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        decode_cursor("users", "no-es-un-cursor", 1)
+
+#-----------------------------------
+#   Test de página.
+#   La fila de más indica que hay página siguiente y no se devuelve
+#-----------------------------------
+
+def test_split_page():
+    rows = [{"ID": i} for i in range(1, 5)]
+
+    page, siguiente = split_page(rows, 3, "users", lambda u: (u["ID"],))
+    assert [u["ID"] for u in page] == [1, 2, 3]
+    assert decode_cursor("users", siguiente, 1) == (3,)
+
+    page, siguiente = split_page(rows, 4, "users", lambda u: (u["ID"],))
+    assert len(page) == 4 and siguiente is None
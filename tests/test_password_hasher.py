@@ -0,0 +1,117 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_password_hasher.py
+#   Descripción: Módulo que realiza tests del pool de procesos de contraseñas
+#-----------------------------------
+
+import time
+import asyncio
+import threading
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from backend.app.password_hasher import PasswordHasher
+
+#-----------------------------------
+#   Test de hash y comprobación.
+#   El hash usa el coste configurado y es compatible con bcrypt
+#-----------------------------------
+
+def test_hash_and_check_in_pool():
+    hasher = PasswordHasher(workers=1, max_queue=4, rounds=4)
+    try:
+        hashed = hasher.hash("password")
+        assert hashed.startswith("$2b$04$")
+        assert bcrypt.checkpw(b"password", hashed.encode("utf-8"))
+        assert hasher.check("password", hashed)
+        assert not hasher.check("otra", hashed)
+    finally:
+        hasher.stop()
+
+    stats = hasher.stats()
+    assert stats["hashes"] == 1 and stats["checks"] == 2
+    assert stats["in_flight"] == 0
+
+#-----------------------------------
+#   Test de la versión asíncrona.
+#   Mientras bcrypt trabaja, el bucle de eventos sigue atendiendo otras tareas
+#-----------------------------------
+
+def test_async_hash_does_not_block_event_loop():
+    hasher = PasswordHasher(workers=1, max_queue=4, rounds=12)
+    hasher.start()
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        hashed = await hasher.hash_async("password")
+        ok = await hasher.check_async("password", hashed)
+        task.cancel()
+        return ok, ticks
+
+    try:
+        ok, ticks = asyncio.run(run())
+    finally:
+        hasher.stop()
+
+    assert ok
+    assert ticks > 5
+
+#-----------------------------------
+#   Test de cola llena.
+#   Por encima de `max_queue` operaciones se responde 503 sin esperar
+#-----------------------------------
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=12)
+    try:
+        slow = threading.Thread(target=hasher.hash, args=("password",))
+        slow.start()
+        while hasher.stats()["in_flight"] == 0:
+            time.sleep(0.001)
+
+        with pytest.raises(HTTPException) as error:
+            hasher.check("password", "$2b$04$" + "a" * 53)
+        assert error.value.status_code == 503
+        slow.join()
+    finally:
+        hasher.stop()
+
+    assert hasher.stats()["rejected"] == 1
+
+#-----------------------------------
+#   Test de timeout.
+#   Se responde 503, pero el hueco sigue ocupado hasta que el proceso termina
+#-----------------------------------
+
+def test_timeout_keeps_slot_until_job_finishes():
+    hasher = PasswordHasher(workers=1, max_queue=4, rounds=4)
+    try:
+        # El primer hash arranca el proceso; el segundo ya empieza al momento
+        hasher.hash("password")
+        hasher.rounds, hasher.timeout = 14, 0.05
+
+        with pytest.raises(HTTPException) as error:
+            hasher.hash("password")
+        assert error.value.status_code == 503
+        assert hasher.stats()["in_flight"] == 1
+
+        deadline = time.monotonic() + 30
+        while hasher.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hasher.stats()["in_flight"] == 0
+    finally:
+        hasher.stop()
+
+    assert hasher.stats()["timeouts"] == 1
@@ -0,0 +1,120 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_recent_readings.py
+#   Descripción: Módulo que realiza tests de la caché de últimas mediciones por sensor
+#-----------------------------------
+
+from datetime import datetime, timedelta
+from backend.app.recent_readings import RecentReadings
+
+BASE = datetime(2026, 10, 18, 12, 0, 0)
+
+
+def medicion(minutes: int, value: float) -> dict:
+    return {
+        "DATE": BASE + timedelta(minutes=minutes),
+        "GAS_TYPE": "O3",
+        "GAS_VALUE": value,
+        "TEMPERATURE_VALUE": None,
+        "POSITION": None
+    }
+
+#-----------------------------------
+#   Test del buffer circular.
+#   Solo se conservan las `size` más recientes, de la más nueva a la más antigua,
+#   y una medición atrasada ocupa su lugar por fecha
+#-----------------------------------
+
+def test_ring_keeps_latest_readings_in_order():
+    cache = RecentReadings(size=3, ttl=60)
+    assert cache.get("s1") is None
+
+    assert cache.load("s1", [medicion(1, 1.0), medicion(0, 0.0)], cache.begin_load())
+    cache.append([("s1", BASE + timedelta(minutes=m), "O3", float(m), 20.0, None) for m in (2, 3)])
+    assert [m["GAS_VALUE"] for m in cache.get("s1")] == [3.0, 2.0, 1.0]
+    assert cache.get("s1")[0]["TEMPERATURE_VALUE"] == 20.0
+    assert cache.get("s1")[0]["DATE"] == BASE + timedelta(minutes=3)
+
+    cache.append([("s1", BASE + timedelta(minutes=2, seconds=30), "O3", 2.5, None, None)])
+    assert [m["GAS_VALUE"] for m in cache.get("s1")] == [3.0, 2.5, 2.0]
+
+    # Más antigua que todas: no entra
+    cache.append([("s1", BASE, "O3", 0.0, None, None)])
+    assert [m["GAS_VALUE"] for m in cache.get("s1")] == [3.0, 2.5, 2.0]
+
+#-----------------------------------
+#   Test de carga concurrente.
+#   Una carga que empezó antes de una medición nueva de ese sensor se descarta
+#-----------------------------------
+
+def test_load_discarded_after_concurrent_write():
+    cache = RecentReadings(size=3, ttl=60)
+
+    token = cache.begin_load()
+    cache.append([("s1", BASE, "O3", 5.0, None, None)])
+    assert not cache.load("s1", [], token)
+    assert cache.get("s1") is None
+
+    # Una medición de otro sensor no afecta
+    token = cache.begin_load()
+    cache.append([("s2", BASE, "O3", 5.0, None, None)])
+    assert cache.load("s1", [medicion(0, 5.0)], token)
+    assert len(cache.get("s1")) == 1
+
+    # Una carga posterior al commit ya trae la medición: append() no la repite
+    cache.append([("s1", BASE, "O3", 5.0, None, None)])
+    assert len(cache.get("s1")) == 1
+
+#-----------------------------------
+#   Test de límite de memoria.
+#   Se expulsa el sensor usado hace más tiempo
+#-----------------------------------
+
+def test_max_sensors_evicts_least_recently_used():
+    cache = RecentReadings(size=3, ttl=60, max_sensors=2)
+    for uuid in ("s1", "s2"):
+        cache.load(uuid, [medicion(0, 1.0)], cache.begin_load())
+    cache.get("s1")
+    cache.load("s3", [medicion(0, 1.0)], cache.begin_load())
+
+    assert cache.get("s2") is None
+    assert cache.get("s1") is not None
+    assert cache.stats()["sensors"] == 2
+
+#-----------------------------------
+#   Test de cargas cruzadas.
+#   Dos cargas alrededor de la misma escritura: la que empezó después se
+#   guarda y la que empezó antes se descarta aunque llegue la última
+#-----------------------------------
+
+def test_interleaved_loads_around_one_write():
+    cache = RecentReadings(size=3, ttl=60)
+
+    early = cache.begin_load()
+    cache.append([("s1", BASE + timedelta(minutes=1), "O3", 1.0, None, None)])
+    late = cache.begin_load()
+
+    assert cache.load("s1", [medicion(1, 1.0), medicion(0, 0.0)], late)
+    assert not cache.load("s1", [medicion(0, 0.0)], early)
+    assert [m["GAS_VALUE"] for m in cache.get("s1")] == [1.0, 0.0]
+
+#-----------------------------------
+#   Test de marcas de escritura acotadas.
+#   Solo se recuerdan `max_sensors` sensores; una carga anterior a una marca
+#   olvidada se descarta
+#-----------------------------------
+
+def test_write_marks_are_bounded():
+    cache = RecentReadings(size=3, ttl=60, max_sensors=2)
+
+    token = cache.begin_load()
+    for uuid in ("s1", "s2", "s3", "s4"):
+        cache.append([(uuid, BASE, "O3", 1.0, None, None)])
+    assert len(cache._written) == 2
+
+    assert not cache.load("s1", [], token)
+    assert cache.load("s1", [medicion(0, 1.0)], cache.begin_load())
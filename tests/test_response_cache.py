@@ -0,0 +1,79 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_response_cache.py
+#   Descripción: Módulo que realiza tests de la caché de respuestas del mapa
+#-----------------------------------
+
+from datetime import datetime, timedelta
+from backend.app.response_cache import ResponseCache
+
+YESTERDAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+TODAY = YESTERDAY + timedelta(days=1)
+
+
+def counting(result):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+    return compute, calls
+
+#-----------------------------------
+#   Test de ETag.
+#   La segunda petición no recalcula y con If-None-Match responde 304
+#-----------------------------------
+
+def test_respond_caches_and_returns_304():
+    cache = ResponseCache(max_entries=4, today_ttl=30)
+    compute, calls = counting({"status": "ok", "desde": YESTERDAY})
+    key = ("map", YESTERDAY, TODAY, "o3")
+
+    first = cache.respond(key, ("o3",), YESTERDAY, TODAY, None, compute)
+    second = cache.respond(key, ("o3",), YESTERDAY, TODAY, first.headers["etag"], compute)
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert len(calls) == 1
+
+#-----------------------------------
+#   Test de invalidación.
+#   Una medición atrasada del mismo gas descarta el día pasado; otro gas no
+#-----------------------------------
+
+def test_invalidate_by_gas_and_date():
+    cache = ResponseCache(max_entries=4, today_ttl=30)
+    compute, calls = counting({"status": "ok"})
+    key = ("map", YESTERDAY, TODAY, "o3")
+
+    cache.respond(key, ("o3",), YESTERDAY, TODAY, None, compute)
+    cache.invalidate([("no2", YESTERDAY + timedelta(hours=3))])
+    cache.respond(key, ("o3",), YESTERDAY, TODAY, None, compute)
+    assert len(calls) == 1
+
+    cache.invalidate([("o3", YESTERDAY + timedelta(hours=3))])
+    cache.respond(key, ("o3",), YESTERDAY, TODAY, None, compute)
+    assert len(calls) == 2
+
+#-----------------------------------
+#   Test de mayúsculas.
+#   Los sensores envían "O3" y el mapa pide "o3": la medición invalida igual
+#-----------------------------------
+
+def test_invalidate_ignores_gas_case():
+    cache = ResponseCache(max_entries=4, today_ttl=30)
+    compute, calls = counting({"status": "ok"})
+    key = ("map", YESTERDAY, TODAY, "o3")
+
+    cache.respond(key, ("o3",), YESTERDAY, TODAY, None, compute)
+    cache.invalidate([("O3", YESTERDAY + timedelta(hours=3))])
+    assert cache.stats()["invalidated"] == 1
+
+    cache.respond(key, ("O3",), YESTERDAY, TODAY, None, compute)
+    cache.invalidate([("o3", YESTERDAY + timedelta(hours=4))])
+    assert cache.stats()["invalidated"] == 2
+    assert len(calls) == 2
@@ -0,0 +1,84 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_rollups.py
+#   Descripción: Módulo que realiza tests del resumen horario de mediciones
+#-----------------------------------
+
+from datetime import datetime
+from backend.app.rollups import accumulate_rollups, use_hourly_rollup, hourly_summary
+
+
+class FakeCursor:
+    def __init__(self):
+        self.calls = []
+
+    def executemany(self, query, params):
+        self.calls.append((query, params))
+
+#-----------------------------------
+#   Test de acumulación.
+#   Las mediciones de un mismo sensor, gas y hora se agregan en una sola fila
+#-----------------------------------
+
+def test_accumulate_rollups_groups_by_hour():
+    cursor = FakeCursor()
+    rows = [
+        ("S1", datetime(2026, 10, 18, 10, 5), "o3", 10.0, 20.0, "A"),
+        ("S1", datetime(2026, 10, 18, 10, 50), "o3", 30.0, 20.0, "B"),
+        ("S1", datetime(2026, 10, 18, 10, 20), "o3", 20.0, 20.0, "C"),
+        ("S1", datetime(2026, 10, 18, 11, 0), "o3", 5.0, 20.0, "D"),
+    ]
+
+    accumulate_rollups(cursor, rows)
+
+    assert len(cursor.calls) == 1
+    params = {row[2]: row for row in cursor.calls[0][1]}
+    assert len(params) == 2
+    uuid, gas, hour, count, total, low, high, last_date, last_position = params[datetime(2026, 10, 18, 10)]
+    assert (count, total, low, high) == (3, 60.0, 10.0, 30.0)
+    assert last_date == datetime(2026, 10, 18, 10, 50)
+    assert last_position == "B"
+
+#-----------------------------------
+#   Test de selección de origen.
+#   Solo se usa el resumen con horas completas y celdas grandes
+#-----------------------------------
+
+def test_use_hourly_rollup():
+    desde = datetime(2026, 10, 18)
+    hasta = datetime(2026, 10, 19)
+
+    assert use_hourly_rollup(desde, hasta, 0.1)
+    assert not use_hourly_rollup(desde, hasta, 0.001)
+    assert not use_hourly_rollup(desde, datetime(2026, 10, 18, 12, 30), 0.1)
+
+#-----------------------------------
+#   Test del resumen diario.
+#   La matriz siempre tiene 24 horas por gas, con None donde no hay mediciones
+#-----------------------------------
+
+def test_hourly_summary_fixed_matrix():
+    day = datetime(2026, 10, 18)
+    rows = [
+        {"GAS_TYPE": "O3", "HOUR_START": datetime(2026, 10, 18, 9), "READINGS_COUNT": 3,
+         "VALUE_SUM": 60.0, "VALUE_MIN": 10.0, "VALUE_MAX": 30.0},
+        {"GAS_TYPE": "o3", "HOUR_START": datetime(2026, 10, 18, 9), "READINGS_COUNT": 1,
+         "VALUE_SUM": 40.0, "VALUE_MIN": 40.0, "VALUE_MAX": 40.0},
+        {"GAS_TYPE": "NO2", "HOUR_START": datetime(2026, 10, 18, 23), "READINGS_COUNT": 2,
+         "VALUE_SUM": 8.0, "VALUE_MIN": 3.0, "VALUE_MAX": 5.0},
+    ]
+
+    resumen = hourly_summary(rows, day, ["o3", "no2", "co"])
+
+    assert set(resumen) == {"o3", "no2", "co"}
+    assert all(len(serie) == 24 for gas in resumen.values() for serie in gas.values())
+    assert resumen["o3"]["mediciones"][9] == 4
+    assert resumen["o3"]["media"][9] == 25.0
+    assert (resumen["o3"]["min"][9], resumen["o3"]["max"][9]) == (10.0, 40.0)
+    assert resumen["o3"]["media"][8] is None and resumen["o3"]["mediciones"][8] == 0
+    assert resumen["no2"]["media"][23] == 4.0
+    assert resumen["co"]["media"] == [None] * 24
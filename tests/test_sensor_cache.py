@@ -0,0 +1,169 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_sensor_cache.py
+#   Descripción: Módulo que realiza tests de la caché de sensores vinculados
+#-----------------------------------
+
+from backend.app import sensores
+from backend.app.sensor_cache import SensorRegistry
+
+
+class FakeCursor:
+    """
+    @brief Cursor que responde a las consultas de sensores.py sobre una lista
+    fija de UUID vinculados al usuario 1.
+    """
+
+    def __init__(self, uuids):
+        self.uuids = list(uuids)
+        self.queries = []
+        self.last = None
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        self.last = (query, params)
+
+    def fetchone(self):
+        query, params = self.last
+        if "FROM USUARIOS" in query:
+            return {"1": 1}
+        if "FROM SENSORES WHERE UUID" in query:
+            return {"UUID": params[0]} if params[0] in self.uuids else None
+        return None
+
+    def fetchall(self):
+        query, params = self.last
+        if "UUID IN" in query:
+            return [{"UUID": uuid} for uuid in params if uuid in self.uuids]
+        if "FROM SENSORES WHERE ASSOCIATED_USER" in query:
+            return [{"UUID": uuid} for uuid in self.uuids]
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.cursor_obj = cursor
+
+    def cursor(self, dictionary=False):
+        return self.cursor_obj
+
+
+class CommitConnection(FakeConnection):
+    """
+    @brief Conexión con ganchos de commit, como PooledConnection.
+    """
+
+    def __init__(self, cursor):
+        super().__init__(cursor)
+        self.callbacks = []
+
+    def after_commit(self, callback):
+        self.callbacks.append(callback)
+
+    def commit(self):
+        for callback in self.callbacks:
+            callback()
+        self.callbacks = []
+
+
+#-----------------------------------
+#   Test de aciertos y fallos.
+#   Solo se guardan los sensores existentes; un UUID desconocido se consulta
+#   siempre y una entrada caducada vuelve a ser un fallo
+#-----------------------------------
+
+def test_contains_hit_miss_and_expiry():
+    registry = SensorRegistry(ttl=60)
+    assert not registry.contains("s1")
+    registry.add("s1")
+    assert registry.contains("s1")
+    assert registry.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    expired = SensorRegistry(ttl=0)
+    expired.add("s1")
+    assert not expired.contains("s1")
+    assert expired.stats()["entries"] == 0
+
+#-----------------------------------
+#   Test de consulta a la base de datos.
+#   Los UUID en caché no generan consulta y los desconocidos se comprueban
+#   en una sola, sin guardar los que no existen
+#-----------------------------------
+
+def test_known_sensors_queries_only_misses(monkeypatch):
+    registry = SensorRegistry(ttl=60)
+    monkeypatch.setattr(sensores, "sensor_registry", registry)
+    cursor = FakeCursor(["s1", "s2"])
+
+    assert sensores._known_sensors(cursor, ["s1", "s2", "nuevo"]) == {"s1", "s2"}
+    assert len(cursor.queries) == 1
+
+    assert sensores._known_sensors(cursor, ["s1", "s2"]) == {"s1", "s2"}
+    assert len(cursor.queries) == 1
+
+    assert sensores._known_sensors(cursor, ["nuevo"]) == set()
+    assert len(cursor.queries) == 2
+
+#-----------------------------------
+#   Test de invalidación.
+#   Al vincular o borrar sensores se quitan de la caché, así la siguiente
+#   medición se comprueba en la base de datos
+#-----------------------------------
+
+def test_bind_and_delete_discard_entries(monkeypatch):
+    registry = SensorRegistry(ttl=60)
+    monkeypatch.setattr(sensores, "sensor_registry", registry)
+    for uuid in ("s1", "s2", "s3"):
+        registry.add(uuid)
+
+    sensores.bind_sensor_to_user(1, "s1", conn=FakeConnection(FakeCursor([])))
+    assert not registry.contains("s1")
+
+    sensores.delete_sensor_records(1, False, "s2", conn=FakeConnection(FakeCursor(["s2", "s3"])))
+    assert not registry.contains("s2")
+    assert registry.contains("s3")
+
+    registry.add("s2")
+    sensores.delete_sensor_records(1, True, conn=FakeConnection(FakeCursor(["s2", "s3"])))
+    assert registry.stats()["entries"] == 0
+
+#-----------------------------------
+#   Test de tamaño máximo.
+#   Por encima de `max_entries` se expulsa el sensor usado hace más tiempo
+#-----------------------------------
+
+def test_max_entries_evicts_least_recently_used():
+    registry = SensorRegistry(ttl=60, max_entries=2)
+    registry.add("s1")
+    registry.add("s2")
+    assert registry.contains("s1")
+    registry.add("s3")
+
+    assert registry.stats()["entries"] == 2
+    assert registry.contains("s1") and registry.contains("s3")
+    assert not registry.contains("s2")
+
+#-----------------------------------
+#   Test de invalidación tras el commit.
+#   Con la conexión de la petición, el sensor sigue en caché hasta que se
+#   confirma la transacción
+#-----------------------------------
+
+def test_discard_waits_for_commit(monkeypatch):
+    registry = SensorRegistry(ttl=60)
+    monkeypatch.setattr(sensores, "sensor_registry", registry)
+    registry.add("s1")
+
+    conn = CommitConnection(FakeCursor(["s1"]))
+    sensores.delete_sensor_records(1, False, "s1", conn=conn)
+    assert registry.contains("s1")
+
+    conn.commit()
+    assert not registry.contains("s1")
@@ -0,0 +1,100 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_sensor_sweeper.py
+#   Descripción: Módulo que realiza tests del barrido de sensores inactivos
+#-----------------------------------
+
+from datetime import datetime, timedelta
+from backend.app import sensor_sweeper as sweeper_module
+from backend.app.sensor_sweeper import SensorSweeper, transitions_for, get_sensor_states
+from backend.app.sensores import bind_sensor_to_user
+from backend.app.user_actions import insert_user
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+DEAD_CUTOFF = NOW - timedelta(days=7)
+
+#-----------------------------------
+#   Test de cambios de estado.
+#   Un sensor solo sube de estado y no se repite el cambio ya guardado
+#-----------------------------------
+
+def test_transitions_only_move_forward():
+    rows = [
+        {"UUID": "s1", "LAST_ACTIVE": NOW - timedelta(days=2), "STATE": None},
+        {"UUID": "s2", "LAST_ACTIVE": NOW - timedelta(days=8), "STATE": None},
+        {"UUID": "s3", "LAST_ACTIVE": NOW - timedelta(days=8), "STATE": "STALE"},
+        {"UUID": "s4", "LAST_ACTIVE": NOW - timedelta(days=2), "STATE": "STALE"},
+        {"UUID": "s5", "LAST_ACTIVE": NOW - timedelta(days=2), "STATE": "DEAD"},
+    ]
+
+    assert transitions_for(rows, DEAD_CUTOFF) == [
+        ("s1", "ACTIVE", "STALE", NOW - timedelta(days=2)),
+        ("s2", "ACTIVE", "DEAD", NOW - timedelta(days=8)),
+        ("s3", "STALE", "DEAD", NOW - timedelta(days=8)),
+    ]
+
+#-----------------------------------
+#   Test de bloqueo.
+#   Si otro proceso tiene el barrido en marcha no se hace nada
+#-----------------------------------
+
+class _LockedCursor:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, sql, params=None):
+        self.queries.append(sql)
+
+    def fetchone(self):
+        return {"LOCKED": 0}
+
+    def close(self):
+        pass
+
+
+class _LockedConnection:
+    def __init__(self):
+        self.cursor_obj = _LockedCursor()
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return self.cursor_obj
+
+    def close(self):
+        self.closed = True
+
+
+def test_sweep_skipped_while_locked(monkeypatch):
+    conn = _LockedConnection()
+    monkeypatch.setattr(sweeper_module, "get_connection", lambda: conn)
+    sweeper = SensorSweeper(enabled=False)
+
+    assert sweeper.sweep(NOW) is False
+    assert len(conn.cursor_obj.queries) == 1 and conn.closed
+    assert sweeper.stats()["skipped"] == 1 and sweeper.stats()["sweeps"] == 0
+
+#-----------------------------------
+#   Test de consulta de estados.
+#   Devuelve el recuento por estado y filtra por estado
+#-----------------------------------
+
+def test_get_sensor_states(db):
+    user = insert_user("sweepuser", "sweep@example.com", "password", conn=db)["usuario"]
+    with db.cursor() as cursor:
+        for uuid, state, days in (("sweep-1", "STALE", 2), ("sweep-2", "DEAD", 10)):
+            bind_sensor_to_user(user["id"], uuid, conn=db)
+            cursor.execute(
+                "INSERT INTO SENSORES_ESTADO (UUID, STATE, LAST_ACTIVE, SINCE) VALUES (%s, %s, %s, %s)",
+                (uuid, state, NOW - timedelta(days=days), NOW)
+            )
+
+    result = get_sensor_states(conn=db)
+    assert result["recuento"]["STALE"] >= 1 and result["recuento"]["DEAD"] >= 1
+
+    dead = get_sensor_states("dead", conn=db)
+    assert "sweep-2" in [s["UUID"] for s in dead["sensors"]]
+    assert all(s["STATE"] == "DEAD" for s in dead["sensors"])
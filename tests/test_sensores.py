@@ -8,9 +8,19 @@
 #   Descripción: Módulo para realizar tests de las operaciones con sensores (insertar medicion y vincular sensor)
 #-----------------------------------
 
+import json
 import pytest
-from backend.app.sensores import bind_sensor_to_user, add_reading
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from pydantic import ValidationError
+from backend.app import sensores
+from backend.app.sensores import (
+    bind_sensor_to_user, add_reading, add_readings_batch, parse_bbox, get_user_sensors,
+    get_all_sensors, parse_time_range, get_all_readings_for_datetime, get_multi_gas_readings_for_datetime,
+    USER_SENSOR_READINGS, MAX_TIME_RANGE
+)
 from backend.app.user_actions import insert_user
+from backend.app.schemas.sensors import BatchReading
 
 #-----------------------------------
 #   Test de vinculación.
@@ -45,11 +55,266 @@ def test_add_reading(db):
     uuid = "sensor-5678"
     bind_sensor_to_user(user_id, uuid, conn=db)
 
-    result = add_reading(uuid, gas_value=3.14, temperature_value=25.5, position="Lab", conn=db)
+    result = add_reading(uuid, "O3", 3.14, 25.5, position="Lab", conn=db)
     assert result["status"] == "ok"
 
     cursor = db.cursor(dictionary=True)
     cursor.execute("SELECT * FROM MEDICIONES WHERE ASSOCIATED_UUID=%s", (uuid,))
     reading_row = cursor.fetchone()
     cursor.close()
-    assert reading_row is not None
\ No newline at end of file
+    assert reading_row is not None
+
+#-----------------------------------
+#   Test de inserción por lotes.
+#   Inserta un lote con un sensor vinculado y otro desconocido:
+#   solo se rechazan las lecturas del desconocido
+#-----------------------------------
+
+def test_add_readings_batch(db):
+    user = insert_user("batchuser", "batch@example.com", "password", conn=db)["usuario"]
+    uuid = "sensor-batch"
+    bind_sensor_to_user(user["id"], uuid, conn=db)
+
+    readings = [
+        BatchReading(associated_uuid=uuid, gasType="O3", gas=40.0, temperature=20.0),
+        BatchReading(associated_uuid="sensor-desconocido", gasType="O3", gas=41.0, temperature=20.5),
+        BatchReading(associated_uuid=uuid, gasType="NO2", gas=12.0, temperature=21.0),
+    ]
+
+    result = add_readings_batch(readings, conn=db)
+    assert result["aceptadas"] == 2
+    assert result["rechazadas"] == 1
+    assert [r["aceptada"] for r in result["resultados"]] == [True, False, True]
+
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) AS N FROM MEDICIONES WHERE ASSOCIATED_UUID=%s", (uuid,))
+    count = cursor.fetchone()["N"]
+    cursor.close()
+    assert count == 2
+
+#-----------------------------------
+#   Test de coordenadas.
+#   Una posición GeoJSON se guarda también en LATITUDE y LONGITUDE
+#-----------------------------------
+
+def test_add_reading_stores_lat_lon(db):
+    user = insert_user("geouser", "geo@example.com", "password", conn=db)["usuario"]
+    uuid = "sensor-geo"
+    bind_sensor_to_user(user["id"], uuid, conn=db)
+
+    position = json.dumps({"type": "Point", "coordinates": [-0.376, 39.47]})
+    add_reading(uuid, "O3", 1.0, 20.0, position=position, conn=db)
+
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT LATITUDE, LONGITUDE FROM MEDICIONES WHERE ASSOCIATED_UUID=%s", (uuid,))
+    row = cursor.fetchone()
+    cursor.close()
+    assert float(row["LATITUDE"]) == 39.47
+    assert float(row["LONGITUDE"]) == -0.376
+
+#-----------------------------------
+#   Test de sensores de un usuario.
+#   Cada sensor trae sus últimas mediciones, de la más reciente a la más
+#   antigua, y un sensor sin mediciones aparece con la lista vacía
+#-----------------------------------
+
+def test_get_user_sensors_latest_readings(db):
+    user = insert_user("ownersuser", "owner@example.com", "password", conn=db)["usuario"]
+    for uuid in ("sensor-a", "sensor-b", "sensor-c"):
+        bind_sensor_to_user(user["id"], uuid, conn=db)
+
+    cursor = db.cursor()
+    rows = [("sensor-a", f"2026-01-01 {hour:02d}:00:00", "O3", float(hour)) for hour in range(24)]
+    rows.append(("sensor-b", "2026-01-02 10:00:00", "NO2", 7.0))
+    cursor.executemany(
+        "INSERT INTO MEDICIONES (ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE) VALUES (%s, %s, %s, %s)",
+        rows
+    )
+    cursor.close()
+
+    sensores = {s["uuid"]: s["mediciones"] for s in get_user_sensors(user["id"], conn=db)["sensores"]}
+    assert len(sensores["sensor-a"]) == USER_SENSOR_READINGS
+    assert [m["GAS_VALUE"] for m in sensores["sensor-a"][:2]] == [23.0, 22.0]
+    assert [m["GAS_VALUE"] for m in sensores["sensor-b"]] == [7.0]
+    assert sensores["sensor-c"] == []
+
+#-----------------------------------
+#   Test del listado de administración.
+#   Filtra por inactividad y por subcadena del UUID en la base de datos,
+#   del más antiguo al más reciente, y cuenta cada ventana de inactividad
+#-----------------------------------
+
+def test_get_all_sensors_inactivity_filter(db):
+    user = insert_user("adminlist", "adminlist@example.com", "password", conn=db)["usuario"]
+    cursor = db.cursor()
+    now = datetime.now().replace(microsecond=0)
+    for uuid, days in (("inact-zz-recent", 0), ("inact-zz-week", 10), ("inact-zz-old", 200)):
+        bind_sensor_to_user(user["id"], uuid, conn=db)
+        cursor.execute("UPDATE SENSORES SET LAST_ACTIVE = %s WHERE UUID = %s", (now - timedelta(days=days), uuid))
+    cursor.close()
+
+    result = get_all_sensors(conn=db, inactive_days=7, uuid="inact-zz", limit=1)
+    assert [s["UUID"] for s in result["sensors"]] == ["inact-zz-old"]
+    assert result["inactividad"] == {"1": 2, "7": 2, "30": 1, "180": 1, "todos": 3}
+
+    result = get_all_sensors(conn=db, after=result["siguiente"], inactive_days=7, uuid="inact-zz", limit=1)
+    assert [s["UUID"] for s in result["sensors"]] == ["inact-zz-week"]
+    assert result["siguiente"] is None and result["inactividad"] is None
+
+#-----------------------------------
+#   Test de rectángulo visible.
+#   Se acepta [oeste, sur, este, norte] y se rechaza un rectángulo invertido
+#-----------------------------------
+
+def test_parse_bbox():
+    assert parse_bbox([-0.5, 39.4, -0.3, 39.5]) == (-0.5, 39.4, -0.3, 39.5)
+    assert parse_bbox(None) is None
+
+    with pytest.raises(HTTPException) as error:
+        parse_bbox([-0.3, 39.4, -0.5, 39.5])
+    assert error.value.status_code == 400
+
+#-----------------------------------
+#   Test de rango de fechas.
+#   Un día o una hora se traducen a [desde, hasta) y se rechazan las fechas
+#   mal formadas y los rangos vacíos, incompletos o demasiado largos
+#-----------------------------------
+
+def test_parse_time_range():
+    assert parse_time_range("2026-10-18") == (datetime(2026, 10, 18), datetime(2026, 10, 19))
+    assert parse_time_range("2026-10-18 13") == (datetime(2026, 10, 18, 13), datetime(2026, 10, 18, 14))
+    assert parse_time_range("2026-10-18T13:05") == (datetime(2026, 10, 18, 13, 5), datetime(2026, 10, 18, 13, 6))
+    assert parse_time_range(" 2026-10-18 13:05:09 ")[1] == datetime(2026, 10, 18, 13, 5, 10)
+
+    start, end = datetime(2026, 10, 1), datetime(2026, 10, 18, 12)
+    assert parse_time_range(start=start, end=end) == (start, end)
+    # El rango explícito tiene prioridad sobre la fecha
+    assert parse_time_range("2025-01-01", start, end) == (start, end)
+
+    for args, kwargs in (
+        (("18/10/2026",), {}),
+        (("2026-13-01",), {}),
+        ((None,), {}),
+        ((), {"start": start}),
+        ((), {"start": end, "end": start}),
+        ((), {"start": start, "end": start}),
+        ((), {"start": start, "end": start + MAX_TIME_RANGE + timedelta(seconds=1)}),
+    ):
+        with pytest.raises(HTTPException) as error:
+            parse_time_range(*args, **kwargs)
+        assert error.value.status_code == 400
+
+#-----------------------------------
+#   Test de límite superior excluido.
+#   Una medición a las 23:59:59 pertenece a su día; una a las 00:00:00 del
+#   día siguiente, no
+#-----------------------------------
+
+def test_day_range_excludes_next_midnight(db):
+    user = insert_user("rangeuser", "range@example.com", "password", conn=db)["usuario"]
+    bind_sensor_to_user(user["id"], "sensor-range", conn=db)
+
+    cursor = db.cursor()
+    cursor.executemany(
+        "INSERT INTO MEDICIONES (ASSOCIATED_UUID, DATE, GAS_TYPE, GAS_VALUE) VALUES (%s, %s, %s, %s)",
+        [
+            ("sensor-range", "2026-01-01 00:00:00", "RANGO", 1.0),
+            ("sensor-range", "2026-01-01 23:59:59", "RANGO", 2.0),
+            ("sensor-range", "2026-01-02 00:00:00", "RANGO", 3.0),
+        ]
+    )
+    cursor.close()
+
+    result = get_all_readings_for_datetime("2026-01-01", "RANGO", conn=db)
+    assert sorted(m["GAS_VALUE"] for m in result["mediciones"]) == [1.0, 2.0]
+
+class RowsCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def execute(self, query, params=()):
+        self.params = params
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class RowsConnection:
+    def __init__(self, rows):
+        self.cursor_obj = RowsCursor(rows)
+
+    def cursor(self, dictionary=False):
+        return self.cursor_obj
+
+
+#-----------------------------------
+#   Test de varios gases a la vez.
+#   Con un cursor simulado: por posición se devuelve el valor más reciente de
+#   cada gas aunque GAS_TYPE venga con otras mayúsculas, y None para un gas
+#   sin mediciones
+#-----------------------------------
+
+def test_multi_gas_pivot_by_position():
+    a, b = '{"type": "Point", "coordinates": [-0.37, 39.47]}', '{"type": "Point", "coordinates": [-0.38, 39.48]}'
+    conn = RowsConnection([
+        {"POSITION": a, "GAS_TYPE": "O3", "GAS_VALUE": 10.0, "DATE": datetime(2026, 1, 1, 10)},
+        {"POSITION": a, "GAS_TYPE": "o3", "GAS_VALUE": 12.0, "DATE": datetime(2026, 1, 1, 11)},
+        {"POSITION": a, "GAS_TYPE": "No2", "GAS_VALUE": 30.0, "DATE": datetime(2026, 1, 1, 9)},
+        {"POSITION": b, "GAS_TYPE": "no2", "GAS_VALUE": 40.0, "DATE": datetime(2026, 1, 1, 8)},
+    ])
+
+    result = get_multi_gas_readings_for_datetime("2026-01-01", ["O3", "no2", "co", "o3"], conn=conn)
+
+    assert result["gasTypes"] == ["o3", "no2", "co"]
+    assert conn.cursor_obj.params[:3] == ("o3", "no2", "co")
+    assert result["posiciones"] == [
+        {"POSITION": a, "o3": 12.0, "no2": 30.0, "co": None},
+        {"POSITION": b, "o3": None, "no2": 40.0, "co": None},
+    ]
+
+    with pytest.raises(HTTPException) as error:
+        get_multi_gas_readings_for_datetime("2026-01-01", ["co"], conn=RowsConnection([]))
+    assert error.value.status_code == 404
+
+#-----------------------------------
+#   Test de longitud de los campos.
+#   Se rechazan en la validación los valores que no caben en las columnas
+#   del resumen horario
+#-----------------------------------
+
+def test_reading_rejects_values_wider_than_columns():
+    reading = {"associated_uuid": "s1", "gasType": "O3", "gas": 1.0, "temperature": 20.0}
+    assert BatchReading(**reading).gasType == "O3"
+
+    for field, value in (("gasType", "x" * 33), ("position", "x" * 256), ("associated_uuid", "")):
+        with pytest.raises(ValidationError):
+            BatchReading(**{**reading, field: value})
+
+#-----------------------------------
+#   Test de fechas del lote.
+#   Se quitan los microsegundos antes de insertar y de publicar, también en
+#   los timestamp que manda el cliente
+#-----------------------------------
+
+def test_batch_truncates_microseconds(monkeypatch):
+    inserted, published = [], []
+    monkeypatch.setattr(sensores, "_known_sensors", lambda cursor, uuids: {"s1"})
+    monkeypatch.setattr(sensores, "_insert_readings", lambda cursor, rows: inserted.extend(rows))
+    monkeypatch.setattr(sensores, "accumulate_rollups", lambda cursor, rows: None)
+    monkeypatch.setattr(sensores, "_touch_sensors", lambda cursor, last_active: None)
+    monkeypatch.setattr(sensores, "_publish_readings", published.extend)
+
+    readings = [
+        BatchReading(associated_uuid="s1", gasType="O3", gas=1.0, temperature=20.0),
+        BatchReading(associated_uuid="s1", gasType="O3", gas=2.0, temperature=20.0,
+                     timestamp=datetime(2026, 1, 1, 10, 0, 0, 999999)),
+    ]
+    add_readings_batch(readings, conn=RowsConnection([]))
+
+    assert [row[1].microsecond for row in inserted] == [0, 0]
+    assert inserted[1][1] == datetime(2026, 1, 1, 10, 0, 0)
+    assert published == inserted
@@ -0,0 +1,174 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_sessions.py
+#   Descripción: Módulo que realiza tests de los tokens de sesión firmados
+#-----------------------------------
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from backend.app.main import app
+from backend.app import sessions, user_actions
+from backend.app.db import get_db
+from backend.app.sessions import SessionManager, authorize, session_manager
+
+client = TestClient(app)
+
+#-----------------------------------
+#   Test de emisión y comprobación.
+#   Un token válido identifica al usuario y la segunda vez sale de memoria
+#-----------------------------------
+
+def test_issue_and_resolve():
+    manager = SessionManager(secret=b"clave")
+    token = manager.issue(7, True)
+
+    session = manager.resolve(token)
+    assert session.user_id == 7 and session.is_admin
+    assert manager.resolve(token) == session
+    assert manager.stats()["hits"] == 1
+
+#-----------------------------------
+#   Test de tokens no válidos.
+#   Se rechazan los modificados, los firmados con otra clave, los caducados
+#   y los de un usuario borrado
+#-----------------------------------
+
+def test_invalid_tokens_are_rejected():
+    manager = SessionManager(secret=b"clave")
+    token = manager.issue(7, False)
+    _, rest = token.split(".", 1)
+
+    assert manager.resolve("8." + rest) is None
+    assert manager.resolve(token.replace(".0.", ".1.", 1)) is None
+    assert manager.resolve("basura") is None
+    assert SessionManager(secret=b"otra").resolve(token) is None
+    expired = SessionManager(secret=b"clave", ttl=0)
+    assert expired.resolve(expired.issue(7, False)) is None
+
+    assert manager.resolve(token) is not None
+    manager.revoke_user(7)
+    assert manager.resolve(token) is None
+
+#-----------------------------------
+#   Test de permisos.
+#   Un usuario solo accede a sus datos; un administrador, a los de cualquiera
+#-----------------------------------
+
+def test_authorize():
+    manager = SessionManager(secret=b"clave")
+    user = manager.resolve(manager.issue(7, False))
+    admin = manager.resolve(manager.issue(1, True))
+
+    authorize(user, 7)
+    authorize(admin, 7)
+    with pytest.raises(HTTPException) as error:
+        authorize(user, 8)
+    assert error.value.status_code == 403
+
+#-----------------------------------
+#   Test de endpoint protegido.
+#   Sin token, o con uno no válido, se responde 401
+#-----------------------------------
+
+def test_endpoint_requires_session():
+    response = client.post("/v1/me/dashboard", json={"user_id": 1})
+    assert response.status_code == 401
+
+    response = client.post("/v1/me/dashboard", json={"user_id": 1}, headers={"Authorization": "Bearer 1.0.0.0.x"})
+    assert response.status_code == 401
+
+#-----------------------------------
+#   Test de clave obligatoria.
+#   Sin SESSION_SECRET no se arranca, salvo en modo de desarrollo
+#-----------------------------------
+
+def test_secret_required_unless_dev(monkeypatch):
+    monkeypatch.delenv("SESSION_SECRET", raising=False)
+    monkeypatch.setattr(sessions, "SESSION_INSECURE_DEV", False)
+    with pytest.raises(RuntimeError):
+        SessionManager()
+
+    monkeypatch.setattr(sessions, "SESSION_INSECURE_DEV", True)
+    assert SessionManager().resolve(SessionManager().issue(7, False)) is None
+
+    monkeypatch.setenv("SESSION_SECRET", "clave")
+    monkeypatch.setattr(sessions, "SESSION_INSECURE_DEV", False)
+    assert SessionManager().resolve(SessionManager().issue(7, False)) is not None
+
+#-----------------------------------
+#   Test de endpoints de cuentas y administración.
+#   Sin sesión se responde 401; con la sesión de otro usuario (o sin ser
+#   administrador) se responde 403 y no se modifica nada
+#-----------------------------------
+
+class OtherUserCursor:
+    """
+    @brief Cursor en el que cualquier búsqueda de usuario encuentra al usuario 8.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+
+    def fetchall(self):
+        return [{"ID": 8, "USERNAME": "otro", "EMAIL": "otro@example.com"}]
+
+    def close(self):
+        pass
+
+
+class OtherUserConnection:
+    def __init__(self):
+        self.cursor_obj = OtherUserCursor()
+
+    def cursor(self, dictionary=False):
+        return self.cursor_obj
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_account_and_admin_endpoints_require_session(monkeypatch):
+    user = {"Authorization": "Bearer " + session_manager.issue(7, False)}
+    admin_routes = [
+        ("get", "/v1/users"),
+        ("get", "/v1/data/admin/sensors"),
+        ("get", "/v1/data/admin/sensors/state"),
+        ("get", "/v1/data/admin/sensors/events"),
+        ("get", "/v1/system/stats"),
+    ]
+    for method, path in admin_routes:
+        assert getattr(client, method)(path).status_code == 401
+        assert getattr(client, method)(path, headers=user).status_code == 403
+
+    update = {"username": "otro", "email": "otro@example.com", "password": None, "profilePic": "x.png"}
+    assert client.put("/v1/users/update", json=update).status_code == 401
+    assert client.request("DELETE", "/v1/users/update", json={"user_id": 8}).status_code == 401
+
+    conn = OtherUserConnection()
+    monkeypatch.setattr(user_actions, "get_connection", lambda: conn)
+    app.dependency_overrides[get_db] = lambda: conn
+    try:
+        assert client.put("/v1/users/update", json=update, headers=user).status_code == 403
+        response = client.request("DELETE", "/v1/users/update", json={"username": "otro"}, headers=user)
+        assert response.status_code == 403
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert not any(q.startswith(("UPDATE", "DELETE")) for q in conn.cursor_obj.queries)
@@ -0,0 +1,132 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_streaming.py
+#   Descripción: Módulo que realiza tests de las respuestas en streaming
+#-----------------------------------
+
+import json
+import asyncio
+import threading
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from backend.app import streaming
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = 0
+
+    def execute(self, query, params):
+        pass
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self):
+        pass
+
+
+class FailingCursor(FakeCursor):
+    def fetchmany(self, size):
+        if self.fetches:
+            raise RuntimeError("conexión perdida")
+        return super().fetchmany(size)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_obj = FakeCursor(rows)
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return self.cursor_obj
+
+    def close(self):
+        self.closed = True
+
+
+def collect(response):
+    async def read():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(read())
+
+
+ROWS = [{"UUID": f"S{i}", "LAST_ACTIVE": datetime(2026, 10, 18, 12, i)} for i in range(5)]
+
+#-----------------------------------
+#   Test de NDJSON.
+#   Una fila por línea, leída por bloques, y la conexión se devuelve al final
+#-----------------------------------
+
+def test_stream_query_ndjson(monkeypatch):
+    conn = FakeConnection(list(ROWS))
+    monkeypatch.setattr(streaming, "get_connection", lambda: conn)
+
+    response = streaming.stream_query("SELECT", (), "ndjson", chunk_size=2)
+    lines = collect(response).decode("utf-8").splitlines()
+
+    assert [json.loads(line)["UUID"] for line in lines] == ["S0", "S1", "S2", "S3", "S4"]
+    assert conn.cursor_obj.fetches == 4
+    assert conn.closed
+
+#-----------------------------------
+#   Test de array JSON.
+#   Los bloques concatenados forman un único array válido
+#-----------------------------------
+
+def test_stream_query_json_array(monkeypatch):
+    monkeypatch.setattr(streaming, "get_connection", lambda: FakeConnection(list(ROWS)))
+
+    body = collect(streaming.stream_query("SELECT", (), "json", chunk_size=2))
+
+    assert json.loads(body)[4]["LAST_ACTIVE"] == "2026-10-18T12:04:00"
+
+#-----------------------------------
+#   Test de error a mitad de descarga.
+#   El cuerpo termina con una fila de error y sigue siendo un array válido
+#-----------------------------------
+
+def test_stream_query_ends_with_error_marker(monkeypatch):
+    conn = FakeConnection([])
+    conn.cursor_obj = FailingCursor(list(ROWS))
+    monkeypatch.setattr(streaming, "get_connection", lambda: conn)
+
+    rows = json.loads(collect(streaming.stream_query("SELECT", (), "json", chunk_size=2)))
+
+    assert [row.get("UUID") for row in rows[:2]] == ["S0", "S1"]
+    assert streaming.STREAM_ERROR_KEY in rows[-1]
+    assert conn.closed
+
+#-----------------------------------
+#   Test de límite de descargas.
+#   Por encima del máximo se responde 503 sin pedir conexión, y al terminar
+#   una descarga su hueco queda libre
+#-----------------------------------
+
+def test_stream_query_limits_concurrent_downloads(monkeypatch):
+    opened = []
+
+    def get_connection():
+        opened.append(FakeConnection(list(ROWS)))
+        return opened[-1]
+
+    monkeypatch.setattr(streaming, "get_connection", get_connection)
+    monkeypatch.setattr(streaming, "_stream_slots", threading.BoundedSemaphore(1))
+
+    response = streaming.stream_query("SELECT", (), "ndjson")
+    with pytest.raises(HTTPException) as error:
+        streaming.stream_query("SELECT", (), "ndjson")
+    assert error.value.status_code == 503
+    assert len(opened) == 1
+
+    collect(response)
+    collect(streaming.stream_query("SELECT", (), "ndjson"))
+    assert len(opened) == 2
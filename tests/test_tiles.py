@@ -0,0 +1,113 @@
+#-----------------------------------
+#   © 2026 OxiGo. Todos los derechos reservados.
+#-----------------------------------
+#   Autor: Fédor Tikhomirov
+#   Fecha: 18 de octubre de 2026
+#-----------------------------------
+#   Fichero: test_tiles.py
+#   Descripción: Módulo que realiza tests del renderizado de teselas del mapa
+#-----------------------------------
+
+import os
+import zlib
+import struct
+import numpy as np
+from backend.app.tiles import (
+    render_tile, tile_bounds, project, prune_tile_cache, live_version, tile_cache_path, version_key,
+    TILE_SIZE, TILE_LIVE_BUCKET, LEVEL_COLORS
+)
+
+
+def decode_png(data: bytes):
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, idat = 8, b""
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        tag = data[pos + 4:pos + 8]
+        if tag == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(TILE_SIZE, TILE_SIZE * 4 + 1)
+    return raw[:, 1:].reshape(TILE_SIZE, TILE_SIZE, 4)
+
+#-----------------------------------
+#   Test de proyección.
+#   Las esquinas de una tesela caen en sus píxeles del mundo
+#-----------------------------------
+
+def test_tile_bounds_match_projection():
+    west, south, east, north = tile_bounds(12, 2043, 1559)
+    px, py = project(np.array([north]), np.array([west]), 12)
+
+    assert round(float(px[0])) == 2043 * TILE_SIZE
+    assert round(float(py[0])) == 1559 * TILE_SIZE
+    assert west < east and south < north
+
+#-----------------------------------
+#   Test de renderizado.
+#   Una medición alta de O3 en el centro se pinta en rojo y lejos queda transparente
+#-----------------------------------
+
+def test_render_tile_colours_by_threshold():
+    west, south, east, north = tile_bounds(12, 2043, 1559)
+    lat, lon = (south + north) / 2, (west + east) / 2
+
+    image = decode_png(render_tile(12, 2043, 1559, np.array([lat]), np.array([lon]), np.array([200.0]), "o3"))
+
+    assert tuple(image[128, 128, :3]) == tuple(LEVEL_COLORS[2])
+    assert image[128, 128, 3] > 0
+    assert image[0, 0, 3] == 0
+
+#-----------------------------------
+#   Test de versión de hoy.
+#   Cambia por tramos de tiempo, no con cada medición
+#-----------------------------------
+
+def test_live_version_changes_per_bucket():
+    start = 1_800_000_000 // TILE_LIVE_BUCKET * TILE_LIVE_BUCKET
+    assert live_version(start) == live_version(start + TILE_LIVE_BUCKET - 1)
+    assert live_version(start) != live_version(start + TILE_LIVE_BUCKET)
+
+#-----------------------------------
+#   Test de limpieza de la caché.
+#   Se borran las versiones superadas (por su valor, no por la fecha de la
+#   carpeta), las teselas caducadas y, por encima del tamaño máximo, las más
+#   antiguas
+#-----------------------------------
+
+def test_prune_tile_cache(tmp_path):
+    def tile(version: str, y: int, mtime: float):
+        path = tmp_path / "o3" / "20261018000000" / version / "12" / "2043" / f"{y}.png"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (mtime, mtime))
+        os.utime(tmp_path / "o3" / "20261018000000" / version, (mtime, mtime))
+        return path
+
+    now = 1_800_000_000
+    expired = tile("t10", 1, now - 1000)
+    oldest = tile("t10", 2, now - 30)
+    newest = tile("t10", 3, now - 10)
+    # Escrita después, pero es una versión anterior
+    old_version = tile("t9", 0, now - 5)
+
+    result = prune_tile_cache(str(tmp_path), max_bytes=100, max_age=500, now=now)
+
+    assert not old_version.exists() and not (tmp_path / "o3" / "20261018000000" / "t9").exists()
+    assert not expired.exists() and not oldest.exists()
+    assert newest.exists()
+    assert result == {"removed": 2, "bytes": 100}
+
+#-----------------------------------
+#   Test de versiones y rutas.
+#   Un rango cerrado va después de uno en curso y el gas no distingue
+#   mayúsculas en la ruta
+#-----------------------------------
+
+def test_version_key_and_cache_path():
+    versions = ["12-20261018235959", "t10", "0", "12-20261018120000", "t9", "13-20261018120000"]
+    assert sorted(versions, key=version_key) == [
+        "0", "t9", "t10", "12-20261018120000", "13-20261018120000", "12-20261018235959"
+    ]
+    assert tile_cache_path("O3", "20261018000000", "t1", 12, 2043, 1) == \
+        tile_cache_path("o3", "20261018000000", "t1", 12, 2043, 1)